@@ -74,6 +74,9 @@ from deaduction.pylib                            import logger
 from deaduction.pylib.server                     import ServerInterface
 from deaduction.pylib.autotest import                   select_exercise
 from deaduction.pylib.math_display.pattern_data import *
+from deaduction.pylib.math_display               import PatternInit
+from deaduction.pylib.pattern_math_obj.pattern_snapshot import \
+                                                        PatternSnapshots
 
 global _
 
@@ -88,6 +91,9 @@ arg_parser = argparse.ArgumentParser("Start deaduction graphical interface "
                                      "for Lean theorem prover")
 arg_parser.add_argument('--course', '-c', help="Course filename")
 arg_parser.add_argument('--exercise', '-e', help="Exercise (piece of) name")
+arg_parser.add_argument('--verify-installation', action='store_true',
+                        help="Check all Lean and mathlib files, without "
+                             "using cached checksums")
 
 
 ###################
@@ -310,7 +316,8 @@ async def site_installation_check():
     # erase_lean()
     # FOR DEBUGGING ONLY #
 
-    missing_packages = inst.check()
+    args, _unknown = arg_parser.parse_known_args(argv[1:])
+    missing_packages = inst.check(full_verify=args.verify_installation)
     
     if missing_packages:
         want_install_dialog = WantInstallMissingDependencies(
@@ -788,6 +795,7 @@ async def async_main():
                 with trio.move_on_after(10):
                     await wm.servint.file_invalidated.wait()
                 wm.servint.stop()  # Good job, buddy
+                wm.servint.stop_pool()
                 log.info("Lean server stopped!")
             if wm.nursery:
                 wm.nursery.cancel_scope.cancel()
@@ -801,6 +809,7 @@ def main():
     cenv.init()
     cdirs.init()
     inst.init()
+    PatternInit.snapshots = PatternSnapshots(cdirs.pattern_snapshots_dir)
 
     set_logger()
     version_nb = cvars.get("others.version", "?")
@@ -58,7 +58,8 @@ from PySide2.QtCore    import ( Signal,
                                 QModelIndex, QMimeData,
                                 QTimer,
                                 QRect,
-                                QPoint)
+                                QPoint,
+                                QEvent)
 from PySide2.QtWidgets import (QHBoxLayout,
                                QVBoxLayout,
                                QPushButton,
@@ -833,6 +834,9 @@ class StatementsTreeWidgetItem(QTreeWidgetItem):
 
         self.statement = statement
         self.parent = None  # Will be the QTreeWidget when inserted
+        # Tooltips are computed on first hover, see update_tooltip_text():
+        self.only_ips = True
+        self.tooltip_key = None
 
         super().__init__(None, self.to_display())
 
@@ -879,29 +883,52 @@ class StatementsTreeWidgetItem(QTreeWidgetItem):
 
     def set_tooltip(self, only_ips=True, check_availability=False):
         """
-        Set the math content of the statement as tooltip.
+        Prepare the math content of the statement as tooltip.
         If the flag only_ips is True, then no tooltips are shown if the
         initial proof states is not available. Otherwise the tooltip will
         show the Lean code content of the statement.
+        The tooltip text itself is computed only when it is shown, see
+        update_tooltip_text().
         """
 
-        available = self.statement.initial_proof_state is not None
-        if not available and check_availability:
+        if check_availability and not self.statement.has_initial_proof_state:
             self.setDisabled(True)
             return
         else:
             self.setDisabled(False)
 
+        self.only_ips = only_ips
+
+    def tooltip_settings(self) -> tuple:
+        """
+        Return the data, apart from the initial proof state, that the
+        tooltip text depends on.
+        """
+        return (self.is_exercise, self.only_ips,
+                cvars.get('i18n.select_language', "en"),
+                cvars.get('display.mathematics_font', 'Default'),
+                cvars.get("functionality.allow_implicit_use_of_definitions"))
+
+    def update_tooltip_text(self):
+        """
+        Set the tooltip text if it has never been computed, or if the
+        initial proof state or the display settings have changed since then.
+        """
+        ips = self.statement.initial_proof_state
+        key = self.tooltip_settings()
+        if self.tooltip_key is not None:
+            old_ips, old_key = self.tooltip_key
+            if old_ips is ips and old_key == key:
+                return
+
+        self.tooltip_key = (ips, key)
         text = self.statement.caption(is_exercise=self.is_exercise,
-                                      only_ips=only_ips)
+                                      only_ips=self.only_ips)
         if not text:
             return
         # Prevent wrap mode
         text = "<p style='white-space:pre'>" + text
         self.setToolTip(0, text)
-        # These tooltips contain maths
-        math_font_name = cvars.get('display.mathematics_font', 'Default')
-        QToolTip.setFont(math_font_name)
 
     def has_pretty_name(self, pretty_name: str) -> bool:
         return self.statement.pretty_name == pretty_name
@@ -1067,6 +1094,7 @@ class StatementsTreeWidget(QTreeWidget):
     #                 cvars.get("display.show_lean_name_for_statements")
 
     tooltips_font_size = cvars.get('display.tooltips_font_size', 10)
+    tooltips_font_name = None  # Last font set for QToolTip
 
     # TODO: show lean names only when lean console is on
     # (even if show_lean_name_for_statements == TRUE)
@@ -1317,6 +1345,26 @@ class StatementsTreeWidget(QTreeWidget):
             item.parent = self
             item.set_tooltip(check_availability=check_availability)
 
+    def viewportEvent(self, event: QEvent) -> bool:
+        """
+        Compute the tooltip of the hovered statement, if needed, just before
+        it is shown.
+        """
+        if event.type() == QEvent.ToolTip:
+            item = self.itemAt(event.pos())
+            if (isinstance(item, StatementsTreeWidgetItem)
+                    and not item.isDisabled()):
+                if item.parent is None:
+                    item.parent = self
+                item.update_tooltip_text()
+                # These tooltips contain maths
+                math_font_name = cvars.get('display.mathematics_font',
+                                           'Default')
+                if math_font_name != StatementsTreeWidget.tooltips_font_name:
+                    StatementsTreeWidget.tooltips_font_name = math_font_name
+                    QToolTip.setFont(math_font_name)
+        return super().viewportEvent(event)
+
     @property
     def potential_drop_receiver(self):
         return self._potential_drop_receiver
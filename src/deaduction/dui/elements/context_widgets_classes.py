@@ -157,13 +157,53 @@ class MathObjectWidgetItem(MathItem):
         self.math_object_wdg: Optional[MathObjectWidget] = None
         self.context_math_object = context_math_object
 
-        caption = context_math_object.display_with_type(format_='html')
-        bold = (self.context_math_object.is_new or
-                self.context_math_object.is_modified) and activate_bold
-        self.setText(caption, bold)
+        # Rendered caption and the data it depends on, besides math_type
+        self.caption = context_math_object.display_with_type(format_='html')
+        self.display_key = self.display_key_of(context_math_object)
+        self.bold = (self.context_math_object.is_new or
+                     self.context_math_object.is_modified) and activate_bold
+        self.setText(self.caption, self.bold)
         # self.setIcon(_TagIcon(self.tag))
         self.setDragEnabled(True)
 
+    @staticmethod
+    def display_key_of(context_math_object) -> tuple:
+        """
+        Return the data that the caption of context_math_object depends on,
+        apart from its math_type. Note that math_types are equal up to the
+        names of their bound vars.
+        """
+        math_type = context_math_object.math_type
+        return (context_math_object.name,
+                context_math_object.has_been_used_in_proof,
+                tuple(var.name for var in math_type.bound_vars()))
+
+    def can_display(self, context_math_object) -> bool:
+        """
+        True if self's caption is also the caption of context_math_object,
+        which should be either self's math_object or one of its unmodified
+        children in the next context.
+        """
+        cmo = context_math_object
+        if cmo is not self.context_math_object:
+            if (cmo.parent_context_math_object is not self.context_math_object
+                    or cmo.is_modified):
+                return False
+        return self.display_key == self.display_key_of(cmo)
+
+    def set_context_math_object(self, context_math_object,
+                                activate_bold=True):
+        """
+        Replace self's math_object by context_math_object, which must satisfy
+        self.can_display(). The text is set again only if boldface changes.
+        """
+        self.context_math_object = context_math_object
+        bold = (context_math_object.is_new or
+                context_math_object.is_modified) and activate_bold
+        if bold != self.bold:
+            self.bold = bold
+            self.setText(self.caption, bold)
+
     @property
     def tag(self):  # FIXME: obsolete
         tag = ('+' if self.context_math_object.is_new
@@ -398,6 +438,58 @@ class MathObjectWidget(QListView):
         model.removeRows(0, model.rowCount())
         self.add_math_objects(math_objects)
 
+    def update_math_objects(self, math_objects):
+        """
+        Display math_objects in place of the current ones, reusing the items
+        whose math_object is an unmodified parent of a new math_object (as
+        tagged by Goal.compare()). Reused items keep their rendered text and
+        selection state; other rows are removed, inserted or moved.
+        """
+        model = self.model()
+        old_items = {id(item.context_math_object): item
+                     for item in self.items}
+        selected_items = self.selected_items()
+
+        # (1) Items for math_objects
+        new_items = []
+        for math_object in math_objects:
+            item = old_items.pop(id(math_object), None)
+            if item is None:
+                parent = math_object.parent_context_math_object
+                item = old_items.pop(id(parent), None)
+            if item is not None and item.can_display(math_object):
+                item.set_context_math_object(math_object,
+                                             activate_bold=self.use_boldface)
+            else:
+                if item is not None:
+                    old_items[id(item.context_math_object)] = item
+                item = MathObjectWidgetItem(math_object,
+                                            activate_bold=self.use_boldface)
+                item.math_object_wdg = self
+            new_items.append(item)
+
+        # (2) Remove rows of items that are not reused
+        removed_rows = sorted((item.row() for item in old_items.values()),
+                              reverse=True)
+        for row in removed_rows:
+            model.removeRow(row)
+
+        # (3) Insert and move rows, in display order
+        moved_items = []
+        for row, item in enumerate(new_items):
+            current_row = item.row() if item.model() is not None else None
+            if current_row == row:
+                continue
+            if current_row is not None:
+                model.takeRow(current_row)
+                moved_items.append(item)
+            model.insertRow(row, item)
+
+        self.items = new_items
+        for item in moved_items:
+            if item in selected_items:
+                self.select_item(item)
+
     def item_from_index(self, index_):
         item = self.model().itemFromIndex(index_)
         return item
@@ -25,6 +25,8 @@ This file is part of dEAduction.
 """
 
 import logging
+from bisect import bisect_left, bisect_right, insort
+from heapq import heapify, heappop, heappush
 from typing import Union, Optional
 
 from deaduction.dui.elements.proof_tree.proof_tree_widget import \
@@ -33,7 +35,7 @@ from deaduction.dui.elements.proof_tree.proof_tree_widget import \
      TargetSubstitutionWGB, IntroWGB, IntroImpliesWGB)
 
 from deaduction.pylib.actions import SyntheticProofStepType
-from deaduction.pylib.proof_tree import ProofTree
+from deaduction.pylib.proof_tree import ProofTree, ProofTreeChanges
 
 global _
 
@@ -158,60 +160,88 @@ def widget_goal_block(parent_widget: Optional[WidgetGoalBlock],
     return wgb
 
 
-def update_from_node(wgb: WidgetGoalBlock, gn: GoalNode):
+def update_children_from_node(wgb: WidgetGoalBlock, gn: GoalNode) -> \
+        ([WidgetGoalBlock], [WidgetGoalBlock]):
     """
-    Recursively update the WidgetProofTree from (under) the given node,
-    so that its structure will reflect that of the ProofTree.
-    We have the following alternative:
+    Update the logical children of wgb so that they reflect the children
+    of gn. We have the following alternative:
     - either there is a new child goal_node for which we will create a
     child wgb;
     - or some child_wgb does not match the corresponding child goal_node:
     in this case all children_wgb should be deleted and new ones will be
     created.
     - or all children wgb match corresponding children goal_nodes.
+    Grandchildren are not considered.
 
-    Noe that this is NOT redundant with the update_display method of the
-    proof_tree_window, which ensures that the WidgetProofTree is correctly
-    displayed on screen, and should be called later on.
-
-    This function is a bit of an overkiller, since it probably re-creates many
-    WGB unnecessarily.
+    Return the lists of created and removed children wgb.
     """
-    pairs = list(zip(wgb.logical_children, gn.children_goal_nodes))
+    created = []
+    removed = []
+    old_children = list(wgb.logical_children)
+    pairs = list(zip(old_children, gn.children_goal_nodes))
 
     # (1) If some child_wgb is obsolete, replace it
-    if (len(wgb.logical_children) > len(gn.children_goal_nodes)
+    if (len(old_children) > len(gn.children_goal_nodes)
         or any([child_gn.goal_has_changed for child_gn in
                 gn.children_goal_nodes])
         or any([child_wgb.goal_node is not child_gn
                 for child_wgb, child_gn in pairs])):
         new_logical_children = []
-        for i in range(len(pairs)):
-            child_wgb = wgb.logical_children[i]
-            child_gn = gn.children_goal_nodes[i]
+        for child_wgb, child_gn in pairs:
             if child_gn.goal_has_changed or child_wgb.goal_node is not child_gn:
                 # Reset child_wgb
                 child_gn.goal_has_changed = False
+                removed.append(child_wgb)
                 child_wgb = widget_goal_block(wgb, child_gn)
+                created.append(child_wgb)
             new_logical_children.append(child_wgb)
+        removed.extend(old_children[len(pairs):])
         # Beware that now wgb.logical_children is meaningless: replace it!!
         wgb.logical_children = new_logical_children
 
-        pairs = zip(wgb.logical_children, gn.children_goal_nodes)
-
     # (2) Case of new children goal nodes
     if len(wgb.logical_children) < len(gn.children_goal_nodes):
         new_index = len(wgb.logical_children)
         new_children_gn = gn.children_goal_nodes[new_index:]
         for child_gn in new_children_gn:
             child_wgb = widget_goal_block(wgb, child_gn)
-        pairs = zip(wgb.logical_children, gn.children_goal_nodes)
+            created.append(child_wgb)
+
+    return created, removed
 
-    # In any case, recursively update children
-    for child_wgb, child_gn in pairs:
+
+def update_from_node(wgb: WidgetGoalBlock, gn: GoalNode):
+    """
+    Recursively update the WidgetProofTree from (under) the given node,
+    so that its structure will reflect that of the ProofTree,
+    see update_children_from_node().
+
+    Noe that this is NOT redundant with the update_display method of the
+    proof_tree_window, which ensures that the WidgetProofTree is correctly
+    displayed on screen, and should be called later on.
+
+    This function is a bit of an overkiller, since it walks the whole
+    subtree; ProofTreeController.update() only calls it on new WGBs.
+    """
+    update_children_from_node(wgb, gn)
+    for child_wgb, child_gn in zip(wgb.logical_children,
+                                   gn.children_goal_nodes):
         update_from_node(child_wgb, child_gn)
 
 
+def logical_descendants(wgb: WidgetGoalBlock) -> [WidgetGoalBlock]:
+    """
+    Return wgb and all its logical descendants.
+    """
+    wgbs = []
+    stack = [wgb]
+    while stack:
+        wgb = stack.pop()
+        wgbs.append(wgb)
+        stack.extend(wgb.logical_children)
+    return wgbs
+
+
 class ProofTreeController:
     """
     A class to create and update a ProofTreeWindow that reflects a ProofTree.
@@ -220,26 +250,40 @@ class ProofTreeController:
     reflects the model.
 
     The main method is update(), which proceeds as follows:
-    (1) Call the update_from_node() function, which recursively build
-    WidgetGoalBlock (WGB) instances that reflect the structure of the
-    ProofTree: to each GoalNode instance corresponds a WidgetGoalBlock
-    instance. Each WidgetGoalBlock instance is created by this function,
-    when it detects a defect some part of the ProofTree which is not
-    displayed correctly. Note that this stage alone has no effect on what is
-    displayed; the display is updated only at stage (3).
-    (2) The WGB are recursively enabled/disabled to reflect history moves: if
+    (1) Build WidgetGoalBlock (WGB) instances that reflect the structure of
+    the ProofTree: to each GoalNode instance corresponds a WidgetGoalBlock
+    instance. Each WidgetGoalBlock instance is created by the
+    update_children_from_node() function, when it detects a defect in some
+    part of the ProofTree which is not displayed correctly. Only the
+    GoalNodes recorded in the ProofTree's changes are considered, except
+    for the very first update. Note that this stage alone has no effect on
+    what is displayed; the display is updated only at stage (3).
+    (2) The WGB are enabled/disabled to reflect history moves: if
     history is not at end, then all WGB corresponding to GoalNode whose
-    goal_nb is > to the current goal_nb are disabled.
-    (3) The WGB are recursively displayed correctly, via the
-    WGB.update_display_recursively() method.
+    proof_step_nb is > to the current proof_step_nb are disabled. Only the
+    WGBs whose proof_step_nb is between the previous and the new
+    proof_step_nb are concerned.
+    (3) The WGB that are affected by the changes are displayed correctly,
+    via the WGB.update_display() method, children first, then their
+    logical parents if needed.
     (4) The current target is set, after which the WGB corresponding to the
     current GoalNode should indicate user that this is where the
     building of the ProofTree will continue.
+
+    WGBs are indexed by goal_nb, and by proof_step_nb for the history
+    moves.
     """
+    infinity = 10000000
+
     def __init__(self):
         self.disabled = False
         self.proof_tree: Optional[ProofTree] = None
         self.proof_tree_window = ProofTreeWindow()
+        self.__wgbs_by_goal_nb = dict()
+        self.__keys_by_goal_nb = dict()
+        self.__step_nbs = []  # Sorted list of (step_nb, goal_nb)
+        self.__till_step_nb = None
+        self.__last_step_nb = None
 
     def set_enabled(self, yes=True):
         self.disabled = not yes
@@ -248,24 +292,222 @@ class ProofTreeController:
         self.proof_tree = proof_tree
         # proof_tree.set_truncate_mode(True)
 
-    def __enable(self, till_step_nb):
+    # ───────────────────── WGB index ──────────────────── #
+    @staticmethod
+    def __step_keys(wgb: WidgetGoalBlock) -> [(int, int)]:
+        """
+        The keys of wgb in self.__step_nbs: the nb of the ProofStep that
+        created wgb's goal_node, and the nb of its child_proof_step, if any.
+        """
+        goal_nb = wgb.goal_nb
+        step_nb = wgb.step_nb
+        keys = [(step_nb if step_nb is not None else -1, goal_nb)]
+        child_proof_step = wgb.goal_node.child_proof_step
+        if child_proof_step:
+            keys.append((child_proof_step.pf_nb, goal_nb))
+        return keys
+
+    def __index(self, wgb: WidgetGoalBlock):
         """
-        Enable all WGB until a given goal_nb, disabled the others.
+        Index wgb, or update its keys.
+        """
+        self.__unindex(self.__wgbs_by_goal_nb.get(wgb.goal_nb))
+        keys = self.__step_keys(wgb)
+        for key in keys:
+            insort(self.__step_nbs, key)
+        self.__wgbs_by_goal_nb[wgb.goal_nb] = wgb
+        self.__keys_by_goal_nb[wgb.goal_nb] = keys
+
+    def __unindex(self, wgb: Optional[WidgetGoalBlock]):
+        if not wgb or self.__wgbs_by_goal_nb.get(wgb.goal_nb) is not wgb:
+            return
+        for key in self.__keys_by_goal_nb.pop(wgb.goal_nb):
+            index = bisect_left(self.__step_nbs, key)
+            del self.__step_nbs[index]
+        del self.__wgbs_by_goal_nb[wgb.goal_nb]
+
+    def __add_to_index(self, wgb: WidgetGoalBlock):
+        """
+        Index wgb and its logical descendants.
+        """
+        for descendant in logical_descendants(wgb):
+            self.__index(descendant)
+
+    def __remove_from_index(self, wgb: WidgetGoalBlock):
+        """
+        Remove wgb and its logical descendants from the index.
+        """
+        for descendant in logical_descendants(wgb):
+            self.__unindex(descendant)
+
+    def __wgb(self, goal_node: GoalNode) -> Optional[WidgetGoalBlock]:
+        """
+        Return the WGB that currently displays goal_node, if any.
+        """
+        wgb = self.__wgbs_by_goal_nb.get(goal_node.goal_nb)
+        if wgb and wgb.goal_node is goal_node:
+            return wgb
+
+    def __wgbs_in_step_range(self, min_nb, max_nb) -> [WidgetGoalBlock]:
+        """
+        Return the WGBs whose step_nb, or child_proof_step nb, is > min_nb
+        and <= max_nb.
+        """
+        step_nbs = self.__step_nbs
+        start = bisect_right(step_nbs, (min_nb, self.infinity))
+        end = bisect_right(step_nbs, (max_nb, self.infinity))
+        goal_nbs = dict.fromkeys(goal_nb for _, goal_nb in step_nbs[start:end])
+        return [self.__wgbs_by_goal_nb[goal_nb] for goal_nb in goal_nbs]
+
+    # ───────────────────── Update methods ──────────────────── #
+    def __update_structure(self, changes: ProofTreeChanges) \
+            -> ([WidgetGoalBlock], [WidgetGoalBlock]):
+        """
+        Adapt the WGBs to the modified GoalNodes, i.e. create WGBs for new
+        GoalNodes, and replace obsolete WGBs. Return the list of the new
+        WGBs, and the list of the WGBs whose children have been updated.
+        """
+        goal_nodes = changes.modified + changes.pruned
+        goal_nodes += [goal_node.parent_node
+                       for goal_node in changes.added + changes.modified]
+        goal_nodes = {goal_node.goal_nb: goal_node for goal_node in goal_nodes
+                      if goal_node is not None}
+
+        created = []
+        updated = []
+        # Parents first
+        for goal_nb in sorted(goal_nodes):
+            goal_node = goal_nodes[goal_nb]
+            wgb = self.__wgb(goal_node)
+            if not wgb:
+                continue
+            new_children, old_children = update_children_from_node(wgb,
+                                                                   goal_node)
+            updated.append(wgb)
+            self.__index(wgb)  # child_proof_step may have changed
+            for child_wgb in old_children:
+                self.__remove_from_index(child_wgb)
+            for child_wgb in new_children:
+                update_from_node(child_wgb, child_wgb.goal_node)
+                self.__add_to_index(child_wgb)
+                created.extend(logical_descendants(child_wgb))
+
+        created = [wgb for wgb in created if self.__wgb(wgb.goal_node) is wgb]
+        return created, updated
+
+    def __enable(self, till_step_nb, last_step_nb,
+                 created: [WidgetGoalBlock]) -> ([WidgetGoalBlock],
+                                                 [WidgetGoalBlock]):
+        """
+        Enable all WGB until a given proof_step nb, disable the others.
         Disabled WGB will be displayed in light grey. This is used when usr
-        moves in the history.
+        moves in the history. Only the created WGBs, and those whose
+        proof_step_nb is between the previous and the new till_step_nb or
+        last_step_nb need to be considered.
+        Return the list of considered WGBs, and the list of WGBs whose
+        enabled state has changed.
         """
-        main_block = self.proof_tree_window.main_block
-        main_block.enable_recursively(till_step_nb=till_step_nb)
+        nbs = [nb for nb in (till_step_nb, last_step_nb,
+                             self.__till_step_nb, self.__last_step_nb)
+               if nb is not None]
+        wgbs = self.__wgbs_in_step_range(min(nbs), max(nbs))
+        wgbs += created
+
+        flipped = []
+        for wgb in wgbs:
+            was_enabled = wgb.isEnabled()
+            step_nb = wgb.step_nb
+            wgb.set_enabled(step_nb is None or step_nb <= till_step_nb)
+            if wgb.isEnabled() != was_enabled:
+                flipped.append(wgb)
+        return wgbs, flipped
+
+    @staticmethod
+    def __update_display(wgbs: [WidgetGoalBlock]) -> [WidgetGoalBlock]:
+        """
+        Call update_display() on wgbs, children first (children have larger
+        goal_nb than their parent). Merged children, whose context depends
+        on their parent's, are also updated. The logical parent of an
+        updated WGB is updated too if the WGB has changed, or if the parent
+        is in charge of displaying the WGB, or is merged with it.
+        Return the list of updated WGBs.
+        """
+        changed = {wgb.goal_nb for wgb in wgbs}
+        pending = dict()
+        stack = list(wgbs)
+        while stack:
+            wgb = stack.pop()
+            if wgb.goal_nb not in pending:
+                pending[wgb.goal_nb] = wgb
+                stack.extend(child for child in wgb.logical_children
+                             if child.wanna_merge_up)
+
+        heap = [-goal_nb for goal_nb in pending]
+        heapify(heap)
+        updated = []
+        while heap:
+            wgb = pending[-heappop(heap)]
+            had_children_layout = wgb.children_layout is not None
+            wgb.update_display()
+            updated.append(wgb)
+            has_children_layout = wgb.children_layout is not None
+            parent = wgb.logical_parent
+            if (parent and parent.goal_nb not in pending
+                    and (wgb.goal_nb in changed or not has_children_layout
+                         or wgb.merge_down or parent.merge_down
+                         or had_children_layout != has_children_layout)):
+                pending[parent.goal_nb] = parent
+                heappush(heap, -parent.goal_nb)
+        return updated
+
+    @staticmethod
+    def __enable_or_disable_status(wgbs: [WidgetGoalBlock]):
+        """
+        Enable or disable the status_label of wgbs, children first, and of
+        their ancestors as long as the status in truncated mode changes.
+        """
+        pending = {wgb.goal_nb: wgb for wgb in wgbs}
+        heap = [-goal_nb for goal_nb in pending]
+        heapify(heap)
+        while heap:
+            wgb = pending[-heappop(heap)]
+            changed = (wgb.status_label.enable_or_disable()
+                       if wgb.status_label else True)
+            parent = wgb.logical_parent
+            if changed and parent and parent.goal_nb not in pending:
+                pending[parent.goal_nb] = parent
+                heappush(heap, -parent.goal_nb)
+
+    def __full_update(self):
+        """
+        Build the ProofTreeWindow from scratch.
+        """
+        ptw = self.proof_tree_window
+        main_block = widget_goal_block(None, self.proof_tree.root_node)
+        ptw.set_main_block(main_block)
+        update_from_node(main_block, self.proof_tree.root_node)
+        self.__wgbs_by_goal_nb = dict()
+        self.__keys_by_goal_nb = dict()
+        self.__step_nbs = []
+        self.__add_to_index(main_block)
+
+        proof_step_nb = self.proof_tree.next_proof_step_nb
+        self.__till_step_nb = (proof_step_nb - 1 if proof_step_nb is not None
+                               else self.infinity)
+        self.__last_step_nb = self.proof_tree.last_proof_step_nb
+        main_block.enable_recursively(till_step_nb=self.__till_step_nb)
+        ptw.update_display()
 
     def __is_at_end(self):
         return self.proof_tree.is_at_end()
 
     def update(self):
         """
-        Update self.proof_tree_widget according to self.proof_tree.
-        The update_from_node method creates the pertinent WidgetGoalBlocks
-        that reflects the GoalNodes of the proof tree. Then these new widgets
-        are inserted by the update_display method.
+        Update self.proof_tree_widget according to the changes of
+        self.proof_tree. The update_children_from_node function creates the
+        pertinent WidgetGoalBlocks that reflects the new GoalNodes of the
+        proof tree. Then these new widgets are inserted, and the affected
+        widgets are refreshed, by the update_display method.
         """
 
         if self.disabled:
@@ -274,41 +516,46 @@ class ProofTreeController:
         ptw = self.proof_tree_window
         if not self.proof_tree.root_node:
             return
-        elif not ptw.main_block:
-            main_block = widget_goal_block(None,
-                                           self.proof_tree.root_node)
-            ptw.set_main_block(main_block)
 
         current_goal_node = self.proof_tree.current_goal_node
-        # (1) Adapt ProofTreeWindow to ProofTree.
-        update_from_node(ptw.main_block, self.proof_tree.root_node)
-
-        # (2) Enable / disable to adapt to history move:
-        # proof_tree.next_proof_step_nb is the first proof_step that will be
-        # deleted if usr starts a new branch from here
-        proof_step_nb = self.proof_tree.next_proof_step_nb
-        # log.debug(f"Enabling till {proof_step_nb-1}")
-        self.__enable(till_step_nb=(proof_step_nb-1 if proof_step_nb is not None
-                                  else 10000000))
-        # log.info("Updating display")
-
-        # (3) Update display of ProofTreeWindow subwidgets:
+        changes = self.proof_tree.pop_changes()
         log.info(f"Updating...")
         ptw.unset_current_target()
-        ptw.update_display()
+        if (not ptw.main_block
+                or ptw.main_block.goal_node is not self.proof_tree.root_node):
+            self.__full_update()
+        else:
+            # (1) Adapt ProofTreeWindow to ProofTree.
+            created, updated = self.__update_structure(changes)
+
+            # (2) Enable / disable to adapt to history move:
+            # proof_tree.next_proof_step_nb is the first proof_step that will
+            # be deleted if usr starts a new branch from here
+            proof_step_nb = self.proof_tree.next_proof_step_nb
+            till_step_nb = (proof_step_nb - 1 if proof_step_nb is not None
+                            else self.infinity)
+            last_step_nb = self.proof_tree.last_proof_step_nb
+            considered, flipped = self.__enable(till_step_nb, last_step_nb,
+                                                created)
+            self.__till_step_nb = till_step_nb
+            self.__last_step_nb = last_step_nb
+
+            # (3) Update display of affected WGBs. Merging with parent
+            # depends on enabled state.
+            wgbs = [self.__wgb(goal_node)
+                    for goal_node in changes.pruned + changes.status_changed]
+            wgbs = [wgb for wgb in wgbs if wgb] + created + updated + flipped
+            wgbs += [wgb.logical_parent for wgb in flipped
+                     if wgb.logical_parent]
+            updated = self.__update_display(wgbs)
+            self.__enable_or_disable_status(considered + updated)
 
         # (4) Set current target:
-        goal_nb = current_goal_node.goal_nb
-        # log.info(f"Setting current target, current goal nb {goal_nb}...")
-        wdg = ptw.set_current_target(goal_nb, blinking=self.__is_at_end())
-        if wdg:
-            # print("Ensuring visible")
-            ptw.make_visible(wdg)
-
-        # wgb = self.wgb_from_goal_nb(1)
-        # if wgb and wgb.target_widget:
-        #     log.debug(f"Current status_msg for gn1 is "
-        #               f"{wgb.status_msg()}")
+        wgb = self.__wgb(current_goal_node)
+        if wgb:
+            wdg = ptw.set_current_target(wgb, blinking=self.__is_at_end())
+            if wdg:
+                ptw.make_visible(wdg)
 
     def __wgb_from_goal_nb(self, goal_nb: int, from_wgb=None) -> \
             WidgetGoalBlock:
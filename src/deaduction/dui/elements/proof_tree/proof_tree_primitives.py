@@ -29,7 +29,7 @@ from typing import Union, Optional
 from PySide2.QtWidgets import (QFrame, QLayout,
                                QHBoxLayout, QVBoxLayout, QGridLayout,
                                QWidget, QLabel, QSizePolicy, QToolButton)
-from PySide2.QtCore import Qt, QRect, QPoint, QTimer, Slot
+from PySide2.QtCore import Qt, QEvent, QRect, QPoint, QTimer, Slot
 from PySide2.QtGui import QColor, QPainter, QPolygon, QPen, QBrush, QPainterPath
 
 from deaduction.dui.primitives import MathLabel, DisclosureTriangle
@@ -110,6 +110,7 @@ class BlinkingLabel(QLabel):
         self._is_activated = None
         self.disclosed = True
         self._blinking_counter = None
+        self.truncated_text = None
 
     def start_blinking(self):
         """
@@ -170,15 +171,21 @@ class BlinkingLabel(QLabel):
         else:
             self.setStyleSheet("")
 
-    def enable_or_disable(self):
+    def enable_or_disable(self) -> bool:
         """
         Disable self if text does not coincide with text in truncated mode.
         This indicates that the status is not valid at the time of history.
+        Return True if the text in truncated mode has changed since last call.
         """
-        if self.text(truncate=True) != self.text():
+        truncated_text = self.text(truncate=True)
+        if truncated_text != self.text():
             self.setEnabled(False)
         else:
             self.setEnabled(True)
+        changed = (self.truncated_text is None
+                   or truncated_text != self.truncated_text)
+        self.truncated_text = truncated_text
+        return changed
 
 # def display_object(math_objects):
 #     """
@@ -615,6 +622,7 @@ class RawLabelMathObject(MathLabel):
             self.setStyleSheet("font-weight: bold;")
         else:
             self.setStyleSheet("")
+        self.update_text()
 
     @property
     def is_prop(self):
@@ -652,9 +660,12 @@ class RawLabelMathObject(MathLabel):
     def changeEvent(self, event) -> None:
         """
         In case object is enabled/disabled, change to properly display colored
-        variables.
+        variables. Other changes (e.g. a new parent or style when the proof
+        tree is re-arranged) do not affect the text; boldface is handled by
+        set_bold().
         """
-        self.setText(self.txt())
+        if event.type() == QEvent.EnabledChange:
+            self.setText(self.txt())
         event.accept()
 
     def highlight(self, yes=True):
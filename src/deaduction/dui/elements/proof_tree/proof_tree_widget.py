@@ -623,7 +623,11 @@ class WidgetGoalBlock(QWidget, AbstractGoalBlock):
         - target and target_widget,
         - context2 and context2_widget,
         - descendants_to_be_displayed and children_widgets.
+        If self is merged with its child, then nothing should be displayed.
         """
+        if self.merge_down:
+            return not (self.pure_context_widget or self.target_widget
+                        or self.context1_widget)
         return all([self.check_pure_context(),
                     self.check_context1(),
                     self.check_target(),
@@ -1010,17 +1014,28 @@ class ProofTreeWindow(QWidget):
             # self.main_block.delete_garbage()
 
     def unset_current_target(self):
-        self.main_block.unset_current_target_recursively()
+        """
+        Unset the target that was set by the last call to
+        set_current_target().
+        """
+        if self.current_wgb:
+            self.current_wgb.set_as_current_target(False)
+            self.current_wgb = None
 
-    def set_current_target(self, goal_nb, blinking=True) -> Optional[QWidget]:
+    def set_current_target(self, wgb: WidgetGoalBlock, blinking=True) \
+            -> Optional[QWidget]:
         """
-        Make the status_msg of the current target blinks in boldface.
+        Make the status_msg of the current target, i.e. the target of wgb or
+        of its first ascendant that has a target_widget, blinks in boldface.
         Returns either the current blinking status label, or the current
         proof title widget if no label is blinking (history move). The
         returned widget should be made visible by calling the make_visible()
         method.
         """
-        wdg = self.main_block.set_current_target_recursively(goal_nb, blinking)
+        while not wgb.target_widget and wgb.logical_parent:
+            wgb = wgb.logical_parent
+        self.current_wgb = wgb
+        wdg = wgb.set_as_current_target(yes=True, blinking=blinking)
         return wdg
 
     @Slot()
@@ -378,7 +378,9 @@ class Coordinator(QObject):
         task = Task(fct=self.servint.set_exercise,
                     kwargs={'proof_step': self.proof_step,
                             'exercise': exercise,
-                            'on_top': True})
+                            'on_top': True,
+                            'coalesce_key': 'set_exercise',
+                            'request_type': 'Exercise'})
         self.__send_task_to_server(task)
 
         # Finally set initial proof states
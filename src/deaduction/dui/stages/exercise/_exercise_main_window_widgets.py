@@ -610,8 +610,8 @@ class ExerciseCentralWidget(QWidget):
         new_props = new_goal.context_props
         self.objects_wgt.use_boldface = bool(self.history_nb)
         self.props_wgt.use_boldface = bool(self.history_nb)
-        self.objects_wgt.set_math_objects(new_objects)
-        self.props_wgt.set_math_objects(new_props)
+        self.objects_wgt.update_math_objects(new_objects)
+        self.props_wgt.update_math_objects(new_props)
 
         pgn = len(pending_goals)
         self.target_wgt.replace_target(new_target)
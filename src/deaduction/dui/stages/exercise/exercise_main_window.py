@@ -429,6 +429,7 @@ class ExerciseMainWindow(QMainWindow):
         """
         log.debug("New settings: ")
         log.debug(modified_settings)
+        MathObject.display_cache.clear()
         update_ecw_display = False
         while modified_settings:
             setting = modified_settings.pop()
@@ -1076,7 +1077,7 @@ class ExerciseMainWindow(QMainWindow):
         # Reset current context selection
         # Here we do not use empty_current_selection since Widgets may have
         # been deleted, and anyway this is cosmetics since  widgets are
-        # destroyed and re-created by "self.ecw.update_goal" just below
+        # updated by "self.ecw.update_goal" just below
         self.target_selected = False
         # self.current_selection = []
         self.empty_current_selection()
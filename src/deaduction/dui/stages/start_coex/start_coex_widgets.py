@@ -303,6 +303,7 @@ class CourseChooser(AbstractCoExChooser):
         """
         Select the current course item:
             - Call for loading of initial proof states
+            - Warm up Lean servers with the course preamble
             - Preview course.
         """
         course_item: CoursesLWI = self.__courses_wgt.currentItem()
@@ -317,6 +318,7 @@ class CourseChooser(AbstractCoExChooser):
                     self.loaded_courses.append(course_item.course)
 
                 self.__set_initial_proof_states(course_item.course)
+            self.servint.warm_up(course_item.course)
             self.set_preview(course_item.course)
 
     def give_focus_to_course_wdg(self):
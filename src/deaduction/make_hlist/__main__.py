@@ -1,5 +1,5 @@
 import deaduction.pylib.logger as logger
-from deaduction.pylib.utils.filesystem import HashList
+from deaduction.pylib.utils.filesystem import HashList, HashIndex
 
 import sys
 
@@ -7,3 +7,5 @@ logger.configure()
 
 hlist = HashList.from_path(sys.argv[1])
 hlist.to_file(sys.argv[2])
+if len(sys.argv) > 3:
+    HashIndex.write(hlist, sys.argv[3])
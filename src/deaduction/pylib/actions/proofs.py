@@ -587,7 +587,7 @@ def add_type_indication(item: Union[str, MathObject],
             # Do not put 2 type indications!!
             if (':' not in name
                     and hasattr(item, 'info')):
-                item.info['name'] = f"({name}:{number_type})"
+                item.give_name(f"({name}:{number_type})")
         return item
 
 
@@ -80,6 +80,9 @@ from deaduction.dui.__main__ import WindowManager
 from deaduction.dui.stages.test import QTestWindow
 
 from deaduction.pylib.coursedata import Course, Exercise
+from deaduction.pylib.math_display import PatternInit
+from deaduction.pylib.pattern_math_obj.pattern_snapshot import \
+                                                        PatternSnapshots
 from deaduction.pylib.autotest import ( select_course,
                                         select_exercise)
 
@@ -315,6 +318,7 @@ async def auto_test(wm: WindowManager):
     # proof_complete =False
 
     log.info(f"Testing exercise {exercise.pretty_name}")
+    start_time = time.time()
     # print(f"Testing exercise {exercise.pretty_name}")
     test_window.display(f"Testing exercise {exercise.pretty_name}",
                         color='blue')
@@ -380,6 +384,13 @@ async def auto_test(wm: WindowManager):
             ###########################
             elif emission.is_from(emw.ui_updated):
                 test_window.display("(ui_updated received)", color='grey')
+                if not steps_counter:
+                    # Exercise-open latency, e.g. to compare with or without
+                    # the pool of warm Lean servers.
+                    latency = time.time() - start_time
+                    reports.append(f'Exercise opened in {latency:.2f}s')
+                    test_window.display(f"    Exercise opened in "
+                                        f"{latency:.2f}s")
 
                 #####################
                 # Testing complete? #
@@ -561,6 +572,7 @@ async def main():
             if wm.servint:
                 await wm.servint.file_invalidated.wait()
                 wm.servint.stop()  # Good job, buddy
+                wm.servint.stop_pool()
                 log.info("Lean server stopped!")
             if wm.nursery:
                 wm.nursery.cancel_scope.cancel()
@@ -571,6 +583,7 @@ if __name__ == '__main__':
     cenv.init()
     cdirs.init()
     inst.init()
+    PatternInit.snapshots = PatternSnapshots(cdirs.pattern_snapshots_dir)
     language = deaduction.pylib.config.i18n.init_i18n()
 
     qtrio.run(main)
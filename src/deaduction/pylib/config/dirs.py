@@ -68,6 +68,8 @@ test_exercises = (local / "test_exercises").resolve()
 history = (local / "history").resolve()
 all_courses_ipf_dir = (local / "initial_proof_states").resolve()
 all_courses_ipf_old = (local / "old_initial_proof_states").resolve()
+pattern_snapshots_dir = (local / "pattern_snapshots").resolve()
+hash_cache_dir = (local / "hash_cache").resolve()
 usr_lean_exercises_dir = (local / "lean_exercises_dir").resolve()
 tmp_exercises_dir = (usr_lean_exercises_dir / "tmp").resolve()
 usr_lean_src_dir = (local / "lean_src").resolve()
@@ -56,11 +56,12 @@ def init():
         packages[name] = package.from_config(conf)
 
 
-def check():
+def check(full_verify=False):
     """
     Checks for packages installation, returns list of invalid
     packages. The user can then process this list to
     install them.
+    Files checksums are cached, unless full_verify is True.
     """
     global packages
 
@@ -69,7 +70,7 @@ def check():
     log.info(_("Check packages installation"))
     for pkg_name, pkg in packages.items():
         try:
-            pkg.check()
+            pkg.check(full_verify)
         except PackageCheckError as exc:
             log.warning(_("Failed checking package {}: {}")
                             .format(pkg_name,str(exc)) )
@@ -62,6 +62,9 @@ from deaduction.pylib.coursedata import (   Exercise,
 
 import deaduction.pylib.coursedata.parser_course as parser_course
 from .course_metadata_translations import metadata_nice_text
+from .ips_store import (InitialProofStateStore, STORE_VERSION,
+                        stable_digest)
+from .history_store import HistoryStore
 
 log = logging.getLogger(__name__)
 global _
@@ -91,7 +94,14 @@ class Course:
     # Relative_course_path, path relative to the home directory, is added after
     # instantiation.
 
+    __history_store       = None
     __history_course      = None
+    # lean_name -> Exercise in history course, None if not computed:
+    __history_exercises   = None
+    # lean_name -> saved version, parsed from self.history_store's lemmas:
+    __history_versions    = None
+    __ips_store           = None
+    __ips_keys            = None
 
     # Outline description:
     #   keys = lean complete namespaces,
@@ -133,27 +143,88 @@ class Course:
         # print(f"Abs history path:{abs_path}")
         return abs_path
 
+    @property
+    def history_store(self) -> HistoryStore:
+        """
+        Store of the saved versions of exercises. If there is no store yet,
+        saved versions are imported from the Lean history file, if any.
+        """
+        if self.__history_store is None:
+            abs_path = self.abs_history_file_path
+            self.__history_store = HistoryStore(abs_path.parent, abs_path.stem)
+            if not self.__history_store.exists() and abs_path.exists():
+                self.import_history_file()
+        return self.__history_store
+
+    def import_history_file(self):
+        """
+        Import the saved versions of exercises from the Lean history file
+        into self.history_store. Latest versions come first in the Lean file.
+        """
+        store = self.__history_store
+        history_course = Course.from_file(self.abs_history_file_path)
+        lines = history_course.file_content.splitlines()
+        saved_exercises = [exo for exo in history_course.exercises
+                           if exo.history_date() and exo.refined_auto_steps]
+        for exo in reversed(saved_exercises):
+            content = exo.structured_content
+            lemma = lines[content.first_line_nb-1:content.last_line_nb]
+            store.append(original=exo.lean_name.rsplit('_', 1)[0],
+                         lean_name=exo.lean_name,
+                         date=exo.history_date(),
+                         number=exo.history_number(),
+                         solved=bool(exo.is_solved_in_auto_test()),
+                         statement=content.core_lemma_digest(),
+                         lemma='\n'.join(lemma) + '\n',
+                         save_index=False)
+        store.save_index()
+        log.info(f"{len(saved_exercises)} saved exercises imported from "
+                 f"{self.abs_history_file_path}")
+
     def history_course(self):
         """
         Return Course instance created from history version of course,
         if a history versions exists.
         """
 
-        if not self.__history_course:
-            self.set_history_course()
+        if self.__history_exercises is None:
+            self.__compute_history_course()
         return self.__history_course
 
-    def set_history_course(self):
-        abs_path = self.abs_history_file_path
+    def __compute_history_course(self):
+        """
+        Write the Lean history file from self.history_store, and parse it.
+        """
+        store = self.history_store
+        self.__history_course = None
+        self.__history_exercises = dict()
+        if not store:
+            return
+
+        end_line_nbs = {exo.lean_name: exo.lean_end_line_number
+                        for exo in self.exercises}
+        store.export(self.file_content, end_line_nbs)
+        abs_path = store.lean_path
         try:
-            self.__history_course = (Course.from_file(abs_path)
-                                     if abs_path.exists() else None)
+            self.__history_course = Course.from_file(abs_path)
         except TOMLDecodeError as error:
             log.error(f"Error while reading history file {str(abs_path)}")
             log.error(f"Maybe this is a history file from an old version od "
                       f"deaduction")
             log.error(f"Try removing .deaduction/history/{str(abs_path)}")
             raise error
+        self.__history_exercises = {exo.lean_name: exo for exo in
+                                    self.__history_course.exercises}
+
+    def set_history_course(self):
+        """
+        Re-read the history store. The history course will be computed
+        again when needed. Saved versions already parsed are kept, since
+        saving a new version does not modify them.
+        """
+        self.history_store.refresh()
+        self.__history_course = None
+        self.__history_exercises = None
 
     def original_version_in_history_file(self, exercise: Exercise) -> Exercise:
         """
@@ -175,9 +246,9 @@ class Course:
         only the max last versions are provided.
         """
 
-        history_course = self.history_course()
-        if not history_course:
+        if not self.history_store:
             return []
+        self.__parse_history_versions(self.exercises)
 
         # exercises = [exo for exo in history_course.exercises
         #              if exo.history_date() and exo.refined_auto_steps]
@@ -201,49 +272,97 @@ class Course:
 
     def history_versions_from_exercise(self, exercise: Exercise):
         """
-        Return the versions of exercise as saved in self.history_course().
+        Return the versions of exercise as saved in self.history_store.
         Beware that this may NOT make use of
         the saved_exercises_in_history_course() method.
         """
-        history_course = self.history_course()
-        if not history_course:
+        entries = self.history_entries(exercise)
+        if not entries:
             return []
-
-        # saved_exercises = self.saved_exercises_in_history_course()
-        saved_exercises = [exo for exo in history_course.exercises
-                           if exo.history_date() and exo.refined_auto_steps]
-        exercises = [history_exo for history_exo in saved_exercises
-                     if history_exo.is_history_version_of(exercise)]
+        self.__parse_history_versions([exercise])
+
+        exercises = []
+        # Latest versions first, as in the history file
+        for entry in reversed(entries):
+            history_exo = self.__history_versions.get(entry['lean_name'])
+            if (history_exo and history_exo.history_date()
+                    and history_exo.refined_auto_steps):
+                history_exo.original_exercise = exercise
+                exercises.append(history_exo)
         return exercises
 
+    def __parse_history_versions(self, exercises: List[Exercise]):
+        """
+        Parse the saved versions of exercises which have not been parsed
+        yet. Their lemmas are read from self.history_store, and inserted in
+        the course file after the original exercise, as in the history file.
+        """
+        if self.__history_versions is None:
+            self.__history_versions = dict()
+        index = dict()
+        for exercise in exercises:
+            entries = [entry for entry in self.history_entries(exercise)
+                       if entry['lean_name'] not in self.__history_versions]
+            if entries:
+                index[exercise.lean_name] = entries
+        if not index:
+            return
+
+        store = self.history_store
+        end_line_nbs = {exo.lean_name: exo.lean_end_line_number
+                        for exo in exercises}
+        content = store.lean_file_content(self.file_content, end_line_nbs,
+                                          index)
+        course = Course.from_file_content(content)
+        if not course:
+            return
+        course.abs_course_path = store.lean_path
+        for exo in course.exercises:
+            if exo.history_date():
+                self.__history_versions[exo.lean_name] = exo
+
+    def history_entries(self, exercise: Exercise) -> List[dict]:
+        """
+        Return the entries of self.history_store for the versions of
+        exercise, i.e. with the same name and core content.
+        """
+        return self.history_store.versions(
+            exercise.lean_name,
+            statement=exercise.structured_content.core_lemma_digest())
+
+    def delete_saved_versions(self, exercise: Exercise, lean_names=None):
+        """
+        Delete the saved versions of exercise whose lean_name is in
+        lean_names, or all of them if lean_names is None.
+        """
+        if lean_names is None:
+            lean_names = [entry['lean_name']
+                          for entry in self.history_entries(exercise)]
+        self.history_store.delete(exercise.lean_name, lean_names)
+        self.__history_course = None
+        self.__history_exercises = None
+        if self.__history_versions:
+            # Numbers of deleted versions may be used again
+            for lean_name in lean_names:
+                self.__history_versions.pop(lean_name, None)
+
     def delete_all_saved_proofs_of_exercise(self, exercise: Exercise):
         """
         This method will delete all history versions of the given exercise in
         the history file. Do not call without warning usr.
         """
-        saved_versions = self.history_versions_from_exercise(exercise)
-        while saved_versions:
-            nb = len(saved_versions)
-            saved_version = saved_versions[-1]
-            assert isinstance(saved_version, Exercise)
-            saved_version.delete_in_history_file()
-            # Reset history course, since the line number of the remaining
-            # exercises may have changed
-            self.set_history_course()
-            saved_versions = self.history_versions_from_exercise(exercise)
-            if len(saved_versions) != nb - 1:
-                log.warning("Deleting failed!")
-                break
+        self.delete_saved_versions(exercise)
 
     def delete_history_file(self):
         """
         This method delete the history file. Do not call without warning usr!
         """
-        file = self.abs_history_file_path
-        try:
-            file.unlink()
-        except FileNotFoundError:
+        if not self.history_store.exists():
             log.warning("History file not found")
+        self.history_store.clear()
+        self.__history_course = None
+        self.__history_exercises = None
+        self.__history_versions = None
 
     def is_history_file(self):
         return self.course_file_name.startswith('history_')
@@ -538,16 +657,15 @@ class Course:
         # Will be False between statement event and begin_proof event:
         begin_found = True
 
-        ########################
-        # Parsimonious's magic #
-        ########################
+        ###########
+        # Parsing #
+        ###########
         # Transform the file content into a list of events
         # and a dict of metadata.
 
         # FIXME: handle parsimonius exception if this is not a Deaduction file
-        course_tree = parser_course.lean_course_grammar.parse(file_content)
-        visitor = parser_course.LeanCourseVisitor()
-        course_history, course_metadata = visitor.visit(course_tree)
+        course_history, course_metadata = \
+            parser_course.course_history_and_metadata(file_content)
         # Meaningless here (and --> crash since dict is not hashable!)
         if '_raw_metadata' in course_metadata:
             course_metadata.pop('_raw_metadata')
@@ -682,71 +800,164 @@ class Course:
             return statements[0]
 
     @property
-    def ips_path(self):
-        return  cdirs.all_courses_ipf_dir / \
-                self.relative_course_path.with_suffix('.pkl').name
+    def lean_preamble(self) -> str:
+        """
+        The Lean content before the first statement, i.e. imports,
+        definitions, opened namespaces and so on.
+        """
+        if not self.statements:
+            return self.file_content
+        lines = self.file_content.splitlines()
+        return "\n".join(lines[:self.statements[0].lean_line - 1])
 
     @property
-    def course_hash(self):
-        # Fixme: hash does not work here?!
-        #  so we use the whole  file_content
-        return self.file_content
+    def ips_dir(self):
+        return cdirs.all_courses_ipf_dir / self.course_file_name
 
-    def load_initial_proof_states(self):
+    @property
+    def ips_store(self) -> InitialProofStateStore:
+        if not self.__ips_store and self.abs_course_path:
+            self.__ips_store = InitialProofStateStore(self.ips_dir)
+        return self.__ips_store
+
+    def lean_context_lines(self) -> [(int, str)]:
+        """
+        Return the list of (line number, stripped line) for the lines of
+        self.file_content that may affect the Lean context of the next
+        statements, i.e. lines which are neither in a statement, nor in a
+        comment (including deaduction metadata), nor blank.
+        """
+        statement_lines = set()
+        for st in self.statements:
+            end_line = st.lean_end_line_number or st.lean_line
+            statement_lines.update(range(st.lean_line, end_line + 1))
+
+        context_lines = []
+        in_comment = False
+        for line_nb, line in enumerate(self.file_content.splitlines(),
+                                       start=1):
+            stripped = line.strip()
+            if in_comment:
+                in_comment = "-/" not in stripped
+            elif stripped.startswith("/-"):
+                in_comment = "-/" not in stripped[2:]
+            elif (stripped and not stripped.startswith("--")
+                  and line_nb not in statement_lines):
+                context_lines.append((line_nb, stripped))
+        return context_lines
+
+    def ips_keys(self) -> Dict[str, str]:
+        """
+        Return a dict lean_name -> key in self.ips_store, for all statements.
+        The key is a stable digest of the statement's Lean text (name,
+        variables and core statement), and of all context lines before it
+        (imports, namespaces, opened namespaces, variables, ...). In
+        particular metadata and proofs do not affect keys.
+        """
+        if self.__ips_keys is None:
+            self.__ips_keys = dict()
+            context_lines = self.lean_context_lines()
+            context = []
+            for st in self.statements:
+                while context_lines and context_lines[0][0] < st.lean_line:
+                    context.append(context_lines.pop(0)[1])
+                self.__ips_keys[st.lean_name] = stable_digest(
+                    STORE_VERSION, "\n".join(context), st.lean_name,
+                    st.lean_variables, st.lean_core_statement)
+        return self.__ips_keys
+
+    def stored_initial_proof_state(self, statement: Statement):
+        """
+        Load statement's initial proof state from self.ips_store, if any.
+        """
+        store = self.ips_store
+        if store:
+            key = self.ips_keys().get(statement.lean_name)
+            return store.load(key) if key else None
+
+    def has_stored_initial_proof_state(self, statement: Statement) -> bool:
+        """
+        True if statement's initial proof state is in self.ips_store. This
+        does not load it.
+        """
+        store = self.ips_store
+        if store:
+            key = self.ips_keys().get(statement.lean_name)
+            return key is not None and key in store
+        return False
+
+    @property
+    def obsolete_ips_path(self):
         """
-        Search ips from a .pkl file in the self.ips_path directory,
-        and assign them as attributes of the corresponding statements.
+        The .pkl file where previous versions saved the initial proof states
+        of all statements, in a dict file_content -> list of ips.
+        """
+        return cdirs.all_courses_ipf_dir / (self.course_file_name + '.pkl')
 
-        To achieve this we Load a dictionary with
-            keys    = course_hash
-            values  = list of initial proof states of all course's
-            statements
-        This allows to check that the ips correspond to the actual Lean file
-        content, and in particular to distinguish between several Lean files
-        sharing the same name but distinct file content.
+    def migrate_obsolete_ips_file(self):
+        """
+        Move the initial proof states of self from the obsolete .pkl file,
+        if any, to self.ips_store. Entries of other file contents (maybe from
+        other Lean files with the same name) are kept in the obsolete file
+        until they are migrated; the file is deleted when it is empty.
         """
-        courses_ips_dic: dict = load_object(self.ips_path)
+        if not self.course_file_name:
+            return
+        path = self.obsolete_ips_path
+        if not path.exists():
+            return
+        try:
+            courses_ips_dic = load_object(path)
+        except Exception as error:  # e.g. obsolete classes
+            log.warning(f"Unable to read obsolete file {path}: {error}")
+            courses_ips_dic = None
+        if not isinstance(courses_ips_dic, dict):
+            log.info(f"Removing obsolete file {path}")
+            path.unlink()
+            return
+
+        ips_list = courses_ips_dic.pop(self.file_content, None)
+        if ips_list is None:
+            log.info(f"Obsolete file {path} does not contain initial proof "
+                     f"states for {self.relative_course_path}")
+            return
+        if len(ips_list) == len(self.statements):
+            keys = self.ips_keys()
+            for st, ips in zip(self.statements, ips_list):
+                self.ips_store.save(keys[st.lean_name], ips)
+            log.info(f"Initial proof states migrated from {path}")
         if courses_ips_dic:
-            ips_list = courses_ips_dic.get(self.course_hash)
+            save_object(courses_ips_dic, path)
         else:
-            ips_list = None
-
-        # ips_list = self.load_initial_proof_states()
-        if ips_list:
-            log.debug(f"Set initial proof states for "
-                      f"{self.relative_course_path}")
-            # NB: self.statements and ips_list
-            #  should have same length
-            for st, ips in zip(self.statements, ips_list):
-                st.initial_proof_state = ips
+            log.info(f"Removing obsolete file {path}")
+            path.unlink()
 
-    def save_initial_proof_states(self):
+    def load_initial_proof_states(self):
         """
-        Save course's statements' initial proof states to a .pkl file in
-        cdirs.all_courses_ipf_dir/<course_name>
+        Statements' initial proof states are loaded lazily from
+        self.ips_store when needed, see Statement.initial_proof_state.
+        This just refreshes the list of stored initial proof states,
+        after migrating those of the obsolete .pkl file, if any.
         """
+        if self.ips_store:
+            self.ips_store.refresh()
+            self.migrate_obsolete_ips_file()
 
-        courses_ips_dic: dict = load_object(self.ips_path)
-        if not courses_ips_dic:
-            # Create a new dict
-            courses_ips_dic = dict()
-        course_hash = self.course_hash
-        initial_proof_states = [st.initial_proof_state
-                                for st in self.statements]
-        to_be_saved = False  # Save only if there is something new
-        if course_hash not in courses_ips_dic:
-            to_be_saved = True
-        else:
-            old_ips_list = courses_ips_dic[course_hash]
-            for ips_old, ips_new in zip(old_ips_list, initial_proof_states):
-                if ips_new and not ips_old:
-                    to_be_saved = True
-                    break
-
-        if to_be_saved:
-            log.debug(f"Saving initial proof states in {self.ips_path}")
-            courses_ips_dic[course_hash] = initial_proof_states
-            save_object(courses_ips_dic, self.ips_path)
+    def save_initial_proof_states(self):
+        """
+        Save the new initial proof states of course's statements in
+        self.ips_store, one file per statement.
+        """
+        store = self.ips_store
+        if not store:
+            return
+        keys = self.ips_keys()
+        for st in self.statements:
+            ips = st.computed_initial_proof_state
+            key = keys.get(st.lean_name)
+            if ips and key and key not in store:
+                log.debug(f"Saving initial proof state of {st.lean_name}")
+                store.save(key, ips)
 
 
 def whole(namespace_list: List[str]):
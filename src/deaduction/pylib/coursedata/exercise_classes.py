@@ -47,6 +47,7 @@ from deaduction.pylib.coursedata.utils     import (find_suffix,
                                                    extract_list)
 # from deaduction.pylib.coursedata.settings_parser import vars_from_metadata
 from deaduction.pylib.coursedata.auto_steps import AutoStep
+from deaduction.pylib.coursedata.ips_store import stable_digest
 
 log = logging.getLogger(__name__)
 global _
@@ -165,6 +166,13 @@ class StructuredContent:
         return (self.hypotheses.strip(), self.conclusion.strip()) == \
             (other.hypotheses.strip(), other.conclusion.strip())
 
+    def core_lemma_digest(self) -> str:
+        """
+        Digest of the core lemma content, so that two contents have the same
+        digest iff has_identical_core_lemma_content() is True.
+        """
+        return stable_digest(self.hypotheses.strip(), self.conclusion.strip())
+
 
 @dataclass
 class Statement:
@@ -333,12 +341,38 @@ class Statement:
 
     @property
     def initial_proof_state(self):
+        """
+        If not computed yet, try to load self's initial proof state from the
+        course's store.
+        """
+        if self._initial_proof_state is None and self.course:
+            self._initial_proof_state = \
+                self.course.stored_initial_proof_state(self)
         return self._initial_proof_state
 
     @initial_proof_state.setter
     def initial_proof_state(self, ips):
         self._initial_proof_state = ips
 
+    @property
+    def computed_initial_proof_state(self):
+        """
+        Return self's initial proof state only if it has already been
+        computed or loaded, without trying to load it.
+        """
+        return self._initial_proof_state
+
+    @property
+    def has_initial_proof_state(self) -> bool:
+        """
+        True if self's initial proof state has been computed or is in the
+        course's store, without loading it.
+        """
+        if self._initial_proof_state is not None:
+            return True
+        return bool(self.course) \
+            and self.course.has_stored_initial_proof_state(self)
+
     def to_math_object(self):
         goal = self.goal()
         math_object = goal.to_math_object() if goal else None
@@ -690,12 +724,19 @@ class Exercise(Theorem):
         if self.original_exercise:
             return self.original_exercise.initial_proof_state
         else:
-            return self._initial_proof_state
+            return super().initial_proof_state
 
     @initial_proof_state.setter
     def initial_proof_state(self, ips):
         self._initial_proof_state = ips
 
+    @property
+    def has_initial_proof_state(self) -> bool:
+        if self.original_exercise:
+            return self.original_exercise.has_initial_proof_state
+        else:
+            return super().has_initial_proof_state
+
     @property
     def raw_metadata(self) -> Dict[str, str]:
         """
@@ -1140,21 +1181,6 @@ class Exercise(Theorem):
     #######################################
     # Managing versions from history file #
     #######################################
-    def __new_file_content(self, lean_code="todo ",
-                           additional_metadata=None,
-                           history_nb=1) -> str:
-        """
-        Insert additional metadata (e.g. AutoSteps) and code_lines
-        into self.course.file_content.
-        """
-
-        struct_content = self.structured_content
-        new_st_content = StructuredContent.new_content(struct_content,
-                                                       additional_metadata,
-                                                       lean_code, history_nb)
-        new_file_content = new_st_content.content_with_lemma()
-        return new_file_content
-
     def history_date(self):
         """
         Return the date when this exercise was saved.
@@ -1196,7 +1222,7 @@ class Exercise(Theorem):
         return self.course.history_versions_from_exercise(self)
 
     def nb_versions_saved_in_history_course(self) -> int:
-        return len(self.versions_saved_in_history_course())
+        return len(self.course.history_entries(self))
 
     def has_versions_in_history_course(self):
         """
@@ -1209,8 +1235,8 @@ class Exercise(Theorem):
         True if at least one version as saved in history_course has a
         complete proof.
         """
-        return any([exo.is_solved_in_auto_test()
-                    for exo in self.versions_saved_in_history_course()])
+        return any(entry['solved']
+                   for entry in self.course.history_entries(self))
 
     def is_copy_of(self, other) -> bool:
         """
@@ -1237,37 +1263,25 @@ class Exercise(Theorem):
 
     def save_with_auto_steps(self, additional_metadata, lean_code):
         """
-        Save current exercise with auto_steps in self.course's history file.
-        If the history file does not exist, create it with initial content
-        identical to self.course.file_content.
-        The exercise is saved just after the original exercise in the history
-        file.
-        """
-
-        path = self.course.abs_history_file_path
-
-        # (1) Take history file into account, if any
-        if self.course.history_course():
-            exercise = self.course.original_version_in_history_file(self)
-            if not exercise:
-                exercise = self
-        else:
-            exercise = self
-
-        # # (2) Negate statement?
-        # if self.negate_statement:
-        #     exercise.negate_statement = True
-
-        # (3) Compute new content
-        history_nb = len(self.versions_saved_in_history_course()) + 1
-        content = exercise.__new_file_content(lean_code, additional_metadata,
-                                              history_nb)
-
-        # (4) Save!
-        with open(path, mode='wt', encoding='utf-8') as output:
-            output.write(content)
-
-        # (5) Reload history_course to get new entry
+        Save current exercise with auto_steps in self.course's history store.
+        The exercise will appear just after the original exercise in the
+        history file.
+        """
+
+        history_nb = self.course.history_store.next_number(self.lean_name)
+        content = StructuredContent.new_content(self.structured_content,
+                                                additional_metadata,
+                                                lean_code, history_nb)
+        self.course.history_store.append(
+            original=self.lean_name,
+            lean_name=f"{self.lean_name}_{history_nb}",
+            date=additional_metadata['history_date'],
+            number=history_nb,
+            solved=bool(additional_metadata.get('all_goals_solved')),
+            statement=content.core_lemma_digest(),
+            lemma=content.lemma_content)
+
+        # History course will be computed again to get new entry
         self.course.set_history_course()
 
     def delete_in_history_file(self):
@@ -1275,23 +1289,11 @@ class Exercise(Theorem):
         Assuming self comes from a history file, delete the corresponding
         entry. Beware that self is saved exercise, not original one.
         """
-        path = self.course.relative_course_path.resolve()
-
-        first_line_nb = self.structured_content.first_line_nb
-        last_line_nb = self.structured_content.last_line_nb
-
-        content: str = self.course.file_content
-        content_lines = content.splitlines()
-        new_content_lines = (content_lines[:first_line_nb-1] +
-                             content_lines[last_line_nb:])
-        new_content = '\n'.join(new_content_lines)
-
-        # Save new content!
-        with open(path, mode='wt', encoding='utf-8') as output:
-            output.write(new_content)
-
-        # Reload history_course to remove deleted entry
-        # self.original_exercise.course.set_history_course()
+        original = self.original_exercise
+        if not original:
+            log.warning(f"No original exercise for {self.lean_name}")
+            return
+        original.course.delete_saved_versions(original, [self.lean_name])
 
     def history_number(self) -> int:
         """
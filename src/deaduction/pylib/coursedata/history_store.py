@@ -0,0 +1,268 @@
+"""
+##############################################################
+# history_store.py : an indexed store of saved exercises     #
+##############################################################
+
+Each time the user saves a proof, a new version of the exercise, i.e. a
+Lean lemma whose metadata contain the AutoSteps of the proof, is saved in
+the history of the course. The history used to be a single Lean file,
+history_<course>.lean, a copy of the course file in which saved versions
+are inserted after the original exercise, and which was re-written and
+re-parsed at each saving or deletion.
+
+The HistoryStore keeps saved lemmas in an append-only data file,
+history_<course>.hst, with an index history_<course>.json giving, for each
+original exercise, the list of its saved versions (in saving order) with
+their date, number, and offset and length in the data file. So saving a
+version appends to the data file, and counting the versions of an exercise
+or deleting them only needs the index. Deleted lemmas are removed from the
+data file when they take more room than the remaining ones.
+
+The Lean file history_<course>.lean is still written for compatibility,
+from the course file and the saved lemmas, when the history course is
+needed.
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+# Increment this when the format of the index changes:
+INDEX_VERSION = "1"
+
+
+class HistoryStore:
+    """
+    Saved versions of the exercises of a course. The index is a dict
+        original exercise lean_name -> list of entries,
+    where each entry is a dict with keys
+        lean_name, date, number, solved, statement, offset, length.
+    'statement' is a digest of the statement of the original exercise at
+    saving time, so that versions of an exercise whose statement has since
+    been modified in the course file may be discarded.
+    """
+
+    SUFFIX = '.hst'
+    INDEX_SUFFIX = '.json'
+
+    def __init__(self, directory: Path, name: str):
+        self.directory = directory
+        self.name = name
+        self.__index = None
+        # Size of deleted lemmas still in data file:
+        self.__garbage = 0
+
+    @property
+    def data_path(self) -> Path:
+        return self.directory / (self.name + self.SUFFIX)
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / (self.name + self.INDEX_SUFFIX)
+
+    @property
+    def lean_path(self) -> Path:
+        return self.directory / (self.name + '.lean')
+
+    @property
+    def index(self) -> Dict[str, List[dict]]:
+        if self.__index is None:
+            self.refresh()
+        return self.__index
+
+    def refresh(self):
+        """
+        (Re-)read the index file.
+        """
+        self.__index = dict()
+        self.__garbage = 0
+        if not self.index_path.exists():
+            return
+        try:
+            data = json.loads(self.index_path.read_text())
+        except (OSError, ValueError) as error:
+            log.warning(f"Unable to read history index: {error}")
+            return
+        if data.get('version') != INDEX_VERSION:
+            log.warning(f"Obsolete history index {self.index_path}")
+            return
+        self.__index = data['entries']
+        self.__garbage = data['garbage']
+
+    def exists(self) -> bool:
+        return self.index_path.exists()
+
+    def __bool__(self):
+        return any(self.index.values())
+
+    def save_index(self):
+        data = json.dumps({'version': INDEX_VERSION,
+                           'garbage': self.__garbage,
+                           'entries': self.index})
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        tmp_path.write_text(data)
+        os.replace(tmp_path, self.index_path)
+
+    def versions(self, original: str, statement: str = None) -> List[dict]:
+        """
+        Return the entries of the saved versions of original, in saving
+        order. If statement is given, only versions with this statement
+        are returned.
+        """
+        entries = self.index.get(original, [])
+        if statement is not None:
+            entries = [entry for entry in entries
+                       if entry['statement'] == statement]
+        return entries
+
+    def entry(self, original: str, lean_name: str) -> Optional[dict]:
+        for entry in self.index.get(original, []):
+            if entry['lean_name'] == lean_name:
+                return entry
+
+    def next_number(self, original: str) -> int:
+        return max((entry['number'] for entry in self.versions(original)),
+                   default=0) + 1
+
+    def lemma(self, entry: dict) -> str:
+        """
+        Return the Lean lemma of entry.
+        """
+        with open(self.data_path, mode='rb') as data_file:
+            data_file.seek(entry['offset'])
+            return data_file.read(entry['length']).decode('utf-8')
+
+    def append(self, original: str, lean_name: str, date: str,
+               number: int, solved: bool, statement: str,
+               lemma: str, save_index=True) -> dict:
+        """
+        Add lemma as a new saved version of original.
+        """
+        data = lemma.encode('utf-8')
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.data_path, mode='ab') as data_file:
+            offset = data_file.seek(0, os.SEEK_END)
+            data_file.write(data)
+        entry = {'lean_name': lean_name, 'date': date, 'number': number,
+                 'solved': solved, 'statement': statement,
+                 'offset': offset, 'length': len(data)}
+        self.index.setdefault(original, []).append(entry)
+        if save_index:
+            self.save_index()
+        return entry
+
+    def delete(self, original: str, lean_names=None):
+        """
+        Delete the saved versions of original whose lean_name is in
+        lean_names, or all saved versions if lean_names is None.
+        """
+        entries = self.index.get(original, [])
+        deleted = [entry for entry in entries
+                   if lean_names is None or entry['lean_name'] in lean_names]
+        if not deleted:
+            return
+        remaining = [entry for entry in entries if entry not in deleted]
+        if remaining:
+            self.index[original] = remaining
+        else:
+            self.index.pop(original)
+        self.__garbage += sum(entry['length'] for entry in deleted)
+        if self.__garbage > sum(entry['length']
+                                for entries in self.index.values()
+                                for entry in entries):
+            self.compact()
+        else:
+            self.save_index()
+
+    def compact(self):
+        """
+        Re-write the data file without deleted lemmas.
+        """
+        tmp_path = self.data_path.with_suffix('.tmp')
+        offset = 0
+        with open(tmp_path, mode='wb') as output:
+            for entries in self.index.values():
+                for entry in entries:
+                    data = self.lemma(entry).encode('utf-8')
+                    output.write(data)
+                    entry['offset'] = offset
+                    offset += len(data)
+        os.replace(tmp_path, self.data_path)
+        self.__garbage = 0
+        self.save_index()
+
+    def clear(self):
+        """
+        Delete all files of the store.
+        """
+        for path in (self.data_path, self.index_path, self.lean_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self.__index = dict()
+        self.__garbage = 0
+
+    def lean_file_content(self, course_file_content: str,
+                          end_line_nbs: Dict[str, int],
+                          index: Dict[str, List[dict]] = None) -> str:
+        """
+        Return the content of the Lean history file, i.e. the course file in
+        which saved versions of each exercise are inserted, latest first,
+        after line end_line_nbs[exercise's lean_name].
+        Versions of exercises which are not in end_line_nbs are omitted.
+        If index is provided, only its entries are inserted.
+        """
+        if index is None:
+            index = self.index
+        insertions = []
+        for original, entries in index.items():
+            line_nb = end_line_nbs.get(original)
+            if line_nb and entries:
+                lemmas = [self.lemma(entry) for entry in reversed(entries)]
+                insertions.append((line_nb, lemmas))
+        insertions.sort(key=lambda insertion: insertion[0])
+
+        lines = course_file_content.splitlines()
+        parts = []
+        last_line_nb = 0
+        for line_nb, lemmas in insertions:
+            parts.append('\n'.join(lines[last_line_nb:line_nb]))
+            parts.extend('\n' + lemma for lemma in lemmas)
+            last_line_nb = line_nb
+        parts.append('\n'.join(lines[last_line_nb:]))
+        return '\n'.join(parts) + '\n'
+
+    def export(self, course_file_content: str, end_line_nbs: Dict[str, int]):
+        """
+        Write the Lean history file.
+        """
+        content = self.lean_file_content(course_file_content, end_line_nbs)
+        self.lean_path.write_text(content, encoding='utf-8')
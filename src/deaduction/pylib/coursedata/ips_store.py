@@ -0,0 +1,125 @@
+"""
+#####################################################################
+# ips_store.py : a content-addressed store for initial proof states #
+#####################################################################
+
+Initial proof states of statements are computed by Lean, which is slow,
+and thus stored on disk. Each initial proof state is saved in its own
+file, whose name is a digest of everything that determines it:
+    - the Lean preamble of the course (imports, global settings),
+    - the namespace and the read-only namespaces opened before the statement,
+    - the Lean text of the statement.
+Thus editing one statement of a course only invalidates its own initial
+proof state, and initial proof states can be loaded lazily, one by one.
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the dEAduction team
+
+This file is part of dEAduction.
+
+    dEAduction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    dEAduction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+from deaduction.pylib.utils import load_object, save_object
+
+log = logging.getLogger(__name__)
+
+# Increment this when the format of stored data changes:
+STORE_VERSION = "1"
+
+
+def stable_digest(*texts: str) -> str:
+    """
+    Return a hex digest of texts. Contrary to hash(), this does not depend
+    on the Python process.
+    """
+    sha = hashlib.sha256()
+    for text in texts:
+        data = text.encode('utf-8')
+        # Prefix with length to avoid ambiguities between (ab, c) and (a, bc)
+        sha.update(str(len(data)).encode() + b':' + data)
+    return sha.hexdigest()
+
+
+class InitialProofStateStore:
+    """
+    A directory containing one pickle file <digest>.pkl for each initial
+    proof state. The list of available digests is read once, so that asking
+    for a missing initial proof state does not access the disk.
+    """
+
+    SUFFIX = '.pkl'
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.__keys = None
+
+    @property
+    def keys(self) -> set:
+        if self.__keys is None:
+            self.refresh()
+        return self.__keys
+
+    def refresh(self):
+        """
+        (Re-)read the list of stored keys.
+        """
+        if self.directory.exists():
+            self.__keys = {file.stem for file in self.directory.iterdir()
+                           if file.suffix == self.SUFFIX}
+        else:
+            self.__keys = set()
+
+    def __contains__(self, key: str):
+        return key in self.keys
+
+    def path(self, key: str) -> Path:
+        return self.directory / (key + self.SUFFIX)
+
+    def load(self, key: str):
+        """
+        Return the initial proof state stored with key, or None.
+        """
+        if key not in self.keys:
+            return None
+        try:
+            return load_object(self.path(key))
+        except Exception as error:  # e.g. corrupted file, obsolete classes
+            log.warning(f"Unable to load initial proof state {key}: {error}")
+            self.keys.discard(key)
+            return None
+
+    def save(self, key: str, initial_proof_state):
+        """
+        Save initial_proof_state with key, unless it is already there.
+        Files are written atomically, so that a crash does not leave a
+        corrupted file.
+        """
+        if key in self.keys or not initial_proof_state:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+        tmp_path = path.with_suffix('.tmp')
+        save_object(initial_proof_state, tmp_path)
+        os.replace(tmp_path, path)
+        self.keys.add(key)
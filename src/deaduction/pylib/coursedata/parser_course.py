@@ -22,6 +22,10 @@ information that will be stored with each event: an event is a couple
 dictionary that contains all the metadata associated to the statement.
 Then course_history is processed by course.py.
 
+LeanCourseScanner computes the same course_history much faster, by matching
+the rules of the grammar with regular expressions. The grammar is only used
+as a fallback, if the scanner fails.
+
 
 Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
 Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
@@ -53,8 +57,9 @@ try:  # From Python 3.11
 except ModuleNotFoundError:  # For previous versions
     import tomli as tomllib
 
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from pathlib import Path
+import re
 from parsimonious.grammar import Grammar
 from parsimonious.nodes import NodeVisitor
 import logging
@@ -171,6 +176,51 @@ def extract_core_statement(statement: str) -> Tuple[str, str]:
     return variables, core_statement
 
 
+CLOSING_BRACKETS = {"(": ")", "{": "}", "[": "]"}
+BRACKET = re.compile(r"[(){}\[\]]")
+
+
+def skip_spaces(statement: str, pos: int) -> int:
+    while statement[pos:pos+1] in (" ", "\n"):
+        pos += 1
+    return pos
+
+
+def split_statement(statement: str) -> Tuple[str, str]:
+    """
+    Same as extract_core_statement, without the statement_grammar.
+    Raise ValueError if statement does not match the grammar.
+    """
+    variables_end = 0
+    while True:
+        start = skip_spaces(statement, variables_end)
+        if statement[start:start+1] not in CLOSING_BRACKETS:
+            break
+        closing_brackets = []
+        variable_end = None
+        for match in BRACKET.finditer(statement, start):
+            bracket = match.group()
+            if bracket in CLOSING_BRACKETS:
+                closing_brackets.append(CLOSING_BRACKETS[bracket])
+            elif bracket != closing_brackets.pop():
+                break
+            elif not closing_brackets:
+                variable_end = match.end()
+                break
+        if variable_end is None:  # Unbalanced brackets
+            break
+        variables_end = variable_end
+
+    colon = skip_spaces(statement, variables_end)
+    variables = statement[:variables_end]
+    core_statement = statement[colon+1:]
+    # (Texts discarded by my_filter make StatementVisitor fail)
+    if (statement[colon:colon+1] != ":" or not my_filter(variables)
+            or not my_filter(core_statement)):
+        raise ValueError(f"Bad Lean statement: {statement}")
+    return variables, core_statement
+
+
 ################
 # Course rules #
 ################
@@ -424,21 +474,7 @@ class LeanCourseVisitor(NodeVisitor):
     def visit_metadata_core(self, node, visited_children):
         course_history, data = get_info(visited_children)
         content = node.text  # replace('¬', "\n")
-        try:
-            toml_content = tomllib.loads(content)
-        except tomllib.TOMLDecodeError as error:
-            log.error(f"TOMLDecodeError while parsing Lean file: the "
-                      f"following metadata has a syntax error"
-                      f"\n{node.text}at the following location:")
-            log.error(str(error))
-            log.error("Refer to toml syntax guide.")
-            raise error
-
-        if "display" in toml_content:  # Turn lists into tuples
-            display_dic = toml_content['display']
-            toml_content['display'] = {key: tuple(value)
-                                       for key, value in display_dic.items()}
-        data['metadata'] = toml_content
+        data['metadata'] = metadata_from_toml(content)
         return course_history, data
 
 
@@ -684,6 +720,325 @@ def change_name(name: str) -> str:
     return name
 
 
+def metadata_from_toml(content: str) -> dict:
+    """
+    Return the dict of metadata described by content, the text between
+    "/- dEAduction" and "-/".
+    """
+    try:
+        toml_content = tomllib.loads(content)
+    except tomllib.TOMLDecodeError as error:
+        log.error(f"TOMLDecodeError while parsing Lean file: the "
+                  f"following metadata has a syntax error"
+                  f"\n{content}at the following location:")
+        log.error(str(error))
+        log.error("Refer to toml syntax guide.")
+        raise error
+
+    if "display" in toml_content:  # Turn lists into tuples
+        display_dic = toml_content['display']
+        toml_content['display'] = {key: tuple(value)
+                                   for key, value in display_dic.items()}
+    return toml_content
+
+
+###########
+# Scanner #
+###########
+IDENTIFIER = r"[a-zA-Z_][a-zA-Z_0-9']*"
+
+
+class LeanCourseScanner:
+    """
+    Scan a Lean course file and compute the same course_history and
+    metadata as
+        LeanCourseVisitor().visit(lean_course_grammar.parse(file_content)),
+    but without going through the file one character at a time.
+
+    Each rule of the grammar is matched at a given position of the file by
+    a method that returns the end position (and the pertinent data), or None
+    if the rule does not match. As in the grammar, something_else
+    is a sequence of whole lines, each of which is either a line comment,
+    or does not contain any position where open_open, namespace_open_or_close,
+    statement or new_metadata matches.
+
+    self.scan() raises ValueError whenever the grammar would not parse the
+    file. Events are computed as a list of (position, event_name, data) in
+    self.items, and turned into a course_history by self.visit(), where
+    metadata and statements are analysed.
+    """
+
+    OPEN_OPEN = re.compile(rf"open[^\S\n]+({IDENTIFIER})")
+    OPEN_NAMESPACE = re.compile(rf"namespace[^\S\n]+({IDENTIFIER})")
+    CLOSE_NAMESPACE = re.compile(rf"end[^\S\n]+({IDENTIFIER})")
+    STATEMENT = re.compile(rf"lemma\s+((exercise|definition|theorem)\."
+                           rf"{IDENTIFIER})\s+")
+    OPEN_METADATA = re.compile(r"/-[^\S\n]+dEAduction\s+")
+    LINE_COMMENT = re.compile(r"[^\S\n]*--.*\n")
+    SPACES = re.compile(r"\s*")
+    # Positions where some coding rule may start:
+    CODING_START = re.compile(r"(?=open|namespace|end|lemma|/-)")
+    INTERLUDE_STOP = re.compile(r"/-|lemma|namespace")
+
+    def __init__(self, file_content: str):
+        self.text = file_content
+        self.items = []
+        self.metadata_content = None
+        # Statements are matched twice, as non-coding test and as items:
+        self.__statements = {}
+
+    def error(self, pos):
+        line_nb = self.text.count("\n", 0, pos) + 1
+        return ValueError(f"Lean course not scanned, line {line_nb}: "
+                          f"{self.text[pos:pos+40]!r}")
+
+    def skip_spaces(self, pos) -> int:
+        return self.SPACES.match(self.text, pos).end()
+
+    def keyword(self, pos, word) -> bool:
+        """
+        True if word, followed by a space or end of line, starts at pos.
+        """
+        end = pos + len(word)
+        return (self.text.startswith(word, pos) and end < len(self.text)
+                and self.text[end].isspace())
+
+    def match_metadata(self, pos) -> Optional[Tuple[int, str]]:
+        match = self.OPEN_METADATA.match(self.text, pos)
+        if not match:
+            return None
+        end = self.text.find("-/", match.end())
+        if end == -1:
+            return None
+        return end + 2, self.text[match.end():end]
+
+    def match_proof(self, pos) -> Optional[Tuple[int, int]]:
+        """
+        Return the end of the proof starting at pos, and the position of
+        its "end". Only lines starting with "begin" or "end" stop the proof.
+        """
+        if not self.keyword(pos, "begin"):
+            return None
+        line_start = pos + len("begin") + 1
+        while not (self.keyword(line_start, "begin")
+                   or self.keyword(line_start, "end")):
+            end_of_line = self.text.find("\n", line_start)
+            if end_of_line == -1:
+                break
+            line_start = end_of_line + 1
+        if not self.keyword(line_start, "end"):
+            return None
+        return line_start + len("end") + 1, line_start
+
+    def match_statement(self, pos) -> Optional[tuple]:
+        """
+        Return (end, event_name, lean_name, lean_statement,
+        metadata_content, proof) for the statement starting at pos,
+        where proof is None or (begin position, end position).
+        """
+        if pos in self.__statements:
+            return self.__statements[pos]
+
+        result = None
+        text = self.text
+        match = self.STATEMENT.match(text, pos)
+        separator = text.find(":=", match.end()) if match else -1
+        if separator != -1:
+            event_name = match.group(2)
+            after_separator = separator + len(":=")
+            metadata_content = None
+            proof_start = self.skip_spaces(after_separator)
+            if proof_start > after_separator:
+                metadata = self.match_metadata(proof_start)
+                if metadata:
+                    after_metadata, metadata_content = metadata
+                    proof_start = self.skip_spaces(after_metadata)
+                    if proof_start == after_metadata:
+                        proof_start = None
+            else:
+                proof_start = None
+            proof = (self.match_proof(proof_start)
+                     if proof_start is not None else None)
+            if proof:
+                result = (proof[0], event_name, match.group(1),
+                          text[match.end():separator], metadata_content,
+                          (proof_start, proof[1]))
+            elif event_name != "exercise":
+                # The proof (and metadata) of a definition are optional
+                result = (after_separator, event_name, match.group(1),
+                          text[match.end():separator], None, None)
+
+        self.__statements[pos] = result
+        return result
+
+    def match_open_namespace(self, pos) -> Optional[tuple]:
+        """
+        Return (end, name, metadata_content). As in the interlude rule,
+        metadata are searched up to the first "lemma" or "namespace".
+        """
+        match = self.OPEN_NAMESPACE.match(self.text, pos)
+        if not match:
+            return None
+        for stop in self.INTERLUDE_STOP.finditer(self.text, match.end()):
+            if stop.group() != "/-":
+                break
+            metadata = self.match_metadata(stop.start())
+            if metadata:
+                return metadata[0], match.group(1), metadata[1]
+        return match.end(), match.group(1), None
+
+    def is_coding(self, pos) -> bool:
+        return bool(self.OPEN_OPEN.match(self.text, pos)
+                    or self.OPEN_NAMESPACE.match(self.text, pos)
+                    or self.CLOSE_NAMESPACE.match(self.text, pos)
+                    or self.match_statement(pos)
+                    or self.match_metadata(pos))
+
+    def something_else(self, pos) -> int:
+        """
+        Return the position of the first line, from pos, which is
+        neither a line comment nor a non-coding line.
+        """
+        text = self.text
+        while True:
+            comment = self.LINE_COMMENT.match(text, pos)
+            if comment:
+                pos = comment.end()
+                continue
+            end_of_line = text.find("\n", pos)
+            if end_of_line == -1:
+                return pos
+            for start in self.CODING_START.finditer(text, pos, end_of_line):
+                if self.is_coding(start.start()):
+                    return pos
+            pos = end_of_line + 1
+
+    def item(self, pos) -> Optional[int]:
+        """
+        Match open_open, namespace_open_or_close or statement at pos,
+        store the corresponding events, and return the end position.
+        """
+        text = self.text
+        match = self.OPEN_OPEN.match(text, pos)
+        if match:
+            self.items.append((pos, "open_open", {"name": match.group(1)}))
+            return match.end()
+
+        namespace = self.match_open_namespace(pos)
+        if namespace:
+            end, name, metadata_content = namespace
+            self.items.append((pos, "open_namespace",
+                               (name, metadata_content)))
+            return end
+
+        match = self.CLOSE_NAMESPACE.match(text, pos)
+        if match:
+            self.items.append((pos, "close_namespace",
+                               {"name": match.group(1)}))
+            return match.end()
+
+        statement = self.match_statement(pos)
+        if statement:
+            end, event_name, *data, proof = statement
+            self.items.append((pos, event_name, data))
+            if proof:
+                self.items.append((proof[0], "begin_proof", None))
+                self.items.append((proof[1], "end_proof", None))
+            return end
+
+        return None
+
+    def scan(self):
+        """
+        Compute self.items and self.metadata_content, or raise ValueError.
+        """
+        pos = 0
+        metadata = self.match_metadata(self.something_else(pos))
+        if metadata:
+            pos, self.metadata_content = metadata
+
+        nb_items = 0
+        while True:
+            start = self.skip_spaces(self.something_else(pos))
+            end = self.item(start)
+            if end is None:
+                break
+            pos = end
+            nb_items += 1
+
+        end = self.skip_spaces(self.something_else(pos))
+        if not nb_items or end != len(self.text):
+            raise self.error(end)
+
+    @staticmethod
+    def statement_metadata(lean_name, lean_statement, metadata_content):
+        metadata = (metadata_from_toml(metadata_content)
+                    if metadata_content is not None else {})
+        metadata["lean_name"] = lean_name
+        try:
+            variables, core_statement = split_statement(lean_statement)
+        except ValueError:
+            variables, core_statement = extract_core_statement(lean_statement)
+        metadata["lean_variables"] = variables
+        metadata["lean_core_statement"] = core_statement
+        short_name = lean_name.split(".")[1]
+        automatic_pretty_name = short_name.replace("_", " ").capitalize()
+        metadata.setdefault("pretty_name", automatic_pretty_name)
+        return metadata
+
+    def visit(self) -> ([(str, dict)], dict):
+        """
+        Return course_history and metadata from self.items, as
+        LeanCourseVisitor.visit_course.
+        """
+        text = self.text
+        end_of_line = "end_of_line", None
+        course_history = []
+        last_pos = 0
+        for pos, event_name, data in self.items:
+            nb_lines = text.count("\n", last_pos, pos)
+            course_history.extend([end_of_line] * nb_lines)
+            last_pos = pos
+            if event_name == "open_namespace":
+                name, metadata_content = data
+                pretty_name = ""
+                if metadata_content is not None:
+                    metadata = metadata_from_toml(metadata_content)
+                    pretty_name = metadata.get("pretty_name")
+                if not pretty_name:
+                    pretty_name = name.replace("_", " ").capitalize()
+                data = {"name": name, "pretty_name": pretty_name}
+            elif event_name in ("exercise", "definition", "theorem"):
+                data = self.statement_metadata(*data)
+            course_history.append((event_name, data))
+        course_history.extend([end_of_line] * text.count("\n", last_pos))
+
+        metadata = (metadata_from_toml(self.metadata_content)
+                    if self.metadata_content is not None else {})
+        return course_history, metadata
+
+
+def course_history_and_metadata(file_content: str, use_grammar=False) \
+        -> ([(str, dict)], dict):
+    """
+    Return the course_history and metadata of file_content. The
+    lean_course_grammar is used if use_grammar is True, or if the
+    LeanCourseScanner fails.
+    """
+    if not use_grammar:
+        scanner = LeanCourseScanner(file_content)
+        try:
+            scanner.scan()
+        except ValueError as error:
+            log.warning(f"LeanCourseScanner failed, using grammar: {error}")
+        else:
+            return scanner.visit()
+
+    course_tree = lean_course_grammar.parse(file_content)
+    visitor = LeanCourseVisitor()
+    return visitor.visit(course_tree)
+
+
 #########
 # Tests #
 #########
@@ -104,6 +104,7 @@ class LeanServer:
             done_event                 = trio.Event()
 
             self.pending_reqs[seq_num] = done_event
+            self.seq_num              += 1  # Nb of requests stored so far
 
             return seq_num, done_event
 
@@ -111,6 +112,7 @@ class LeanServer:
             """
             Initializes the memory channels
             """
+            self.seq_num = 0  # Numbering starts again with a new process
             self.send, self.recv = trio.open_memory_channel(
                 max_buffer_size=self.max_nums
             )
@@ -180,6 +182,47 @@ class LeanServer:
                 except trio.WouldBlock:
                     break  # Memory channel is empty
 
+    class LineFramer:
+        """
+        Utility class used to cut Lean's stdout into lines. Bytes are
+        accumulated in a bytearray, and each chunk is only scanned once
+        for newlines, so that framing is linear in the size of the stream.
+        UTF-8 decoding is done per complete line, hence a multibyte
+        character split between two chunks is correctly decoded.
+        """
+
+        def __init__(self):
+            self.buffer = bytearray()
+            self.scan_from = 0  # Nb of buffer bytes known to contain no EOL
+
+        def feed(self, data: bytes) -> [bytes]:
+            """
+            Add a chunk of data, and return the list of complete lines
+            (without the trailing newline) that are now available.
+
+            :param data: a chunk of bytes read from Lean's stdout
+            :return: a list of bytes objects, one per complete line.
+            """
+            self.buffer += data
+            lines = []
+            start = 0
+            idx = self.buffer.find(b"\n", self.scan_from)
+            while idx >= 0:
+                lines.append(bytes(self.buffer[start:idx]))
+                start = idx + 1
+                idx = self.buffer.find(b"\n", start)
+
+            if start:
+                del self.buffer[:start]
+            self.scan_from = len(self.buffer)
+            return lines
+
+        def pending(self) -> int:
+            """
+            Number of bytes waiting for the end of their line.
+            """
+            return len(self.buffer)
+
     ############################################
     # Class functions definitions
     ############################################
@@ -191,7 +234,7 @@ class LeanServer:
         self.seq_num = None
 
         self.process = None
-        self.buffer = ""
+        self.line_framer = LeanServer.LineFramer()
 
         self.pending_reqs = \
             LeanServer.RequestStore(max_reqs)
@@ -304,33 +347,18 @@ class LeanServer:
         Receiver task to process data coming from
         lean on its stdout.
         """
-        # FIXME: the UnicodeDecodeError exception below is not really handled
-        #  The patch below just intercept it, on the hope that the lost
-        #  information will be retrieved by another attempt if necessary
-        #  (see the ServerQueue class)
         self._check_process()
 
         async for data in self.process.stdout:
-            try:
-                sstr = data.decode("utf-8")
-
-                # # Simulate UnicodeDecodeError:
-                # trial = random()
-                # self.log.debug(f"Random = {trial}")
-                # if trial < 0.3:
-                #     raise UnicodeDecodeError("Essai d'unicodeerror", data,
-                #                              0, 0, "")
-            except UnicodeDecodeError as error:
-                self.log.error("!UnicodeDecodeError!")
-                self.log.debug(error.reason)
-            else:
-                self.buffer += sstr
-
-            # Cut in lines
-            idx = self.buffer.find("\n")
-            while idx >= 0:
-                line        = self.buffer[:idx]
-                self.buffer = self.buffer[idx + 1:]
+            for raw_line in self.line_framer.feed(data):
+                try:
+                    line = raw_line.decode("utf-8")
+                except UnicodeDecodeError as error:
+                    # Only this line is lost; the ServerQueue will retry
+                    # if some expected information is missing.
+                    self.log.error("!UnicodeDecodeError!")
+                    self.log.debug(error.reason)
+                    continue
 
                 self.log.debug(f"Rx: {line}")
                 try :
@@ -338,8 +366,6 @@ class LeanServer:
                 except Exception:
                     # TODO # Better error management
                     self.log.error(traceback.format_exc())
-
-                idx = self.buffer.find("\n")
         self.exited.set()
 
     ############################################
@@ -737,7 +737,8 @@ class MathList(list, MathDescendant):
         """
         DEBUG=False
         shape = None
-        for pattern, pre_shape, metavars in PatternInit.pattern_lean:
+        for pattern, pre_shape, metavars in PatternInit.candidate_patterns(
+                PatternInit.pattern_lean, math_object):
             if DEBUG:
                 match, msg = pattern.match(math_object, return_msg=True)
             else:
@@ -820,7 +821,8 @@ class MathList(list, MathDescendant):
 
         # (1) Search for patterns
         for dic in dicts:
-            for pattern, pre_shape, metavars in dic:
+            for pattern, pre_shape, metavars in \
+                    PatternInit.candidate_patterns(dic, math_object):
                 if pattern.match(math_object):
                     # if any(item.find("multiple") != -1 for item in pre_shape
                     #        if isinstance(item, str)):
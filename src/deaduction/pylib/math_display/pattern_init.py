@@ -45,7 +45,7 @@ import logging
 from deaduction.pylib.math_display.pattern_data import \
     latex_from_pattern_string, latex_from_pattern_string_for_type, \
     text_from_pattern_string, quant_pattern, \
-    set_quant_pattern, lean_from_pattern_string
+    set_quant_pattern, lean_from_pattern_string, metanodes
 
 from deaduction.pylib.math_display.app_pattern_data import \
     latex_from_app_pattern, app_pattern_from_constants, generic_app_dict, \
@@ -58,6 +58,83 @@ from deaduction.pylib.math_display.app_pattern_data import \
 log = logging.getLogger(__name__)
 
 
+class PatternIndex:
+    """
+    An index of a list of triples (pattern, shape, metavars), which
+    provides, for a given MathObject, the sub-list of the triples whose
+    pattern may match it, in the original order (so that the first
+    matching pattern is unchanged).
+    Patterns are indexed by their root node, and for applications by the
+    name of the function, e.g. (APPLICATION, composition). Patterns that
+    may match any node (metavars, metanodes) are kept in every sub-list.
+    """
+
+    def __init__(self, patterns: list):
+        self.patterns = patterns
+        self.wildcards = []  # Indices of patterns matching any node
+        self.by_node = {}  # node --> indices
+        self.by_head = {}  # (node, name of children[0]) --> indices
+        self.__candidates = {}  # key --> sub-list of patterns
+
+        for index, (pattern, shape, metavars) in enumerate(patterns):
+            node, head = self.pattern_key(pattern)
+            if node is None:
+                self.wildcards.append(index)
+            elif head is None:
+                self.by_node.setdefault(node, []).append(index)
+            else:
+                self.by_head.setdefault((node, head), []).append(index)
+
+    @staticmethod
+    def is_wildcard(pattern) -> bool:
+        """
+        True if pattern may match objects with any node.
+        """
+        return (pattern.is_no_math_type() or pattern.is_metavar
+                or pattern.node in metanodes)
+
+    @classmethod
+    def pattern_key(cls, pattern) -> tuple:
+        """
+        Return (node, head) such that pattern may only match objects with
+        this node, and whose children[0] has this name if head is not None.
+        node is None if pattern may match anything.
+        """
+        if cls.is_wildcard(pattern):
+            return None, None
+        head = None
+        if pattern.node == 'APPLICATION' and pattern.children:
+            function = pattern.children[0]
+            if not (cls.is_wildcard(function) or function.node == '...'
+                    or function.name in (None, '', '?')):
+                head = function.name
+        return pattern.node, head
+
+    @staticmethod
+    def key(math_object) -> tuple:
+        node = math_object.node
+        head = None
+        if node == 'APPLICATION' and math_object.children:
+            head = math_object.children[0].name
+        return node, head
+
+    def candidates(self, math_object) -> list:
+        """
+        Return the sub-list of self.patterns that may match math_object.
+        """
+        if math_object.is_no_math_type():  # Matched by (almost) anything
+            return self.patterns
+        key = self.key(math_object)
+        candidates = self.__candidates.get(key)
+        if candidates is None:
+            node, head = key
+            indices = (self.wildcards + self.by_node.get(node, [])
+                       + self.by_head.get((node, head), []))
+            candidates = [self.patterns[index] for index in sorted(indices)]
+            self.__candidates[key] = candidates
+        return candidates
+
+
 class PatternInit:
     """
     This instanceless class is responsible for initialising the
@@ -76,6 +153,7 @@ class PatternInit:
     """
 
     pattern_from_string: callable = None  # To be set in pattern_math_object
+    snapshots = None  # Idem, a PatternSnapshots instance
 
     #############################
     # These are the useful lists #
@@ -86,6 +164,10 @@ class PatternInit:
     pattern_text = []
     pattern_latex_for_type = []
 
+    indices = {}  # id(pattern list) --> PatternIndex
+    version = 0  # Incremented each time patterns are computed
+    patterns_outdated = False  # True when patterns are to be computed
+
     # This list indicates how to populate pattern lists from dictionaries:
     # Careful, order matters.
     dic_list_pairs = \
@@ -112,22 +194,61 @@ class PatternInit:
         for dict_, list_ in cls.dic_list_pairs:
             list_.clear()
 
-        # (2) Fill in pattern dicts
-        for dict_, list_ in cls.dic_list_pairs:
-            for key, latex_shape in dict_.items():
-                metavars = []
-                pattern = cls.pattern_from_string(key, metavars)
+        # (2) Compute patterns, or load them from a snapshot
+        patterns = None
+        if cls.snapshots:
+            digest = cls.snapshots.digest(cls.dic_list_pairs)
+            patterns = cls.snapshots.load(digest)
+        if patterns is None:
+            patterns = []
+            for dict_, list_ in cls.dic_list_pairs:
+                dict_patterns = []
+                for key in dict_:
+                    metavars = []
+                    pattern = cls.pattern_from_string(key, metavars)
+                    dict_patterns.append((pattern, metavars))
+                patterns.append(dict_patterns)
+            if cls.snapshots:
+                cls.snapshots.save(digest, patterns)
+
+        # (3) Fill in pattern lists
+        for (dict_, list_), dict_patterns in zip(cls.dic_list_pairs,
+                                                 patterns):
+            for latex_shape, (pattern, metavars) in zip(dict_.values(),
+                                                        dict_patterns):
                 list_.append((pattern, latex_shape, metavars))
 
+        # (4) Index pattern lists
+        cls.indices = {id(list_): PatternIndex(list_)
+                       for dict_, list_ in cls.dic_list_pairs}
+        cls.version += 1
+        cls.patterns_outdated = False
+
+    @classmethod
+    def candidate_patterns(cls, patterns: list, math_object) -> list:
+        """
+        Return the sub-list of patterns (one of the pattern lists) whose
+        pattern may match math_object, in the same order.
+        """
+        if cls.patterns_outdated:
+            cls.string_to_pattern()
+        index = cls.indices.get(id(patterns))
+        return index.candidates(math_object) if index else patterns
+
     @classmethod
-    def pattern_init(cls, additional_constants=None):
+    def pattern_init(cls, additional_constants=None, lazy=False):
         """
         This method is called from PatternMathObject.
+        If lazy is True, then patterns will only be computed when first
+        needed, by candidate_patterns().
         """
         set_quant_pattern()
         app_pattern_from_constants(additional_data=additional_constants)
         PatternMathDisplay.populate_app_pattern_dict()
-        cls.string_to_pattern()
+        if lazy:
+            cls.patterns_outdated = True
+        else:
+            cls.string_to_pattern()
 
     @classmethod
     def all_app_patterns(cls):
@@ -30,5 +30,8 @@ from deaduction.pylib.mathobj.math_object import MathObject, BoundVar
 from .context_math_object import                 ContextMathObject
 
 from .lean_analysis import       (lean_expr_with_type_grammar,
-                                  LeanEntryVisitor)
+                                  LeanEntryVisitor,
+                                  LeanEntryParser,
+                                  lean_entries,
+                                  parse_lean_entry)
 
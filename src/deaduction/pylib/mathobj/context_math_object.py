@@ -53,7 +53,8 @@ class ContextMathObject(MathObject):
     """
     list_: [Any] = []  # List of all ContextMathObject in the current context
     is_new_: bool  # True if self was not present in previous context
-    is_modified_: bool  # True if self is modified from previous context
+    # True if self is modified from previous context, set by Goal.compare():
+    is_modified_: Optional[bool] = None
     is_hidden: bool  # True if self should not be displayed in ui
     has_been_used_in_the_proof: bool
     allow_auto_action_: bool = True
@@ -84,8 +85,12 @@ class ContextMathObject(MathObject):
 
     @property
     def is_modified(self):
-        return (self.parent_context_math_object
-                and self.parent_context_math_object.math_type != self.math_type)
+        parent = self.parent_context_math_object
+        if not parent:
+            return parent
+        if self.is_modified_ is None:
+            self.is_modified_ = parent.math_type != self.math_type
+        return self.is_modified_
 
     @property
     def age(self):
@@ -32,6 +32,7 @@ This file is part of dEAduction.
 
 from parsimonious.grammar import Grammar
 from parsimonious.nodes import NodeVisitor
+from copy import copy
 import logging
 
 from deaduction.pylib.mathobj import MathObject, ContextMathObject
@@ -209,6 +210,231 @@ def concatenate(children):
     return objects, info
 
 
+##########################################################
+# Hand-written single-pass parser for the same format    #
+##########################################################
+# The grammar above is kept as a reference implementation; the following
+# parser is much faster on large contexts, and should produce exactly the
+# same MathObjects (in the same order of creation, which matters for
+# MathObject.Variables and MathObject.constants).
+
+class LeanEntryParser:
+    """
+    Parse an entry of hypo_analysis / targets_analysis, e.g.
+        ¿¿¿object: LOCAL_CONSTANT¿[name: X¿/ identifier: ...¿]¿= TYPE
+    into a ContextMathObject, like
+        LeanEntryVisitor().visit(lean_expr_with_type_grammar.parse(entry)).
+
+    The string is cut by str.split() at every "¿", so that each piece starts
+    with a separator character ("(", ")", ",", "[", "]", "/", "=").
+    The tree is then built with an explicit stack of frames; each frame is
+    a list [info, children, kind, state] for a node whose MathObject has
+    not been created yet, where
+        - kind is one of HEAD, TAIL, TYPE, CHILD,
+        - state is the last part of the node that has been read, one of
+        NAME, INFOS, MATH_TYPE, CHILDREN (in this order, see the rule
+        "node = node_name infos? info_type?" of the grammar).
+    """
+
+    TYPE_PREFIX = "[type: "
+    INFO_FIELD_NAMES = ("name", "identifier", "pp_type", "value",
+                        "binder_info")
+    HEAD, TAIL, TYPE, CHILD = range(4)
+    NAME, INFOS, MATH_TYPE, CHILDREN = range(4)
+
+    def __init__(self, entry: str):
+        self.entry = entry
+
+    def error(self, msg):
+        return ValueError(f"Bad Lean entry ({msg}): {self.entry}")
+
+    def info_field(self, text: str) -> (str, str):
+        field_name, sep, content = text.partition(": ")
+        if not sep or not content or field_name not in self.INFO_FIELD_NAMES:
+            raise self.error(f"bad info field {text}")
+        return field_name, content
+
+    def new_frame(self, node_name: str, kind: int) -> list:
+        if not node_name:
+            raise self.error("empty node name")
+        return [{'node_name': node_name}, [], kind, self.NAME]
+
+    @staticmethod
+    def math_object(frame) -> MathObject:
+        info, children = frame[0], frame[1]
+        return MathObject.from_info_and_children(info=info, children=children)
+
+    def parse(self) -> ContextMathObject:
+        entry = self.entry
+        if not entry.startswith("¿¿¿"):
+            raise self.error("no ¿¿¿")
+        pieces = entry[3:].split("¿")
+
+        # (1) Beginning of HEAD
+        head_info = {}
+        head_text = pieces[0]
+        idx = 1
+        if head_text.startswith("object: "):
+            node_name = head_text[len("object: "):]
+        elif head_text == "property":
+            # Optional infos, e.g. ¿[pp_type: ...¿]
+            node_name = None
+            while idx < len(pieces):
+                piece = pieces[idx]
+                idx += 1
+                if piece.startswith("]: ") and head_info:
+                    node_name = piece[3:]
+                    break
+                elif piece.startswith("[") and not head_info:
+                    key, value = self.info_field(piece[1:])
+                elif piece.startswith("/ ") and head_info:
+                    key, value = self.info_field(piece[2:])
+                else:
+                    raise self.error("bad property head")
+                head_info[key] = value
+            if node_name is None:
+                raise self.error("no property node")
+        elif head_text.startswith("property: "):
+            node_name = head_text[len("property: "):]
+        else:
+            raise self.error("unknown head")
+
+        head_frame = self.new_frame(node_name, self.HEAD)
+        head_info.update(head_frame[0])
+        head_frame[0] = head_info
+        stack = [head_frame]
+
+        # (2) End of HEAD and TAIL
+        in_infos = False
+        for piece in pieces[idx:]:
+            sep = piece[:1]
+            frame = stack[-1]
+
+            if in_infos:
+                if sep == "/" and piece.startswith("/ "):
+                    key, value = self.info_field(piece[2:])
+                    frame[0][key] = value
+                elif piece == "]":
+                    in_infos = False
+                else:
+                    raise self.error("bad infos")
+
+            elif sep == "[":
+                if piece.startswith(self.TYPE_PREFIX):
+                    if frame[3] > self.INFOS:
+                        raise self.error("misplaced type")
+                    frame[3] = self.MATH_TYPE
+                    node_name = piece[len(self.TYPE_PREFIX):]
+                    stack.append(self.new_frame(node_name, self.TYPE))
+                else:
+                    if frame[3] != self.NAME:
+                        raise self.error("misplaced infos")
+                    frame[3] = self.INFOS
+                    in_infos = True
+                    key, value = self.info_field(piece[1:])
+                    frame[0][key] = value
+
+            elif piece == "]":
+                if frame[2] != self.TYPE:
+                    raise self.error("misplaced ¿]")
+                stack.pop()
+                stack[-1][0]['math_type'] = self.math_object(frame)
+
+            elif sep == "(":
+                if frame[3] == self.CHILDREN or frame[2] == self.HEAD:
+                    raise self.error("misplaced ¿(")
+                frame[3] = self.CHILDREN
+                stack.append(self.new_frame(piece[1:], self.CHILD))
+
+            elif sep == "," and piece.startswith(", "):
+                if frame[2] != self.CHILD:
+                    raise self.error("misplaced ¿,")
+                stack.pop()
+                stack[-1][1].append(self.math_object(frame))
+                stack.append(self.new_frame(piece[2:], self.CHILD))
+
+            elif piece == ")":
+                if frame[2] != self.CHILD:
+                    raise self.error("misplaced ¿)")
+                stack.pop()
+                stack[-1][1].append(self.math_object(frame))
+
+            elif sep == "=" and piece.startswith("= "):
+                if frame is not head_frame:
+                    raise self.error("misplaced ¿=")
+                stack.append(self.new_frame(piece[2:], self.TAIL))
+
+            else:
+                raise self.error(f"unexpected ¿{piece}")
+
+        # (3) Create the entry
+        if in_infos or len(stack) != 2 or stack[-1][2] != self.TAIL:
+            raise self.error("incomplete entry")
+        head_info['math_type'] = self.math_object(stack.pop())
+        return ContextMathObject.from_info_and_children(info=head_info,
+                                                        children=[])
+
+
+def lean_entries(analysis: str) -> [str]:
+    """
+    Split a string from hypo_analysis / targets_analysis into entries,
+    each starting with "¿¿¿", getting rid of the title line ("context:" or
+    "targets:") and of the '\n'.
+    """
+    items = analysis.split("¿¿¿")
+    return ['¿¿¿' + item.replace('\n', '') for item in items[1:]]
+
+
+def from_parsed_entry(math_object: ContextMathObject) -> ContextMathObject:
+    """
+    Return an object for an entry that has already been parsed into
+    math_object. If math_object is registered in MathObject.Variables,
+    it is returned as is, since this is what
+    ContextMathObject.from_info_and_children would do. Otherwise (e.g. for
+    targets), a new ContextMathObject sharing math_object's children and
+    math_type is returned.
+    """
+    identifier = math_object.info.get('identifier')
+    if identifier and MathObject.Variables.get(identifier) is math_object:
+        return math_object
+    return ContextMathObject(node=math_object.node,
+                             info=copy(math_object.info),
+                             children=math_object.children,
+                             math_type=math_object.math_type)
+
+
+def parse_lean_entry(entry: str, use_grammar=False,
+                     use_cache=True) -> ContextMathObject:
+    """
+    Return the ContextMathObject described by entry, a line of
+    hypo_analysis or targets_analysis. The parsimonious grammar is used
+    if use_grammar is True, or if the LeanEntryParser fails.
+
+    If use_cache is True, entries are looked up in MathObject.parsed_entries
+    first, so that only new or modified entries are parsed. This cache
+    is cleared by MathObject.clear(), i.e. at the end of each Lean session.
+    """
+    cache = MathObject.parsed_entries
+    if use_cache:
+        math_object = cache.get(entry)
+        if math_object is not None:
+            return from_parsed_entry(math_object)
+
+    math_object = None
+    if not use_grammar:
+        try:
+            math_object = LeanEntryParser(entry).parse()
+        except ValueError as error:
+            log.warning(f"LeanEntryParser failed, using grammar: {error}")
+    if math_object is None:
+        tree = lean_expr_with_type_grammar.parse(entry)
+        math_object = LeanEntryVisitor().visit(tree)
+
+    if use_cache:
+        cache.set(entry, math_object)
+    return math_object
+
+
 # For debugging
 def pprint(essai: str):
     """
@@ -54,8 +54,9 @@ from functools import partial
 
 import deaduction.pylib.config.vars as cvars
 
-from deaduction.pylib.math_display import MathList, MathDescendant
-from deaduction.pylib.utils import inj_list
+from deaduction.pylib.math_display import (MathList, MathDescendant,
+                                           PatternInit, metanodes)
+from deaduction.pylib.utils import inj_list, LRUCache
 
 log = logging.getLogger(__name__)
 global _
@@ -98,7 +99,9 @@ def allow_implicit_use(test_: callable) -> callable:
             else:
                 math_type = math_object.math_type
             definition_patterns = MathObject.definition_patterns
-            for index in range(len(definition_patterns)):
+            indices = math_type.implicit_definition_indices(test_,
+                                                            include_iff)
+            for index in indices:
                 # Test right term if self match pattern
                 pattern = definition_patterns[index]
                 pattern_left = pattern.children[0]
@@ -109,6 +112,7 @@ def allow_implicit_use(test_: callable) -> callable:
                 log.debug(f"(Trying definition "
                       f"{MathObject.implicit_definitions[index].pretty_name}"
                       f"...)")
+                # (Match again to set pattern_left's metavars)
                 if pattern_left.match(math_type):
                     if test(pattern_right, is_math_type=True):
                         definition = MathObject.implicit_definitions[index]
@@ -120,10 +124,11 @@ def allow_implicit_use(test_: callable) -> callable:
                             metavars, objects)
                         MathObject.last_rw_object = rw_math_object
                         # pattern_right.rename_all_bound_vars()
-                        log.debug(f"Implicit definition: "
-                                  f"{definition.pretty_name}")
-                        log.debug(f"    {math_type.to_display()}  <=>"
-                                  f" {rw_math_object.to_display()}")
+                        if log.isEnabledFor(logging.DEBUG):
+                            log.debug(f"Implicit definition: "
+                                      f"{definition.pretty_name}")
+                            log.debug(f"    {math_type.to_display()}  <=>"
+                                      f" {rw_math_object.to_display()}")
                         return True
             return False
     return test_implicit
@@ -144,6 +149,8 @@ class MathObject:
     _node              : str   # e.g. "LOCAL_CONSTANT", "FUNCTION", "QUANT_∀"
     _info              : dict  # e.g. "name", "id", "pp_type"
     _children          : list  # List of MathObjects
+    _structural_hash   : Optional[tuple] = None  # (hash_epoch, hash)
+    _display_id        : Optional[int] = None
 
     Variables = {}  # Containing every element having an identifier,
     # i.e. global and bound variables, whose node is LOCAL_CONSTANT.
@@ -151,6 +158,17 @@ class MathObject:
     # key = identifier,
     # value = MathObject
     constants = {}  # WHen node='CONSTANT'. Again, used to avoid duplicates.
+    parsed_entries = LRUCache(max_size=2048)  # Raw hypo_analysis or
+    # targets_analysis entry --> ContextMathObject. Used by
+    # lean_analysis.parse_lean_entry() to parse only new entries.
+    hash_epoch = 0  # Incremented when a hashed MathObject is modified,
+    # so that all cached structural hashes are recomputed.
+    use_interning = False  # If True, from_info_and_children() returns the
+    # interned instance of new objects, cf MathObject.intern().
+    interned = LRUCache(max_size=4096)  # structural hash --> [MathObject]
+    caches_structural_hash = True  # False for dynamic objects (metavars)
+    display_cache = LRUCache(max_size=4096)  # cf to_display()
+    display_counter = 0  # To give each MathObject a display id
     NUMBER_SETS_LIST = ['ℕ', 'ℤ', 'ℚ', 'ℝ']
     number_sets = []  # Ordered list of all sets of numbers involved in some
     # MathObjects of the context, ordered sublist of ['ℕ', 'ℤ', 'ℚ', 'ℝ']
@@ -172,6 +190,12 @@ class MathObject:
     # definition is used with success:
     last_used_implicit_definition = None
     last_rw_object                = None
+    # Memoization of implicit_definition_indices(), valid as long as
+    # definition_patterns is unchanged, cf check_implicit_definitions():
+    implicit_memo = LRUCache(max_size=4096)
+    implicit_definitions_state = None  # (definition_patterns, length)
+    patterns_by_node = dict()  # Head node --> indices in definition_patterns
+    patterns_for_any_node = []  # Indices of patterns matching any node
 
     # NB: all of these should be binary relations
     INEQUALITIES = ("PROP_<", "PROP_>", "PROP_≤", "PROP_≥", "PROP_EQUAL_NOT")
@@ -190,6 +214,7 @@ class MathObject:
         self._info = info
         self._children = children
         self._math_type = math_type
+        self._structural_hash = None
 
         if self.has_bound_var():  # Set bound var math_type and parent
             # Every object here should have children matching this:
@@ -204,6 +229,16 @@ class MathObject:
                 children[0].node == 'APPLICATION'):
             self.children = self.children[0].children + [self.children[1]]
 
+    def __getstate__(self):
+        """
+        Do not pickle cached hash and display id, which are only valid in
+        the current session.
+        """
+        state = self.__dict__.copy()
+        state.pop('_structural_hash', None)
+        state.pop('_display_id', None)
+        return state
+
     def debug_repr(self, typ):
         if self.name:
             rep = self.name
@@ -229,6 +264,7 @@ class MathObject:
     @node.setter
     def node(self, node):
         self._node = node
+        self.structure_changed()
 
     @property
     def info(self):
@@ -237,6 +273,7 @@ class MathObject:
     @info.setter
     def info(self, info):
         self._info = info
+        self.structure_changed()
 
     @property
     def children(self):
@@ -245,6 +282,7 @@ class MathObject:
     @children.setter
     def children(self, children):
         self._children = children
+        self.structure_changed()
 
     @property
     def math_type(self) -> Any:
@@ -262,6 +300,7 @@ class MathObject:
     @math_type.setter
     def math_type(self, math_type: Any):
         self._math_type = math_type
+        self.structure_changed()
 
     def is_no_math_type(self):
         return self is self.NO_MATH_TYPE
@@ -322,6 +361,7 @@ class MathObject:
                     lam = MathObject.lambda_(var, body, child.math_type)
                     # Replace child by lambda with the same math_type
                     self.children[index] = lam
+                    self.structure_changed()
 
     @classmethod
     def add_numbers_set(cls, name: str):
@@ -418,6 +458,10 @@ class MathObject:
         # (5) Special treatment for sequences and set families
         math_object.process_sequences_and_likes()
 
+        # (6) Share identical objects
+        if MathObject.use_interning:
+            math_object = MathObject.intern(math_object)
+
         return math_object
 
     @classmethod
@@ -427,6 +471,11 @@ class MathObject:
         server is stopped, because in the next session Lean could
         re-attributes an identifier that is in Variables, entailing chaos."""
         cls.Variables = {}
+        cls.parsed_entries.clear()
+        cls.interned.clear()
+        cls.display_cache.clear()
+        cls.implicit_memo.clear()
+        cls.use_interning = cvars.get('others.intern_math_objects', False)
         cls.number_sets = []
         cls.bound_var_counter = 0
         # cls.context_bound_vars = []
@@ -863,6 +912,7 @@ class MathObject:
     @value.setter
     def value(self, new_value):
         self.info['value'] = new_value
+        self.structure_changed()
 
     @property
     def binder_info(self):
@@ -947,6 +997,7 @@ class MathObject:
 
     def give_name(self, name):
         self.info["name"] = name
+        self.structure_changed()
 
     def has_name(self, name: str):
         return self.display_name == name
@@ -969,6 +1020,87 @@ class MathObject:
 ##########################################
 # Tests for equality and related methods #
 ##########################################
+    def structure_changed(self):
+        """
+        Invalidate cached structural hashes. Since parents of self may have
+        cached a hash depending on self, all cached hashes are invalidated,
+        but only if self has been hashed (which is rare after creation).
+        """
+        if self._structural_hash is not None:
+            MathObject.hash_epoch += 1
+            self._structural_hash = None
+
+    def structural_hash(self) -> Optional[int]:
+        """
+        Return a hash of self which is compatible with is_equal_to(), i.e.
+        equal MathObjects have equal structural hashes, so that the
+        comparison of two MathObjects with distinct hashes may be skipped.
+        - math_types are not hashed, since NO_MATH_TYPE is equal to anything;
+        - all bound vars have the same hash, so that alpha-equivalent
+        expressions like '∀x, P(x)' and '∀y, P(y)' have the same hash;
+        - generic parentheses are transparent, cf remove_generic_paren.
+        The hash is None if self contains NO_MATH_TYPE.
+        It is computed only once, unless some hashed MathObject is modified.
+        """
+        cached = self._structural_hash
+        if cached is not None and cached[0] == MathObject.hash_epoch:
+            return cached[1]
+
+        if self.is_no_math_type():
+            hash_ = None
+        elif self.is_bound_var:
+            hash_ = hash('BoundVar')
+        elif self.node == "GENERIC_PARENTHESES" and self.children:
+            hash_ = self.children[0].structural_hash()
+        else:
+            children_hashes = tuple(child.structural_hash()
+                                    for child in self.children)
+            hash_ = (None if None in children_hashes
+                     else hash((self.node, self.name, self.value,
+                                children_hashes)))
+
+        if self.caches_structural_hash:
+            self._structural_hash = (MathObject.hash_epoch, hash_)
+        return hash_
+
+    def __hash__(self):
+        """
+        Allow MathObjects as keys of dict and elements of sets.
+        Beware that NO_MATH_TYPE, which is equal to anything, is not
+        correctly hashed.
+        """
+        hash_ = self.structural_hash()
+        return 0 if hash_ is None else hash_
+
+    @classmethod
+    def intern(cls, math_object):
+        """
+        Hash-consing: return an already interned MathObject equal to
+        math_object, with the same math_type, if any, so that identical
+        sub-objects share one instance. Otherwise, intern math_object and
+        return it. Objects with bound vars are never shared, since bound var
+        names and parents are specific to each instance.
+        """
+        if type(math_object) is not MathObject:
+            return math_object
+        hash_ = math_object.structural_hash()
+        if hash_ is None or math_object.all_bound_vars():
+            return math_object
+
+        candidates = cls.interned.get(hash_)
+        if candidates is None:
+            cls.interned.set(hash_, [math_object])
+            return math_object
+        for candidate in candidates:
+            if candidate is math_object:
+                return candidate
+            if ((candidate._math_type is None) ==
+                    (math_object._math_type is None)
+                    and candidate.is_equal_to(math_object)[0]):
+                return candidate
+        candidates.append(math_object)
+        return math_object
+
     def __eq__(self, other) -> bool:
         """
         Test if the two MathObjects code for the same mathematical objects,
@@ -1064,6 +1196,15 @@ class MathObject:
         if self.is_no_math_type() or other.is_no_math_type():
             return True, ""
 
+        # Structural hashes are faster than a recursive comparison:
+        if (not (use_assigned_math_obj or return_msg)
+                and self.caches_structural_hash
+                and other.caches_structural_hash):
+            hash0 = self.structural_hash()
+            hash1 = other.structural_hash()
+            if None not in (hash0, hash1) and hash0 != hash1:
+                return False, error_msg
+
         ################################################
         # Test node, bound var, name, value, math_type #
         ################################################
@@ -2137,6 +2278,75 @@ class MathObject:
 ################################
 # Implicit definitions methods #
 ################################
+    @classmethod
+    def check_implicit_definitions(cls):
+        """
+        If definition_patterns has changed since last call, clear
+        implicit_memo and index the patterns by the node of their left term.
+        Patterns whose left term is a metavar or a metanode may match objects
+        with any node.
+        """
+        definition_patterns = cls.definition_patterns
+        state = cls.implicit_definitions_state
+        if (state is not None and state[0] is definition_patterns
+                and state[1] == len(definition_patterns)):
+            return
+
+        cls.implicit_memo.clear()
+        cls.implicit_definitions_state = (definition_patterns,
+                                          len(definition_patterns))
+        cls.patterns_by_node = dict()
+        cls.patterns_for_any_node = []
+        for index, pattern in enumerate(definition_patterns):
+            pattern_left = pattern.children[0]
+            if (pattern_left.is_metavar or pattern_left.is_no_math_type()
+                    or pattern_left.node in metanodes):
+                cls.patterns_for_any_node.append(index)
+            else:
+                cls.patterns_by_node.setdefault(pattern_left.node,
+                                                []).append(index)
+
+    def implicit_definition_indices(self, test=None,
+                                    include_iff=False) -> [int]:
+        """
+        Return the indices in definition_patterns of the definitions whose
+        left term matches self, and whose right term passes test (e.g.
+        MathObject.is_and), if any. Only patterns with the same head node as
+        self (or matching any node) are tried, and the result is memoized
+        by self's identity, as long as self and the definitions are not
+        modified.
+        """
+        MathObject.check_implicit_definitions()
+        key = None
+        if self.caches_structural_hash:
+            self.structural_hash()
+            key = (self.display_id(), MathObject.hash_epoch, test,
+                   include_iff)
+            indices = MathObject.implicit_memo.get(key)
+            if indices is not None:
+                return indices
+
+        if self.is_no_math_type():
+            candidates = range(len(MathObject.definition_patterns))
+        else:
+            candidates = sorted(MathObject.patterns_by_node.get(self.node, [])
+                                + MathObject.patterns_for_any_node)
+        if test and include_iff:
+            test = partial(test, include_iff=include_iff)
+
+        indices = []
+        for index in candidates:
+            pattern = MathObject.definition_patterns[index]
+            pattern_left = pattern.children[0]
+            pattern_right = pattern.children[1]
+            if pattern_left.match(self):
+                if not test or test(pattern_right, is_math_type=True):
+                    indices.append(index)
+
+        if key is not None:
+            MathObject.implicit_memo.set(key, indices)
+        return indices
+
     def unfold_implicit_definition(self):  # -> [MathObject]
         """
         Try to unfold each implicit definition at top level only,
@@ -2146,7 +2356,7 @@ class MathObject:
 
         definition_patterns = MathObject.definition_patterns
         rw_math_objects = []
-        for index in range(len(definition_patterns)):
+        for index in self.implicit_definition_indices():
             # Test right term if self match pattern
             pattern = definition_patterns[index]
             pattern_left = pattern.children[0]
@@ -2277,17 +2487,49 @@ class MathObject:
 ################################################
 # Display methods: implemented in math_display #
 ################################################
+    def display_id(self) -> int:
+        """
+        Return a number that identifies self, to be used as a key of caches
+        (display_cache, implicit_memo).
+        """
+        if self._display_id is None:
+            MathObject.display_counter += 1
+            self._display_id = MathObject.display_counter
+        return self._display_id
+
     def to_display(self, format_="html", text=False,
                    use_color=True, bf=False, is_type=False,
                    used_in_proof=False,
                    pretty_parentheses=True) -> str:
         """
         This method is actually defined in math_display/new_display.
-        """
-        display = MathList.display(self, format_=format_, text=text,
-                                   use_color=use_color, bf=bf, is_type=is_type,
-                                   used_in_proof=used_in_proof,
-                                   pretty_parentheses=pretty_parentheses)
+        Displays are cached in MathObject.display_cache, keyed by self's
+        display id, names of bound vars, version of display patterns, and
+        display parameters. Since self is hashed, any modification of self
+        invalidates the cache.
+        """
+        if not self.caches_structural_hash:
+            return MathList.display(self, format_=format_, text=text,
+                                    use_color=use_color, bf=bf,
+                                    is_type=is_type,
+                                    used_in_proof=used_in_proof,
+                                    pretty_parentheses=pretty_parentheses)
+
+        self.structural_hash()
+        bound_var_names = tuple((bv.name, bv.lean_name)
+                                for bv in self.all_bound_vars())
+        key = (self.display_id(), MathObject.hash_epoch, PatternInit.version,
+               bound_var_names,
+               format_, text, use_color, bf, is_type, used_in_proof,
+               pretty_parentheses)
+        display = self.display_cache.get(key)
+        if display is None:
+            display = MathList.display(self, format_=format_, text=text,
+                                       use_color=use_color, bf=bf,
+                                       is_type=is_type,
+                                       used_in_proof=used_in_proof,
+                                       pretty_parentheses=pretty_parentheses)
+            self.display_cache.set(key, display)
         return display
 
     def try_to_display(self, text=False, is_type=False):
@@ -2445,6 +2687,8 @@ class BoundVar(MathObject):
                    return_msg else "")
             return False, msg
 
+    __hash__ = MathObject.__hash__
+
     def __eq__(self, other):
         """
         During an equality test for MathObjects, matching BoundVar are
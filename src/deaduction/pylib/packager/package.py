@@ -31,6 +31,7 @@ import tempfile
 import shutil
 import traceback
 import time
+import hashlib
 
 import logging
 
@@ -78,7 +79,7 @@ class Package:
     ############################################
     # Public interface to be implemented
     ############################################
-    def check(self):
+    def check(self, full_verify=False):
         pass
 
     def install(self):
@@ -137,6 +138,30 @@ class Package:
         self._check_folder_exists()
         self._check_folder_is_writable()
 
+    def _hash_cache(self, full_verify=False) -> fs.HashCache:
+        """
+        Cache of the checksums of the files in self.path. If full_verify,
+        the cache is emptied so that all files are hashed again.
+        """
+        name = hashlib.sha1(str(self.path).encode("utf8")).hexdigest()
+        cache = fs.HashCache(dirs.hash_cache_dir / (name + ".json"))
+        if full_verify:
+            cache.clear()
+        return cache
+
+    def _hashlist(self, full_verify=False) -> fs.HashList:
+        """
+        HashList of the files in self.path, using the hash cache.
+        """
+        start = time.perf_counter()
+        cache = self._hash_cache(full_verify)
+        hlist = fs.HashList.from_path(self.path, cache=cache)
+        log.info(_("Files of {} checked in {:.2f}s: {} file(s) hashed, "
+                   "{} from cache").format(self.path,
+                                           time.perf_counter() - start,
+                                           cache.misses, cache.hits))
+        return hlist
+
 
 # ┌────────────────────────────────────────┐
 # │ ArchivePackage class                   │
@@ -159,7 +184,7 @@ class ArchivePackage(Package):
         self.archive_type     = archive_type
         self.downloader = None
 
-    def _check_files(self):
+    def _check_files(self, full_verify=False):
         """
         For dict differ:
             * Non existing file:
@@ -215,7 +240,7 @@ class ArchivePackage(Package):
             # Crash 5 here
             hlist_ref  = fs.HashList.from_file(self.archive_hlist)  #Crash 6
             log.debug("step 1")
-            hlist_dest = fs.HashList.from_path(self.path)
+            hlist_dest = self._hashlist(full_verify)
             log.debug("step 2")
 
             diff       = list(hlist_dest.diff(hlist_ref))
@@ -254,18 +279,18 @@ class ArchivePackage(Package):
                     raise PackageCheckError( self, _("Uknown dict differ {}, reinstalling package").format(dd) )
             log.debug("Files checked")
 
-    def check(self):
+    def check(self, full_verify=False):
         log.debug("Checking package...")
         try:
             log.debug(f"Trying {self.path}")
             self._check_folder()
-            self._check_files()
+            self._check_files(full_verify)
         except PackageCheckError:
             if self.alt_path and self.path != self.alt_path:
                 self.use_alt_path()
                 log.debug(f"Trying {self.path}")
                 self._check_folder()
-                self._check_files()
+                self._check_files(full_verify)
             else:
                 raise
 
@@ -416,11 +441,11 @@ class FolderPackage(Package):
         super().__init__(path)
         self.hlist = hlist
 
-    def _check_files(self):
+    def _check_files(self, full_verify=False):
         if self.hlist is not None:
             log.info(_("Checking files for {}").format(self.path))
             hlist_ref  = fs.HashList.from_file(self.hlist)
-            hlist_dest = fs.HashList.from_path(self.path)
+            hlist_dest = self._hashlist(full_verify)
 
             diff = list(hlist_dest.diff(hlist_ref))
             if len(diff) > 0:
@@ -428,9 +453,9 @@ class FolderPackage(Package):
                                         _("Found differences in files, reinstall."),
                                         diff)
 
-    def check(self):
+    def check(self, full_verify=False):
         self._check_folder()
-        self._check_files()
+        self._check_files(full_verify)
 
 # ┌────────────────────────────────────────┐
 # │ Load from config                       │
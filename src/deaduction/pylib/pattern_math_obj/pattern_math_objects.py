@@ -84,6 +84,8 @@ class PatternMathObject(MathObject):
     __original_bound_vars = None
     __copied_bound_vars = None
 
+    caches_structural_hash = False  # Metavars may be assigned
+
     def __init__(self, node, info, children,
                  math_type=None,
                  imperative_matching=False):
@@ -902,7 +904,9 @@ class MetaVar(PatternMathObject):
 ##################################################
 
 PatternInit.pattern_from_string = PatternMathObject.from_string
-PatternInit.pattern_init()
+# Patterns are computed when first needed, so that app may install
+# PatternInit.snapshots before:
+PatternInit.pattern_init(lazy=True)
 
 
 #########
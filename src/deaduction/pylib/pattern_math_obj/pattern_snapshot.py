@@ -0,0 +1,234 @@
+"""
+##############################################################
+# pattern_snapshot.py : store compiled display patterns      #
+##############################################################
+
+Parsing all the pattern strings of pattern_data.py and app_pattern_data.py
+into PatternMathObjects takes a significant part of start-up time, and is
+done again when a course with specific display data is chosen. This
+module stores the compiled patterns in a pickle snapshot, keyed by a
+digest of the pattern strings (which include the course specific
+constants, and the settings that modify patterns) and of the source files
+of the pattern grammar and of the pickled classes, so that they are
+computed only once.
+
+Snapshots are used once PatternInit.snapshots has been set, which is done
+at app start-up.
+
+Snapshots are built and saved when missing. They may also be built in
+advance by
+    python -m deaduction.pylib.pattern_math_obj.pattern_snapshot [course.lean ...]
+which builds the default snapshot, and the snapshot for each course with
+display metadata.
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import io
+import logging
+import os
+from pathlib import Path
+from sys import version_info
+from typing import Optional
+
+if version_info[1] < 8:
+    import pickle5 as pickle
+else:
+    import pickle
+
+import deaduction.pylib.config.vars as cvars
+from deaduction.pylib.coursedata.ips_store import stable_digest
+from deaduction.pylib.mathobj import MathObject, BoundVar
+import deaduction.pylib.mathobj.math_object as math_object
+from . import pattern_parser, pattern_math_objects
+from .pattern_math_objects import PatternMathObject, MetaVar, POMPOMPOM
+
+log = logging.getLogger(__name__)
+
+# Increment this when the snapshot format changes:
+SNAPSHOT_VERSION = "2"
+
+# Modules whose source determines the patterns and their pickled layout:
+SOURCE_MODULES = (pattern_parser, pattern_math_objects, math_object)
+_sources_digest = None
+
+
+def sources_digest() -> str:
+    """
+    Return a digest of the sources of SOURCE_MODULES, so that a snapshot
+    is not used after the grammar or the classes of patterns have been
+    modified. This is computed only once.
+    """
+    global _sources_digest
+    if _sources_digest is None:
+        sources = []
+        for module in SOURCE_MODULES:
+            try:
+                sources.append(Path(module.__file__).read_text(
+                    encoding='utf-8'))
+            except (OSError, TypeError, UnicodeDecodeError) as error:
+                # No source, e.g. in a frozen app: rely on the version nb
+                log.debug(f"No source for {module.__name__}: {error}")
+                sources.append(module.__name__)
+        _sources_digest = stable_digest(*sources)
+    return _sources_digest
+
+
+def singletons() -> dict:
+    """
+    Objects that are tested by identity, and thus must not be duplicated
+    by unpickling.
+    """
+    return {'NO_MATH_TYPE': MathObject.NO_MATH_TYPE,
+            'PATTERN_NO_MATH_TYPE': PatternMathObject.NO_MATH_TYPE,
+            'POMPOMPOM': POMPOMPOM,
+            'PROP': MathObject.PROP,
+            'NO_MORE_GOALS': MathObject.NO_MORE_GOALS,
+            'CURRENT_GOAL_SOLVED': MathObject.CURRENT_GOAL_SOLVED}
+
+
+class SnapshotPickler(pickle.Pickler):
+    def __init__(self, file):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.singleton_names = {id(obj): name
+                                for name, obj in singletons().items()}
+
+    def persistent_id(self, obj):
+        return self.singleton_names.get(id(obj))
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        return singletons()[pid]
+
+
+class PatternSnapshots:
+    """
+    A directory with one pickle file patterns_<digest>.pkl for each set of
+    pattern strings. Each file contains, for each dict of
+    PatternInit.dic_list_pairs, the list of couples (pattern, metavars)
+    obtained by parsing its keys. Only the max_nb most recently used
+    snapshots are kept.
+    """
+
+    PREFIX = 'patterns_'
+    SUFFIX = '.pkl'
+
+    def __init__(self, directory: Path, max_nb=20):
+        self.directory = directory
+        self.max_nb = max_nb
+
+    @staticmethod
+    def digest(dic_list_pairs) -> str:
+        keys = [list(dict_.keys()) for dict_, list_ in dic_list_pairs]
+        return stable_digest(SNAPSHOT_VERSION,
+                             cvars.get('others.version', ''),
+                             sources_digest(),
+                             repr(keys))
+
+    def path(self, digest: str) -> Path:
+        return self.directory / (self.PREFIX + digest + self.SUFFIX)
+
+    def load(self, digest: str) -> Optional[list]:
+        path = self.path(digest)
+        if not path.exists():
+            return None
+        try:
+            with path.open(mode='rb') as input_:
+                data = SnapshotUnpickler(input_).load()
+            os.utime(path)  # Mark as recently used
+        except Exception as error:
+            # Any error (e.g. classes have changed) just means that the
+            # snapshot should be rebuilt
+            log.warning(f"Unable to load pattern snapshot: {error}")
+            return None
+
+        # Loaded objects have been numbered in another session:
+        MetaVar.metavar_nb = max(MetaVar.metavar_nb, data['metavar_nb'])
+        BoundVar.identifier_nb = max(BoundVar.identifier_nb,
+                                     data['identifier_nb'])
+        return data['patterns']
+
+    def save(self, digest: str, patterns: list):
+        data = {'patterns': patterns,
+                'metavar_nb': MetaVar.metavar_nb,
+                'identifier_nb': BoundVar.identifier_nb}
+        try:
+            buffer = io.BytesIO()
+            SnapshotPickler(buffer).dump(data)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.path(digest)
+            tmp_path = path.with_suffix('.tmp')
+            tmp_path.write_bytes(buffer.getvalue())
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError, RecursionError) as error:
+            log.warning(f"Unable to save pattern snapshot: {error}")
+            return
+        self.evict()
+
+    def evict(self):
+        files = [file for file in self.directory.iterdir()
+                 if file.name.startswith(self.PREFIX)
+                 and file.suffix == self.SUFFIX]
+        files.sort(key=lambda file: file.stat().st_mtime, reverse=True)
+        for file in files[self.max_nb:]:
+            try:
+                file.unlink()
+            except OSError:
+                pass
+
+
+def build_snapshots(course_paths):
+    """
+    Save the default snapshot, and the snapshot of each course with
+    display metadata.
+    """
+    from copy import deepcopy
+    import deaduction.pylib.config.dirs as cdirs
+    from deaduction.pylib.coursedata import Course
+    from deaduction.pylib.math_display import PatternInit
+    from deaduction.pylib.math_display import app_pattern_data
+
+    PatternInit.snapshots = PatternSnapshots(cdirs.pattern_snapshots_dir)
+    default_tables = (deepcopy(app_pattern_data.latex_from_constant_name),
+                      deepcopy(app_pattern_data.latex_from_app_pattern))
+    PatternInit.pattern_init()
+    for course_path in course_paths:
+        course = Course.from_file(Path(course_path))
+        display_constant = course.metadata.get('display')
+        if display_constant:
+            # Start from default tables, as when the course is chosen
+            for table, default in zip((app_pattern_data.latex_from_constant_name,
+                                       app_pattern_data.latex_from_app_pattern),
+                                      default_tables):
+                table.clear()
+                table.update(default)
+            PatternInit.pattern_init(display_constant)
+            log.info(f"Snapshot built for {course_path}")
+
+
+if __name__ == '__main__':
+    import sys
+    import deaduction.pylib.config.dirs as cdirs
+    cdirs.init()
+    build_snapshots(sys.argv[1:])
@@ -8,17 +8,12 @@ sending them to Lean one by one to get their initial proof_state.
 Each initial proof state is stored in the statement.initial_proof_state
 attribute.
 
-The resulting course is stored in a '.pkl' file in the same directory
-
-If the corresponding '.pkl' file already exists, then
-- if the file_content was different, just erase the '.pkl' file
-- if not, read the stored course and keep the initial proof_states
-that are already stored there.
-
-Every 5 processed statements, Lean server is stopped and started again.
-This prevents the Lean server from crashing because of messages of length
-> 65535. The resulting course with partial pre-processing is also stored,
-to take into account the possibility of a crash.
+The resulting initial proof states are saved in the course's
+InitialProofStateStore (one file per statement, keyed by a stable digest of
+the statement's Lean text and context), so that statements that have
+already been processed are not processed again. New initial proof states
+are saved every 100 processed statements, to take into account the
+possibility of a crash.
 
 In practice, the software seldom succeeds in processing the whole content.
 As said before, however, the statements that have already been processed are
@@ -28,6 +23,11 @@ patient...
 Finally the programme prints all statements, so this can also be used to get
 the list of all statements in a given Lean (or pkl) course file.
 
+With option --jobs N, statements of all courses are processed in parallel
+by N Lean servers, each one in its own process (see batch.py), and initial
+proof states are saved in the courses' initial proof states stores. Timings
+are reported at the end.
+
 Author(s)      : - Frédéric Le Roux <frederic.le_roux@imj-prg.fr>
 
 Maintainers(s) : - Frédéric Le Roux <frederic.le_roux@imj-prg.fr>
@@ -77,75 +77,49 @@ from deaduction.pylib.coursedata import (Course,
 from deaduction.pylib import logger
 from deaduction.pylib.server import ServerInterface
 from deaduction.pylib.pre_processing import ServerInterfaceAllStatements
+from deaduction.pylib.pre_processing.batch import BatchProcessor
 
 
 log = logging.getLogger(__name__)
 
 arg_parser = argparse.ArgumentParser("Start deaduction pre-processing to "
-                                     "turn '.lean' files into '.pkl'")
+                                     "store initial proof states of "
+                                     "'.lean' files")
 arg_parser.add_argument('--directory', '-d', help="Path for directory")
 arg_parser.add_argument('--course', '-c', help="Course filename")
+arg_parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help="Number of Lean servers for batch processing")
 
 def check_statements(course):
     """
-    Check every statement of course for initial_proof_state attribute
+    Check every statement of course for initial_proof_state attribute,
+    loading them from the course's InitialProofStateStore.
 
     :param course: Course
 
-    :return:    1) a Course instance, with some preprocessed statement
-            (if a pkl file have been found with the good file content)
-                2) list of statements without initial_proof_state attribute
-                3) path for pkl version of the course (whether the file exists
-                or not)
+    :return:    list of statements without initial_proof_state attribute
     """
-    # get course_path relative to cwd
-    # (cwd is set be src/deaduction by config.py)
-    relative_course_path = course.relative_course_path
-    directory_name = relative_course_path.parent
-    course_hash = hash(course.file_content)
-
-    # search for pkl file, and compare contents
-    # so that only unprocessed statements will be processed
+    course.load_initial_proof_states()
     unprocessed_statements = []
-    filename = relative_course_path.stem + '.pkl'
-    course_pkl_path = directory_name.joinpath(Path(filename))
-    log.debug(f"Checking for {course_pkl_path}")
-    if course_pkl_path.exists():
-        [stored_course] = pickled_items(course_pkl_path)
-        stored_hash = hash(stored_course.file_content)
-        log.debug(f"Found '.pkl' file, hash = {stored_hash} vs {course_hash}")
-        if stored_hash == course_hash:
-            # log.info("pkl content file is up to date")
-            # we want the statements already processed to be conserved:
-            course = stored_course
-            for statement in course.statements:
-                name = statement.pretty_name
-                if hasattr(statement, 'initial_proof_state') \
-                        and statement.initial_proof_state is not None:
-                    log.info(f"found initial_proof_state for {name}")
-                else:
-                    unprocessed_statements.append(statement)
-                    log.info(f"NO initial_proof_state for {name}")
+    for statement in course.statements:
+        name = statement.pretty_name
+        if statement.initial_proof_state is not None:
+            log.info(f"found initial_proof_state for {name}")
         else:
-            log.info(f"pkl content file is NOT up to date: "
-                     f"course hash ={course_hash}")
-            unprocessed_statements = course.statements
-    else:
-        log.debug("File '.pkl' does not exist")
-        unprocessed_statements = course.statements
-    return course, unprocessed_statements, course_pkl_path
+            unprocessed_statements.append(statement)
+            log.info(f"NO initial_proof_state for {name}")
+    return unprocessed_statements
 
 
 async def get_all_proof_states(servint,
                                course,
-                               statements_to_process,
-                               course_pkl_path):
+                               statements_to_process):
     """
     for each statement to process,
         initialize servint with the statement,
         get initial proof_state,
         store it as a statement attribute
-    Save the course in the course_pkl_path every 5 statements
+    Save new initial proof states in the course's store every 100 statements
     """
     counter = 0
     for statement in statements_to_process:
@@ -157,25 +131,9 @@ async def get_all_proof_states(servint,
                  f"°{counter}")
         statement.initial_proof_state = servint.proof_state
 
-        # stop and restart server every 5 exercises to avoid
-        # too long messages that entail crashing
         if (counter % 100) == 0:
-            # servint.stop()
-            log.info("Saving temporary file...")
-            save_objects([course], course_pkl_path)
-            # await servint.start()
-            # await servint.exercise_set(statement)
-            # # proof_state is now stored as servint.proof_state
-            # log.info(f"Got proof state of statement "
-            #          f"{statement.pretty_name}, n"
-            #          f"°{counter}")
-            # statement.initial_proof_state = servint.proof_state
-
-
-def save_objects(objects: list, filename):
-    with filename.open(mode='wb') as output:  # Overwrites any existing file
-        for obj in objects:
-            pickle.dump(obj, output, pickle.HIGHEST_PROTOCOL)
+            log.info("Saving initial proof states...")
+            course.save_initial_proof_states()
 
 
 def pickled_items(filename):
@@ -188,19 +146,6 @@ def pickled_items(filename):
                 break
 
 
-def read_data(filename):
-    print("Reading file:")
-    [stored_course] = pickled_items(filename)
-
-    # print("Text version ? (t)")
-    # answer = input()
-    # if answer == 't':
-    #     print_text_version(stored_course)
-    # else:
-    #     print_goal(stored_course)
-    print_goal(stored_course)
-
-
 def print_text_version(course):
     counter = 0
     for st in course.statements:
@@ -293,7 +238,7 @@ def select_course(course_path=None) -> Course:
     return course
 
 
-def coex_from_argv() -> (Optional[Path], Course, Exercise, bool):
+def coex_from_argv() -> (Optional[Path], Course):
     """
     Try to build Course and Exercise object from arguments.
     """
@@ -335,14 +280,13 @@ async def main():
 
     # Process each course
     for course in courses:
-        # Check for pkl file and, if it exists, find all unprocessed statements
-        course, unprocessed_statements, course_pkl_path \
-            = check_statements(course)
+        # Find all unprocessed statements
+        unprocessed_statements = check_statements(course)
 
         if not unprocessed_statements:
-            log.info("pkl fle is up_to_date with all initial_proof_states")
+            log.info("Store is up_to_date with all initial_proof_states")
             # Checking
-            read_data(course_pkl_path)
+            print_goal(course)
             continue
         else:
             log.info(f"Still {len(unprocessed_statements)} "
@@ -367,17 +311,15 @@ async def main():
                 log.info("Pre-processing course...")
                 await get_all_proof_states(servint,
                                            course,
-                                           unprocessed_statements,
-                                           course_pkl_path
-                                           )
+                                           unprocessed_statements)
             except UnicodeDecodeError:
                 log.error("UnicodeDecodeError")
             finally:
                 servint.stop()  # Good job, buddy
-                save_objects([course], course_pkl_path)
+                course.save_initial_proof_states()
 
             # Checking
-            read_data(course_pkl_path)
+            print_goal(course)
 
 
 async def main_alt():
@@ -410,25 +352,41 @@ async def main_alt():
             servint.stop()
 
         log.debug("Got all proof states, saving")
-        # Save pkl course file
-        relative_course_path = course.relative_course_path
-        directory_name = relative_course_path.parent
-        course_hash = hash(course.file_content)
-
-        # search for pkl file, and compare contents
-        # so that only unprocessed statements will be processed
-        unprocessed_statements = []
-        filename = relative_course_path.stem + '.pkl'
-        course_pkl_path = directory_name.joinpath(Path(filename))
-
-        save_objects([course], course_pkl_path)
+        course.save_initial_proof_states()
 
         print("===================================")
         print_goal(course)
 
 
+async def main_batch(nb_servers: int):
+    """
+    Process all statements of courses with nb_servers Lean servers in
+    parallel, and save initial proof states in the courses' stores.
+    """
+
+    cenv.init()
+    cdirs.init()
+    inst.init()
+
+    dir_, course = coex_from_argv()
+    if dir_:
+        courses = get_courses_from_dir(dir_)
+    elif course:
+        courses = [course]
+    else:
+        courses = [select_course()]
+
+    processor = BatchProcessor(courses, nb_servers=nb_servers)
+    await processor.run()
+    print(processor.report())
+
+
 if __name__ == '__main__':
     logger.configure(domains=['ServerInterface', '__main__'])
     log.debug("starting pre-processing...")
-    qtrio.run(main_alt)
+    jobs = arg_parser.parse_args(argv[1:]).jobs
+    if jobs:
+        qtrio.run(main_batch, jobs)
+    else:
+        qtrio.run(main_alt)
 
@@ -0,0 +1,218 @@
+"""
+###########################################################
+# batch.py: pre-process courses with several Lean servers #
+###########################################################
+
+Statements of all courses are split into chunks, which are processed in
+parallel by nb_servers worker processes, each one with its own
+ServerInterface and Lean server. Each worker takes a new chunk as soon as
+it is done with the previous one, so that the load is balanced between
+servers. Workers are separate processes since MathObject's registers
+(Variables, constants, parsed entries) are class attributes keyed by the
+"_fresh.N.M" identifiers of one Lean process, which collide between Lean
+processes.
+Initial proof states are saved in the courses' stores after each chunk,
+one file per statement, so that a crash does not lose the work already
+done, and workers never write the same file.
+
+Author(s):      - Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+
+Maintainers(s): - Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+
+Date: October 2026
+
+Copyright (c) 2026 the dEAduction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with d∃∀duction. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import logging
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import qtrio
+import trio
+
+import deaduction.pylib.config.i18n
+import deaduction.pylib.config.dirs              as     cdirs
+import deaduction.pylib.config.environ           as     cenv
+import deaduction.pylib.config.site_installation as     inst
+from deaduction.pylib.coursedata import Course
+from deaduction.pylib.server import ServerInterface
+
+log = logging.getLogger(__name__)
+
+# (course file name, lean_name) of a statement:
+StatementKey = Tuple[str, str]
+
+
+def chunks(course: Course, statements: list, chunk_size: int) -> list:
+    """
+    Split statements into list of (course, sub-list of statements) of
+    length ≤ chunk_size, keeping Lean file order.
+    """
+    return [(course, statements[index:index+chunk_size])
+            for index in range(0, len(statements), chunk_size)]
+
+
+def statement_key(course: Course, statement) -> StatementKey:
+    return course.course_file_name, statement.lean_name
+
+
+class BatchProcessor:
+    """
+    Process the initial proof states of a list of courses with nb_servers
+    Lean servers.
+    After self.run(), self.timings is a dict
+        (course file name, lean_name)
+            -> (duration of the request, nb of statements in request)
+    and self.failed is the list of (course file name, lean_name) of the
+    statements that could not be processed.
+    """
+
+    def __init__(self, courses: List[Course], nb_servers=2,
+                 chunk_size=ServerInterface.MAX_CAPACITY):
+        self.courses = courses
+        self.nb_servers = nb_servers
+        self.chunk_size = chunk_size
+        self.timings: Dict[StatementKey, tuple] = dict()
+        self.failed: List[StatementKey] = []
+
+    def work_items(self) -> list:
+        items = []
+        for course in self.courses:
+            course.load_initial_proof_states()
+            statements = [st for st in course.statements
+                          if not st.initial_proof_state]
+            log.info(f"{course.course_file_name}: {len(statements)} "
+                     f"statement(s) to process")
+            items.extend(chunks(course, statements, self.chunk_size))
+        return items
+
+    async def process(self, number, items: Iterator):
+        """
+        Process items, i.e. couples (course, statements), with a single
+        Lean server.
+        """
+        async with trio.open_nursery() as nursery:
+            servint = ServerInterface(nursery)
+            await servint.start()
+            log.info(f"Lean server #{number} started")
+            for course, statements in items:
+                start_time = time()
+                servint.set_statements(course, statements)
+                await servint.server_queue.queue_ended.wait()
+                duration = time() - start_time
+                for st in statements:
+                    key = statement_key(course, st)
+                    if st.computed_initial_proof_state:
+                        self.timings[key] = (duration, len(statements))
+                    else:
+                        self.failed.append(key)
+                course.save_initial_proof_states()
+            servint.stop()
+            log.info(f"Lean server #{number} stopped")
+            nursery.cancel_scope.cancel()
+
+    async def run(self):
+        items = self.work_items()
+        if not items:
+            return
+        nb_servers = min(self.nb_servers, len(items))
+        start_time = time()
+        if nb_servers == 1:
+            await self.process(0, iter(items))
+        else:
+            await trio.to_thread.run_sync(self.run_in_processes,
+                                          items, nb_servers)
+        log.info(f"{len(self.timings)} statement(s) processed with "
+                 f"{nb_servers} Lean server(s) in {time() - start_time:.1f}s")
+
+    def run_in_processes(self, items, nb_servers):
+        """
+        Put items in a queue shared by nb_servers worker processes, and
+        collect their timings and failures.
+        """
+        context = multiprocessing.get_context('spawn')
+        with context.Manager() as manager:
+            items_queue = manager.Queue()
+            for course, statements in items:
+                items_queue.put((str(course.abs_course_path),
+                                 [st.lean_name for st in statements]))
+            with ProcessPoolExecutor(max_workers=nb_servers,
+                                     mp_context=context) as executor:
+                futures = [executor.submit(process_in_worker, number,
+                                           items_queue, self.chunk_size)
+                           for number in range(nb_servers)]
+                for future in futures:
+                    timings, failed = future.result()
+                    self.timings.update(timings)
+                    self.failed.extend(failed)
+
+    def report(self, nb=20) -> str:
+        """
+        Return a text with the nb slowest statements, and failures.
+        """
+        lines = ["Slowest statements (request duration / nb of statements):"]
+        slowest = sorted(self.timings.items(),
+                         key=lambda item: item[1][0]/item[1][1],
+                         reverse=True)
+        for (course_name, lean_name), (duration, nb_st) in slowest[:nb]:
+            lines.append(f"    {duration/nb_st:6.2f}s  {lean_name} "
+                         f"[{course_name}] ({duration:.2f}s / {nb_st})")
+        if self.failed:
+            lines.append(f"{len(self.failed)} statement(s) failed:")
+            lines.extend(f"    {lean_name} [{course_name}]"
+                         for course_name, lean_name in self.failed)
+        return "\n".join(lines)
+
+
+def worker_items(items_queue, courses: Dict[str, Course]) -> Iterator:
+    """
+    Yield (course, statements) from the items of items_queue, which are
+    couples (course path, lean_names), until the queue is empty.
+    """
+    while True:
+        try:
+            course_path, lean_names = items_queue.get_nowait()
+        except queue.Empty:
+            return
+        course: Optional[Course] = courses.get(course_path)
+        if not course:
+            course = Course.from_file(Path(course_path))
+            course.load_initial_proof_states()
+            courses[course_path] = course
+        lean_names = set(lean_names)
+        yield course, [st for st in course.statements
+                       if st.lean_name in lean_names]
+
+
+def process_in_worker(number, items_queue, chunk_size) -> tuple:
+    """
+    Entry point of worker processes: process items of items_queue with a
+    single Lean server, and return timings and failures.
+    """
+    cenv.init()
+    cdirs.init()
+    inst.init()
+    processor = BatchProcessor([], nb_servers=1, chunk_size=chunk_size)
+    qtrio.run(processor.process, number,
+              worker_items(items_queue, dict()))
+    return processor.timings, processor.failed
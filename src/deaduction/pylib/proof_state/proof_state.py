@@ -30,9 +30,10 @@ This file is part of dEAduction.
     with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+from bisect import bisect_left
 from dataclasses import dataclass
 import logging
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
 from copy import copy
 
 import deaduction.pylib.logger as logger
@@ -40,8 +41,8 @@ import deaduction.pylib.config.vars as cvars
 
 from deaduction.pylib.mathobj.math_object import MathObject, BoundVar
 from deaduction.pylib.mathobj.context_math_object import ContextMathObject
-from deaduction.pylib.mathobj.lean_analysis import (lean_expr_with_type_grammar,
-                                                    LeanEntryVisitor)
+from deaduction.pylib.mathobj.lean_analysis import (lean_entries,
+                                                    parse_lean_entry)
 # from deaduction.pylib.math_display import plurals, numbers
 from deaduction.pylib.utils import inj_list
 from deaduction.pylib.give_name.name_hint import NameHint
@@ -60,6 +61,54 @@ DEBUG = False
 # numbers = MathDisplay.numbers
 
 
+@dataclass
+class ContextDiff:
+    """
+    The minimal edit script from the context of a goal to the context of
+    the next goal, as computed by Goal.compare(). Lists are in the (display)
+    order of the new context, except for removed objects which are in the
+    order of the old context.
+    - added: objects of the new context that were not in the old context,
+    - removed: objects of the old context that are not in the new context,
+    - modified: objects of the new context whose math_type has changed,
+    - permuted: objects of the new context that Lean has moved, i.e. a
+    minimal list of objects whose removal leaves the other ones in the order
+    of the old context.
+    """
+    added: List[ContextMathObject]
+    removed: List[ContextMathObject]
+    modified: List[ContextMathObject]
+    permuted: List[ContextMathObject]
+
+
+def longest_increasing_subsequence(seq: List[int]) -> List[int]:
+    """
+    Return the indices in seq of a longest increasing subsequence.
+    """
+    # tails[k] = index in seq of the smallest tail of an increasing
+    # subsequence of length k+1
+    tails = []
+    tail_values = []
+    previous = [None] * len(seq)
+    for index, value in enumerate(seq):
+        length = bisect_left(tail_values, value)
+        if length > 0:
+            previous[index] = tails[length - 1]
+        if length == len(tails):
+            tails.append(index)
+            tail_values.append(value)
+        else:
+            tails[length] = index
+            tail_values[length] = value
+
+    indices = []
+    index = tails[-1] if tails else None
+    while index is not None:
+        indices.append(index)
+        index = previous[index]
+    return indices[::-1]
+
+
 ##################
 # The Goal class #
 ##################
@@ -94,6 +143,11 @@ class Goal:
         unmodified_context is used for Lean communication.
     """
 
+    # id(prop) -> (prop, bound var chains, bound vars), cf bound_var_data():
+    _bound_var_data: Optional[dict] = None
+    # Set by compare():
+    context_diff: Optional[ContextDiff] = None
+
     def __init__(self, context: [ContextMathObject], target: ContextMathObject):
         self._context = context
         self.unmodified_context = context
@@ -101,6 +155,15 @@ class Goal:
         self.name_hints = []
         # self.smart_name_bound_vars()
 
+    def __getstate__(self):
+        """
+        Do not pickle (or deepcopy) cached bound var data, which are
+        indexed by ids of MathObjects.
+        """
+        state = self.__dict__.copy()
+        state.pop('_bound_var_data', None)
+        return state
+
     @classmethod
     def from_lean_data(cls, hypo_analysis: str, target_analysis: str,
                        to_prove=False):
@@ -119,22 +182,17 @@ class Goal:
         log.info("creating new Goal from lean strings")
         # log.debug(hypo_analysis)
         # log.debug(target_analysis)
-        lines = hypo_analysis.split("¿¿¿")
-        # Put back "¿¿¿" and remove '\n', getting rid of the title line
-        # ("context:")
-        lines = ['¿¿¿' + item.replace('\n', '') for item in lines[1:]]
         context: [ContextMathObject] = []
-        for math_obj_string in lines:
+        for math_obj_string in lean_entries(hypo_analysis):
             if math_obj_string.startswith("context:"):
                 continue
             else:
                 # Applying the parser
-                tree = lean_expr_with_type_grammar.parse(math_obj_string)
-                math_object: ContextMathObject = LeanEntryVisitor().visit(tree)
+                math_object: ContextMathObject = \
+                    parse_lean_entry(math_obj_string)
                 context.append(math_object)
 
-        tree = lean_expr_with_type_grammar.parse(target_analysis)
-        target = LeanEntryVisitor().visit(tree)
+        target = parse_lean_entry(target_analysis)
         new_goal = cls(context, target)
         ####################################################################
         # Name bound vars, except for current exercise because we wait for #
@@ -225,6 +283,9 @@ class Goal:
         no parent.
         """
         if self.context is not None:
+            if self.context_diff is not None:
+                return [cmo for cmo in self.context_diff.added
+                        if not cmo.is_hidden]
             return [cmo for cmo in self.context if cmo.is_new]
 
     @property
@@ -252,6 +313,9 @@ class Goal:
         no parent.
         """
         if self.context is not None:
+            if self.context_diff is not None:
+                return [cmo for cmo in self.context_diff.modified
+                        if not cmo.is_hidden]
             return [cmo for cmo in self.context if cmo.is_modified]
 
     @property
@@ -362,7 +426,8 @@ class Goal:
         :param self:        new goal
         :param old_goal:    old goal
 
-        :return: no direct return, but
+        :return: the ContextDiff from old_goal to self, which is also
+        stored in self.context_diff. Moreover,
             - the context is permuted (see the Goal class documentation)
             - objects of the context are linked to objects of the previous
             context via the parent/child attribute.
@@ -370,8 +435,8 @@ class Goal:
 
         old_goal: Goal
         new_goal = self
-        new_context = new_goal.unmodified_context.copy()
-        old_context = old_goal.unmodified_context.copy()
+        new_context = new_goal.unmodified_context
+        old_context = old_goal.unmodified_context
         # Permuted_new_context will contain the new_context in the order
         # reflecting that of the old_context
         # Each new item that is found in the old_context will be affected at
@@ -381,44 +446,65 @@ class Goal:
         permuted_new_context = [None] * len(old_context)
 
         log.info("Comparing and tagging old goal and new goal")
-        # log.debug(old_context)
-        # log.debug(new_context)
-        old_names = [math_object_old.info["name"]
-                     for math_object_old in old_context]
+        # name -> indices of old objects with this name, not yet matched
+        old_indices = dict()
+        for index, math_object_old in enumerate(old_context):
+            old_indices.setdefault(math_object_old.info["name"],
+                                   []).append(index)
+
+        added = []
+        kept = []  # (old index, object) for objects in both contexts
         for math_object in new_context:
             name = math_object.info["name"]
 
             # (1) Search old_context for an object with the same name
-            try:
-                old_index = old_names.index(name)
-            except ValueError:
+            indices = old_indices.get(name)
+            if not indices:
                 # (2) If no such object then object is new
-                old_index = None
                 # New objects at the end
                 permuted_new_context.append(math_object)
+                added.append(math_object)
             else:
                 # Put new object at old index, copy tags for ui,
                 #  and link to parent object
+                # (it will not be considered anymore)
+                old_index = indices.pop(0)
                 old_object = old_context[old_index]
                 permuted_new_context[old_index] = math_object
                 math_object.copy_tags(old_object)
                 math_object.parent_context_math_object = old_object
                 old_object.child_context_math_object = math_object
-                # (3) Reveal if modified(?)
-                if old_object.math_type != math_object.math_type:
+                # (3) Reveal if modified
+                # (MathObject.__eq__ first compares structural hashes)
+                is_modified = old_object.math_type != math_object.math_type
+                math_object.is_modified_ = is_modified
+                if is_modified:
                     math_object.is_hidden = False
+                kept.append((old_index, math_object))
 
-            if old_index is not None:
-                # Will not be considered anymore:
-                old_names[old_index]   = None
-                old_context[old_index] = None
+        # (4) Objects moved by Lean, i.e. not in a longest subsequence of
+        # kept objects that are in the old order
+        in_order = set(longest_increasing_subsequence(
+            [old_index for old_index, _ in kept]))
+        moved = {old_index for index, (old_index, _) in enumerate(kept)
+                 if index not in in_order}
 
         # (5) Remove 'None' entries
+        removed = [old_object for old_object, math_object
+                   in zip(old_context, permuted_new_context)
+                   if math_object is None]
         clean_permuted_new_context = [item for item in permuted_new_context
                                       if item is not None]
 
         # (6) Finally, modify order and set tags
         self.context = clean_permuted_new_context
+        kept.sort(key=lambda item: item[0])  # Display order
+        modified = [math_object for _, math_object in kept
+                    if math_object.is_modified_]
+        permuted = [math_object for old_index, math_object in kept
+                    if old_index in moved]
+        self.context_diff = ContextDiff(added=added, removed=removed,
+                                        modified=modified, permuted=permuted)
 
         # (7) Compare targets:
         old_target = old_goal.target.math_type
@@ -426,6 +512,8 @@ class Goal:
         if new_target == old_target:
             new_goal.target.parent_context_math_object = old_goal.target
 
+        return self.context_diff
+
 #############################
 # Bound vars naming methods #
 #############################
@@ -444,6 +532,11 @@ class Goal:
         Return all bound variables of context and target of a given type.
         Each variable should appear exactly once.
         """
+        if math_type is None:
+            props = ([mo.math_type for mo in self.context_props]
+                     + [self.target.math_type])
+            return sum([self.bound_var_data(prop)[1] for prop in props], [])
+
         c_vars = sum([mo.math_type.bound_vars(math_type=math_type)
                       for mo in self.context_props], [])
         t_vars = self.target.math_type.bound_vars(math_type=math_type)
@@ -471,6 +564,29 @@ class Goal:
         """
         return [cmo.display_name for cmo in self.free_variables(math_type)]
 
+    def free_var_names_by_type(self) -> Optional[dict]:
+        """
+        Return a dict math_type -> free_var_names(math_type) for all
+        math_types of context vars, computed in one pass over the context
+        (this relies on MathObject's structural hash). Return None if some
+        math_type contains NO_MATH_TYPE, which is not correctly hashed.
+        """
+        names_by_type = dict()
+        for var in self.free_variables():
+            if var.math_type.structural_hash() is None:
+                return None
+            names_by_type.setdefault(var.math_type,
+                                     []).append(var.display_name)
+        return names_by_type
+
+    def friend_names(self, math_type, names_by_type: Optional[dict]) -> list:
+        """
+        Return free_var_names(math_type), using names_by_type if possible.
+        """
+        if names_by_type is None or math_type.structural_hash() is None:
+            return self.free_var_names(math_type)
+        return names_by_type.get(math_type, [])
+
     def potential_math_types(self):
         """
         Return the elements of context that can serve as types.
@@ -504,6 +620,7 @@ class Goal:
         """
         Create NameHints for all math_types of context vars.
         """
+        names_by_type = self.free_var_names_by_type()
         for var in self.free_variables():
             math_type = var.math_type
             if math_type.is_number():
@@ -511,7 +628,7 @@ class Goal:
                 friendly_names = []
             else:
                 preferred_letter = ''
-                friendly_names = self.free_var_names(math_type)
+                friendly_names = self.friend_names(math_type, names_by_type)
             # Add new name hint if none match:
             NameHint.from_math_type(math_type, preferred_letter,
                                     self.name_hints, friendly_names)
@@ -562,75 +679,109 @@ class Goal:
 ########################
 # Build Naming Schemes #
 ########################
-    def _recursive_bound_vars_length(self, math_obj: MathObject,
-                                     include_sequences=True, 
-                                     hint: NameHint = None):
-        """
-        Compute the maximal length of a chain of bound vars of the given
-        types. On other words, this is the maximal nb of distinct bound vars
-        of this type that live in the same local context.
-        The principle of the computation is that if self has bound var then
-        this bound var occurs in the local context of all self's children.
+    @staticmethod
+    def _recursive_bound_var_chains(math_obj: MathObject,
+                                    include_sequences=True) -> set:
+        """
+        Compute the chains of bound vars of math_obj. A chain counts the
+        bound vars along a branch of math_obj's tree, i.e. bound vars that
+        live in the same local context. It is a frozenset of items
+            ((bound var type, preferred letter), nb of such bound vars).
+        The principle of the computation is that if math_obj has bound var
+        then this bound var occurs in the local context of all its children.
         This algo follows MathObject.bound_vars().
-        This method is crucial, overestimating or underestimating the number
-        of vars to be named with a given NameHint.names() method would lead to
-        bad naming!
         """
 
-        math_type = hint.math_type
-        # preferred_letter = hint.preferred_letter
-        preferred_letters = hint.current_preferred_letters()
-        local_length = 0
-
         # (0) Special case: if u_n then do not count u's bound var used for
         # display in (u_n)_{n in N}
         if math_obj.is_app_of_local_constant():
-            return 0
-
-        # (1) Self's has direct bound var?
-        if math_obj.has_bound_var():
-            var = math_obj.bound_var
-            typ = math_obj.bound_var_type
-            letter = var.preferred_letter()
-            if include_sequences or \
-                    not (math_obj.is_sequence(is_math_type=True)
-                         or math_obj.is_set_family(is_math_type=True)):
-                if (not math_type) or \
-                    (typ == math_type and
-                        (not letter or letter in preferred_letters)):
-                    local_length = 1
-
-        # (2) Children's vars:
-        child_length = [self._recursive_bound_vars_length(child,
-                                                          include_sequences,
-                                                          hint)
-                        for child in math_obj.children]
-        return local_length + max(child_length + [0])
-
-    def max_local_length(self, hint):
+            return set()
+
+        # (1) Children's chains:
+        chains = set()
+        for child in math_obj.children:
+            chains.update(Goal._recursive_bound_var_chains(child,
+                                                           include_sequences))
+        if not chains:
+            chains = {frozenset()}
+
+        # (2) Add self's direct bound var, if any
+        if math_obj.has_bound_var() and \
+                (include_sequences or
+                 not (math_obj.is_sequence(is_math_type=True)
+                      or math_obj.is_set_family(is_math_type=True))):
+            key = (math_obj.bound_var_type,
+                   math_obj.bound_var.preferred_letter())
+            new_chains = set()
+            for chain in chains:
+                counts = dict(chain)
+                counts[key] = counts.get(key, 0) + 1
+                new_chains.add(frozenset(counts.items()))
+            chains = new_chains
+
+        return chains
+
+    def bound_var_data(self, prop: MathObject) -> tuple:
+        """
+        Return (chains, bound vars) for prop, a math_type of a context prop
+        or of the target. chains is computed by _recursive_bound_var_chains(),
+        and bound vars by MathObject.bound_vars(). These are computed only
+        once, and then
+        cached for subsequent calls (e.g. when smart_name_bound_vars() is
+        called again by the Coordinator).
+        """
+        if self._bound_var_data is None:
+            self._bound_var_data = dict()
+
+        cached = self._bound_var_data.get(id(prop))
+        if cached is None or cached[0] is not prop:
+            chains = self._recursive_bound_var_chains(prop,
+                                                      include_sequences=True)
+            cached = (prop, chains, prop.bound_vars())
+            self._bound_var_data[id(prop)] = cached
+        return cached[1:]
+
+    def bound_var_chains(self) -> set:
+        """
+        Return the chains of bound vars of all context props and target,
+        cf _recursive_bound_var_chains().
         """
-        Compute the nb of distinct vars which fits the given hint that may occur
-        simultaneously in a local context. Fitting hint means having the same
-        math_type and same preferred_letter if any.
-        """
-        # context_length = len(self.free_variables(math_type))
-
         props = ([prop.math_type for prop in self.context_props]
                  + [self.target.math_type])
-        local_context_length = []
+        all_chains = set()
         for prop in props:
-            local_context_length.append(self._recursive_bound_vars_length(
-                                        math_obj=prop,
-                                        include_sequences=True,
-                                        hint=hint))
+            all_chains.update(self.bound_var_data(prop)[0])
+        return all_chains
 
-        if DEBUG:
-            # print(f"BVs: {[p.bound_vars() for p in props]}")
-            print(f"Local context length for hint {hint.math_type}, "
-                  f"pref letter = {hint.preferred_letter}:"
-                  f" {local_context_length}")
+    def max_local_length(self, hint, chains=None):
+        """
+        Compute the nb of distinct vars which fits the given hint that may occur
+        simultaneously in a local context. Fitting hint means having the same
+        math_type and same preferred_letter if any.
+        This method is crucial, overestimating or underestimating the number
+        of vars to be named with a given NameHint.names() method would lead to
+        bad naming!
+        """
+        if chains is None:
+            chains = self.bound_var_chains()
 
-        length = max(local_context_length + [0])
+        math_type = hint.math_type
+        preferred_letters = hint.current_preferred_letters()
+        fits = dict()  # (type, letter) -> bool
+        length = 0
+        for chain in chains:
+            chain_length = 0
+            for key, nb in chain:
+                fit = fits.get(key)
+                if fit is None:
+                    typ, letter = key
+                    fit = ((not math_type) or
+                           (typ == math_type and
+                            (not letter or letter in preferred_letters)))
+                    fits[key] = fit
+                if fit:
+                    chain_length += nb
+            length = max(length, chain_length)
 
         if length > 0:
             log.debug(f"Bound vars length of {hint.math_type, hint.letter}:"
@@ -651,14 +802,16 @@ class Goal:
 
         all_names = set(self.free_var_names())
         hint_letters = {hint.letter for hint in self.name_hints}
+        chains = self.bound_var_chains()
+        names_by_type = self.free_var_names_by_type()
         for hint in self.name_hints:
             math_type = hint.math_type
-            length = self.max_local_length(hint)
+            length = self.max_local_length(hint, chains)
             if math_type == supp_math_type:
                 length += supp_nb
             if length == 0:
                 length = 1
-            friend_names = set(self.free_var_names(math_type=math_type))
+            friend_names = set(self.friend_names(math_type, names_by_type))
             # Experimental: exclude other hint letters
             bad_letters = hint_letters.difference({hint.letter})
             bad_names = all_names.union(bad_letters)
@@ -806,6 +959,18 @@ class Goal:
         print(f'Target: {self.target.math_type}')
         self.print_hints()
 
+    def __name_bound_vars_of_prop(self, prop: MathObject):
+        """
+        Set local context and name all bound vars of prop, unless they are
+        all already named (e.g. when self has already been named, and
+        smart_name_bound_vars() is called again).
+        """
+        bound_vars = self.bound_var_data(prop)[1]
+        if all(not var.is_unnamed for var in bound_vars):
+            return
+        prop.set_local_context()
+        self.recursive_name_all_bound_vars(prop)
+
     def smart_name_bound_vars(self):
         """
         This method should be called each time a new goal is instantiated,
@@ -829,15 +994,13 @@ class Goal:
         # (3) Name bound vars in target
         if DEBUG:
             print(f"Naming BV in target...")
-        self.target.math_type.set_local_context()
-        self.recursive_name_all_bound_vars(self.target.math_type)
-                
+        self.__name_bound_vars_of_prop(self.target.math_type)
+
         # (4) Name bound vars in context props:
         for p in self.context_props:
             if DEBUG:
                 print(f"Naming BV in {p}...")
-            p.math_type.set_local_context()
-            self.recursive_name_all_bound_vars(p.math_type)
+            self.__name_bound_vars_of_prop(p.math_type)
 
         # (5) Debug
         # self.debug()
@@ -1250,6 +1413,9 @@ class ProofState:
             #     goals.append(other_goal)
             new_goals = [Goal.from_lean_data(hypo, target, to_prove=to_prove)
                          for hypo, target in zip(hypo_analysis, targets)]
+            log.debug(f"Lean entries cache: "
+                      f"{MathObject.parsed_entries.stats()}")
+            log.debug(f"Display cache: {MathObject.display_cache.stats()}")
 
             if previous_proof_state:
                 goals = new_goals + previous_proof_state.goals[1:]
@@ -419,6 +419,7 @@ class ProofStep:
     @has_solved_one_goal.setter
     def has_solved_one_goal(self, yes: bool):
         self._has_solved_one_goal = yes
+        self.__status_changed()
 
     @property
     def children_goal_nodes(self):
@@ -427,6 +428,15 @@ class ProofStep:
     @children_goal_nodes.setter
     def children_goal_nodes(self, goal_nodes):
         self._children_goal_nodes = goal_nodes
+        self.__status_changed()
+
+    def __status_changed(self):
+        """
+        Tell parent_goal_node that the cached status of the proof tree
+        under it is obsolete.
+        """
+        if self._parent_goal_node is not None:
+            self._parent_goal_node.status_changed()
 
     @property
     def parent_goal_node(self):
@@ -70,13 +70,19 @@ class GoalNode:
     child_proof_step will be set to None if the proof_step nb is > than this
     nb. Thus the ProofTree will be truncated, this is used when usr is moving in
      the history.
+    :param _status: a dict truncation nb -> (is_recursively_solved,
+    is_recursively_sorry, nb of unsolved leaves), computed bottom-up and
+    cached. It is updated for self and its ancestors by status_changed(),
+    whenever the subtree under self is modified.
     """
     goal_nb = 0  # Counter
     _truncate_at_proof_step_nb = None
 
-    # The following is set by ProofTree. We need this to compute
-    # is_recursively_solved, and so on, in truncate mode.
+    # The following are set by ProofTree. We need this to compute
+    # is_recursively_solved, and so on, in truncate mode, and to record
+    # changes for the display.
     set_truncate_mode: Optional[callable] = None
+    tree_changes = None  # Optional[ProofTreeChanges]
 
     def __init__(self, parent: Optional[ProofStep] = None, goal: Goal = None,
                  child_proof_step=None, is_solved=False):
@@ -100,6 +106,7 @@ class GoalNode:
         self._is_pure_context = None
         self._is_auxiliary_goal = None
         self._is_auxiliary_goal_brother = None
+        self._status = dict()
 
     @classmethod
     def set_truncation_nb(cls, proof_step_nb=None):
@@ -119,6 +126,7 @@ class GoalNode:
     @child_proof_step.setter
     def child_proof_step(self, proof_step):
         self._child_proof_step = proof_step
+        self.status_changed()
 
     @classmethod
     def no_more_goals(cls, proof_step):
@@ -607,6 +615,7 @@ class GoalNode:
 
     def set_goal(self, goal):
         self.goal = goal
+        self.status_changed()
 
     def is_no_more_goals(self):
         return self.goal.target.math_type is MathObject.NO_MORE_GOALS
@@ -619,6 +628,121 @@ class GoalNode:
         return (self.child_proof_step and
                 self.child_proof_step.has_solved_one_goal)
 
+    def __child_proof_step_at(self, truncation_nb) -> Optional[ProofStep]:
+        """
+        Same as self.child_proof_step, for the given truncation nb.
+        """
+        proof_step = self._child_proof_step
+        if not proof_step or (truncation_nb is not None
+                              and proof_step.pf_nb > truncation_nb):
+            return None
+        return proof_step
+
+    def __children_at(self, truncation_nb) -> list:
+        """
+        Same as self.children_goal_nodes, for the given truncation nb.
+        """
+        proof_step = self.__child_proof_step_at(truncation_nb)
+        if not proof_step or proof_step.has_solved_one_goal:
+            return []
+        return proof_step.children_goal_nodes
+
+    def __compute_status(self, truncation_nb) -> tuple:
+        """
+        Compute (is_recursively_solved, is_recursively_sorry,
+        nb of unsolved leaves) from the children's status, which should be
+        already computed for truncation_nb.
+        """
+        proof_step = self.__child_proof_step_at(truncation_nb)
+        children_status = [child._status[truncation_nb]
+                           for child in self.__children_at(truncation_nb)]
+
+        if (proof_step and proof_step.has_solved_one_goal) \
+                or self.is_no_more_goals():
+            solved = True
+        else:
+            solved = bool(children_status) and all(status[0] for status
+                                                   in children_status)
+
+        if proof_step and proof_step.is_sorry():
+            sorry = True
+        else:
+            sorry = (any(status[1] for status in children_status)
+                     and all(status[0] or status[1]
+                             for status in children_status))
+
+        if solved or sorry:
+            nb_unsolved_leaves = 0
+        elif not children_status:
+            nb_unsolved_leaves = 1
+        else:
+            nb_unsolved_leaves = sum(status[2] for status in children_status)
+
+        return solved, sorry, nb_unsolved_leaves
+
+    def __status_at(self, truncation_nb) -> tuple:
+        """
+        Return the status of self for truncation_nb, computing the status
+        of descendants that are not in cache. The tree is traversed
+        iteratively, so that long proofs do not hit the recursion limit.
+        """
+        if truncation_nb in self._status:
+            return self._status[truncation_nb]
+
+        # Post-order traversal of nodes whose status is unknown
+        stack = [(self, False)]
+        while stack:
+            goal_node, children_done = stack.pop()
+            if truncation_nb in goal_node._status:
+                continue
+            if children_done:
+                goal_node._status[truncation_nb] = \
+                    goal_node.__compute_status(truncation_nb)
+            else:
+                stack.append((goal_node, True))
+                stack.extend((child, False) for child in
+                             goal_node.__children_at(truncation_nb)
+                             if truncation_nb not in child._status)
+
+        return self._status[truncation_nb]
+
+    def status(self) -> tuple:
+        """
+        Return (is_recursively_solved, is_recursively_sorry,
+        nb of unsolved leaves) for the current truncation nb.
+        """
+        return self.__status_at(self._truncate_at_proof_step_nb)
+
+    def status_changed(self):
+        """
+        Update the cached status of self and its ancestors after the
+        subtree under self has been modified. This goes bottom-up,
+        and stops at the first ancestor whose status is unchanged. Only the
+        status of the non truncated tree is updated, status for other
+        truncation nbs are just cleared.
+
+        Note that if the status of a node is in cache, then so is the status
+        of its children. So if self's status is not in cache, then no
+        ancestor's status depends on it.
+
+        Self and the ancestors whose status may have changed are recorded in
+        tree_changes.
+        """
+        changes = self.tree_changes
+        if changes is not None:
+            changes.modified.append(self)
+        goal_node = self
+        while goal_node is not None and goal_node._status:
+            old_status = goal_node._status
+            goal_node._status = dict()
+            if None in old_status:
+                new_status = goal_node.__status_at(None)
+                if len(old_status) == 1 and new_status == old_status[None]:
+                    break
+            if changes is not None and goal_node is not self:
+                changes.status_changed.append(goal_node)
+            goal_node = goal_node.parent_node
+
     def is_recursively_solved(self, truncate=False):
         """
         Self is recursively solved if it is explicitly solved, or it has
@@ -631,13 +755,7 @@ class GoalNode:
         if truncate:
             self.set_truncate_mode(True)
 
-        if self.is_immediately_solved or self.is_no_more_goals():
-            irs = True
-        elif self.children_goal_nodes:
-            irs = all([child.is_recursively_solved()
-                        for child in self.children_goal_nodes])
-        else:
-            irs = False
+        irs = self.status()[0]
 
         if truncate:
             self.set_truncate_mode(False)
@@ -670,15 +788,7 @@ class GoalNode:
         if truncate:
             self.set_truncate_mode(True)
 
-        if self.is_immediately_sorry():
-            irs = True
-        else:
-            sorry = [child.is_recursively_sorry() for child in
-                     self.children_goal_nodes]
-            solved = [child.is_recursively_solved() for child in
-                      self.children_goal_nodes]
-            solved_or_sorry = [sos[0] or sos[1] for sos in zip(solved, sorry)]
-            irs = any(sorry) and all(solved_or_sorry)
+        irs = self.status()[1]
 
         if truncate:
             self.set_truncate_mode(False)
@@ -686,7 +796,8 @@ class GoalNode:
         return irs
 
     def is_recursively_solved_or_sorry(self):
-        return self.is_recursively_solved() or self.is_recursively_sorry()
+        status = self.status()
+        return status[0] or status[1]
 
     @property
     def unsolved_leaves(self):
@@ -694,17 +805,22 @@ class GoalNode:
         Return the list of unsolved leaves of self. This is used to determine
         the list of goals that remain to be solved. Here the goals solved by
         sorry are considered to be solved.
-        """
-
-        if self.is_recursively_solved_or_sorry():
-            return []
-        elif not self.children_goal_nodes:
-            return [self]
-        else:
-            unsolved_leaves = []
-            for child in self.children_goal_nodes:
-                unsolved_leaves.extend(child.unsolved_leaves)
-            return unsolved_leaves
+        Only subtrees with unsolved leaves are visited.
+        """
+        truncation_nb = self._truncate_at_proof_step_nb
+        self.__status_at(truncation_nb)
+        unsolved_leaves = []
+        stack = [self]
+        while stack:
+            goal_node = stack.pop()
+            if not goal_node._status[truncation_nb][2]:
+                continue
+            children = goal_node.__children_at(truncation_nb)
+            if children:
+                stack.extend(reversed(children))
+            else:
+                unsolved_leaves.append(goal_node)
+        return unsolved_leaves
 
     def total_degree(self):
         """
@@ -768,6 +884,8 @@ class GoalNode:
 
         # Disconnect child_proof_step and clear future info
         self.clear_descendance()
+        if self.tree_changes is not None:
+            self.tree_changes.pruned.append(self)
 
     def descendant_proof_steps(self) -> [ProofStep]:
         """
@@ -863,6 +981,31 @@ class VirtualBrotherAuxGoalNode(GoalNode):
             return [self.parent_node.goal.target]
 
 
+class ProofTreeChanges:
+    """
+    The changes of a ProofTree since the last call to
+    ProofTree.pop_changes(). This allows the display of the ProofTree to be
+    updated incrementally, instead of walking the whole tree at each step.
+
+    :param added: the GoalNodes that have been created.
+    :param pruned: the GoalNodes whose descendance has been pruned.
+    :param modified: the GoalNodes whose child_proof_step, children or goal
+    have been modified.
+    :param status_changed: the ancestors of modified GoalNodes whose
+    solved / sorry status may have changed.
+    """
+
+    def __init__(self):
+        self.added: [GoalNode] = []
+        self.pruned: [GoalNode] = []
+        self.modified: [GoalNode] = []
+        self.status_changed: [GoalNode] = []
+
+    def __bool__(self):
+        return bool(self.added or self.pruned or self.modified
+                    or self.status_changed)
+
+
 class ProofTree:
     """
     This class stores the root goal node, and the current goal node. It also
@@ -894,6 +1037,10 @@ class ProofTree:
 
         - self.last_proof_step is the last ProofStep instance received by
         the ProofTree, responsible for the present state.
+        - self.max_proof_step_nb is the largest nb of the ProofSteps
+        received by the ProofTree.
+        - self.changes records the changes of the tree since last call to
+        pop_changes().
         """
         self.root_node = RootGoalNode(parent_proof_step=None,
                                       initial_goal=initial_goal) \
@@ -901,8 +1048,11 @@ class ProofTree:
         self.current_goal_node = self.root_node
         self.previous_goal_node = None
         self._last_proof_step: Optional[ProofStep] = None
+        self.max_proof_step_nb = -1
+        self.changes = ProofTreeChanges()
 
         GoalNode.set_truncate_mode = self.set_truncate_mode
+        GoalNode.tree_changes = self.changes
 
     def __str__(self):
         """
@@ -910,6 +1060,16 @@ class ProofTree:
         """
         return str(self.root_node.parent)
 
+    def pop_changes(self) -> ProofTreeChanges:
+        """
+        Return the changes of self since last call, and start recording
+        new changes.
+        """
+        changes = self.changes
+        self.changes = ProofTreeChanges()
+        GoalNode.tree_changes = self.changes
+        return changes
+
     @property
     def last_proof_step(self):
         """
@@ -943,9 +1103,14 @@ class ProofTree:
         Set the ProofTree into truncate mode: the part of the tree below
         self.last_proof_step becomes invisible. This is useful to compute
         unsolved goals, ... during history moves.
-        """
-        if yes:
-            GoalNode.set_truncation_nb(self.last_proof_step_nb)
+        If no ProofStep comes after self.last_proof_step, then nothing is
+        truncated, and the tree is not set into truncate mode, so that
+        GoalNodes use their cached status for the whole tree.
+        """
+        last_proof_step_nb = self.last_proof_step_nb
+        if (yes and last_proof_step_nb is not None
+                and last_proof_step_nb < self.max_proof_step_nb):
+            GoalNode.set_truncation_nb(last_proof_step_nb)
         else:
             GoalNode.set_truncation_nb(None)
 
@@ -1080,6 +1245,7 @@ class ProofTree:
                                           new_proof_state.goals[0])
             new_proof_step.children_goal_nodes = [self.root_node]
             self.current_goal_node = self.root_node
+            self.changes.added.append(self.root_node)
             return
 
         # ─────── Case of new step after history move ─────── #
@@ -1105,6 +1271,8 @@ class ProofTree:
 
         # ─────── Connect new_proof_step to ProofTree ─────── #
         self.current_goal_node.child_proof_step = new_proof_step
+        self.max_proof_step_nb = max(self.max_proof_step_nb,
+                                     new_proof_step.pf_nb)
 
         # ─────── Create new GoalNodes ─────── #
         if delta_goal == -1:  # current goal solved
@@ -1131,8 +1299,10 @@ class ProofTree:
                 other_goal_node = GoalNode(parent=new_proof_step,
                                            goal=other_goal)
                 children_gn = [next_goal_node, other_goal_node]
+            self.changes.added.extend(children_gn)
 
         new_proof_step.children_goal_nodes = children_gn
+        self.previous_goal_node.status_changed()
         self.last_proof_step = new_proof_step
         self.add_outcomes()
 
@@ -1140,8 +1310,8 @@ class ProofTree:
         previous_goal = self.current_goal_node.parent_node.goal
         Goal.compare(new_goal, previous_goal)
         Goal.transfer_name_hints_from(new_goal, previous_goal)
-        print("ProofTree:")
-        print(str(self.root_node.parent))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("ProofTree:\n" + str(self.root_node.parent))
 
     def proof_steps(self):
         """
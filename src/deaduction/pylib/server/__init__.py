@@ -31,6 +31,9 @@ This file is part of d∃∀duction.
 
 import trio
 import logging
+import heapq
+from collections import deque
+from itertools import count
 from time import time
 from typing import Optional, Dict
 
@@ -54,6 +57,7 @@ from deaduction.pylib.server.high_level_request import (HighLevelServerRequest,
                                                         ProofStepRequest,
                                                         LeanCodeProofStepRequest,
                                                         ExerciseRequest)
+from deaduction.pylib.server.response_cache import LeanResponseCache
 
 from deaduction.pylib.config.request_method import from_previous_state_method
 
@@ -76,7 +80,12 @@ class Task:
     """
     A class to record a task for the server.
     Status is one of "", "in_queue", "launched", "answered",
-    "cancellation_required", "cancelled", "done".
+    "cancellation_required", "cancelled", "preempted", "done".
+    Tasks with lower priority number are launched first. A background task
+    (e.g. computing initial proof states) is preempted, i.e. cancelled and
+    put back in the queue, when an interactive task is added.
+    When a task with a coalesce_key is added, queued tasks with the same
+    coalesce_key are dropped, since they are superseded by the new one.
     duration should measure the whole duration of the task, as seen from the
     ServerQueue. That begins with the computation of the HighLevelRequest and
     ends with the reception of all pieces of data from the Lean server
@@ -84,6 +93,9 @@ class Task:
     of an error, or until cancellation.
     """
 
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
     def __init__(self, fct: callable, kwargs: dict):
         self.fct = fct
         self.kwargs = kwargs
@@ -101,9 +113,25 @@ class Task:
         if 'pertinent_duration' in self.kwargs:
             self.kwargs.pop('pertinent_duration')
 
+        self.priority = self.kwargs.pop('priority', self.INTERACTIVE)
+        self.coalesce_key = self.kwargs.pop('coalesce_key', None)
+        # One of 'IPS', 'Exercise', 'ProofStep', used for timeouts:
+        self.request_type = self.kwargs.pop('request_type', 'ProofStep')
+
+        self.queue_time = None
+        self.queue_order = None
+        self.launch_time = None
         self.start_time = None
         self.end_time = None
 
+    @property
+    def wait_time(self):
+        """
+        Time spent in the queue before (last) launch.
+        """
+        if self.queue_time and self.launch_time:
+            return self.launch_time - self.queue_time
+
     @property
     def duration(self):
         start = self.start_time
@@ -112,16 +140,68 @@ class Task:
         return duration
 
 
+#########################
+# AdaptiveTimeout class #
+#########################
+class AdaptiveTimeout:
+    """
+    Compute timeouts for ServerQueue from the durations of the last WINDOW
+    tasks of the same request type: the timeout is FACTOR times the
+    PERCENTILE of these durations, within [MIN_TIMEOUT, MAX_TIMEOUT].
+    Until MIN_SAMPLES durations have been observed, the default timeout is
+    used. A task that times out counts as a task whose duration is the
+    timeout, so that timeouts increase on slow machines.
+    """
+
+    WINDOW = 20
+    MIN_SAMPLES = 5
+    PERCENTILE = 0.9
+    FACTOR = 2
+    MIN_TIMEOUT = 3
+    MAX_TIMEOUT = 60
+
+    def __init__(self):
+        self.log = logging.getLogger("AdaptiveTimeout")
+        self.durations: Dict[str, deque] = dict()
+
+    def record(self, request_type: str, duration: float):
+        durations = self.durations.setdefault(request_type,
+                                              deque(maxlen=self.WINDOW))
+        durations.append(duration)
+
+    def percentile(self, request_type: str) -> Optional[float]:
+        durations = sorted(self.durations.get(request_type, []))
+        if len(durations) < self.MIN_SAMPLES:
+            return None
+        index = min(int(self.PERCENTILE * len(durations)), len(durations)-1)
+        return durations[index]
+
+    def timeout(self, request_type: str, default: float) -> float:
+        percentile = self.percentile(request_type)
+        if percentile is None:
+            return default
+        timeout = min(max(self.FACTOR * percentile, self.MIN_TIMEOUT),
+                      self.MAX_TIMEOUT)
+        self.log.debug(f"Timeout for {request_type}: {timeout:.1f}s "
+                       f"({int(100*self.PERCENTILE)}th percentile = "
+                       f"{percentile:.1f}s)")
+        return timeout
+
+
 #####################
 # ServerQueue class #
 #####################
-class ServerQueue(list):
+class ServerQueue:
     """
-    This class stores a list of pending task for Lean server, and launches the
-    first task in the list when the previous task is done.
+    This class stores pending tasks for Lean server, and launches the
+    first task when the previous task is done. Tasks are ordered by
+    priority, then by order of arrival (tasks "on top" first).
     The "next_task" method is also responsible for the timeout: if the task
-    is not done within TIMEOUT, then the request is sent another time with
+    is not done within timeout, then the request is sent another time with
     doubled timeout, and again until NB_TRIALS is reached.
+    Timeouts are computed by self.timeout_policy from the durations of
+    previous tasks, with TIMEOUT as default value. The first task after a
+    (re)start of Lean gets at least STARTING_TIMEOUT.
     A cancellation method can be applied when a task is cancelled.
     """
 
@@ -130,49 +210,88 @@ class ServerQueue(list):
     NB_TRIALS = 2  # 3 FIXME
 
     def __init__(self, nursery, timeout_signal):
-        super().__init__()
         self.log = logging.getLogger("ServerQueue")
 
         # Initial parameters
         self.nursery                               = nursery
         self.timeout_signal                        = timeout_signal
 
+        # Heap of (priority, order, task)
+        self.heap = []
+        self.counter = count()
+
         # Tags
         self.started = False
         self.is_busy = False
 
-        # self.current_task = None
-
         # Cancel scope
         self.current_task = None
         self.cancel_scope: Optional[trio.CancelScope] = None
         self.actual_timeout = self.TIMEOUT
         self.task_durations: [int] = []
+        self.timeout_policy = AdaptiveTimeout()
+        self.nb_timeouts = 0
+
+        # Metrics
+        self.wait_times: Dict[int, list] = {Task.INTERACTIVE: [],
+                                            Task.BACKGROUND: []}
+        self.nb_preempted = 0
+        self.nb_coalesced = 0
 
         # Trio Event, initialized when a new queue starts,
         # and set when it ends.
         self.queue_ended            = None
         self.lean_server_running    = None  # Set by ServerInterface
+        # Called with a preempted task, set by ServerInterface
+        self.on_preemption          = None
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __push(self, task: Task, order=None):
+        if order is None:
+            order = next(self.counter)
+            if task.on_top:
+                order = -order
+        heapq.heappush(self.heap, (task.priority, order, task))
+        return order
+
+    def __remove(self, tasks: list):
+        if tasks:
+            self.heap = [item for item in self.heap if item[2] not in tasks]
+            heapq.heapify(self.heap)
 
     def add_task(self, task: Task):
-        # fct, *args, cancel_fct=None, on_top=False):
         """
         Add a task to the queue. The task may be added at the end of the
         queue (default), or on top. If queue is not busy, that is, no task
         is currently running, then call next_task so that the added task
-        starts immediately.
+        starts immediately. An interactive task preempts a running
+        background task.
         """
+        if task.coalesce_key is not None:
+            superseded = [item[2] for item in self.heap
+                          if item[2].coalesce_key == task.coalesce_key]
+            for old_task in superseded:
+                old_task.status = "cancelled"
+            self.__remove(superseded)
+            self.nb_coalesced += len(superseded)
+
         task.status = "in_queue"
-        if task.on_top:
-            self.append(task)
-            self.log.debug(f"Adding task on top")
-        else:
-            self.log.debug(f"Adding task")
-            self.insert(0, task)
+        task.queue_time = time()
+        task.queue_order = self.__push(task)
+        self.log.debug(f"Adding task (queue depth: {len(self)})")
+
         if not self.is_busy:  # Execute task immediately
             self.is_busy = True
             self.queue_ended = trio.Event()
             self.next_task()
+        elif (self.current_task and self.cancel_scope
+              and task.priority < self.current_task.priority
+              and not self.cancel_scope.shield):
+            self.log.debug("Preempting current task")
+            self.current_task.status = "preempted"
+            self.cancel_scope.cancel()
 
     def next_task(self):
         """
@@ -180,9 +299,11 @@ class ServerQueue(list):
         """
         if len(self) > 0:
             # Launch first task
-            task = self.pop()
+            task = heapq.heappop(self.heap)[2]
             self.log.debug(f"Launching task")
-            # continue_ = input("Launching task?")
+            task.launch_time = time()
+            self.wait_times.setdefault(task.priority, []).append(
+                task.wait_time)
             self.nursery.start_soon(self.task_with_timeout, task)
             self.current_task = task
             task.status = 'launched'
@@ -190,7 +311,23 @@ class ServerQueue(list):
             self.is_busy = False
             self.current_task = None
             self.queue_ended.set()
-            self.log.debug(f"No more tasks")
+            self.log.debug(f"No more tasks, metrics: {self.metrics()}")
+
+    def metrics(self) -> dict:
+        """
+        Return queue depth, mean and max wait times by priority, and numbers
+        of preempted, coalesced and timed out tasks.
+        """
+        metrics = {'depth': len(self),
+                   'preempted': self.nb_preempted,
+                   'coalesced': self.nb_coalesced,
+                   'timeouts': self.nb_timeouts}
+        for priority, wait_times in self.wait_times.items():
+            if wait_times:
+                metrics[f'mean_wait_{priority}'] = (sum(wait_times)
+                                                    / len(wait_times))
+                metrics[f'max_wait_{priority}'] = max(wait_times)
+        return metrics
 
     async def task_with_timeout(self, task: Task):
         """
@@ -205,17 +342,19 @@ class ServerQueue(list):
         If task is canceled, cancel_fct is called.
         """
         nb = 0
+        self.actual_timeout = self.timeout_policy.timeout(task.request_type,
+                                                          self.TIMEOUT)
         if not self.started:
-            # Set timeout at the very first task
-            self.actual_timeout = self.STARTING_TIMEOUT
+            # The very first task also waits for Lean to start
+            self.actual_timeout = max(self.actual_timeout,
+                                      self.STARTING_TIMEOUT)
             self.started = True
-        else:
-            self.actual_timeout = self.TIMEOUT
         while nb < self.NB_TRIALS:
             nb += 1
             # The following try block is here because of some error occurring
             # sometimes when cancelling trio.
             # try:
+            trial_start = None
             with trio.move_on_after(self.actual_timeout) \
                     as self.cancel_scope:
                 # Await Lean Server starts!
@@ -223,6 +362,7 @@ class ServerQueue(list):
                     await self.lean_server_running.wait()
                 ################
                 # Process task #
+                trial_start = trio.current_time()
                 task.start_time = time()
                 await task.fct(task, **task.kwargs)
                 task.end_time = time()
@@ -230,15 +370,38 @@ class ServerQueue(list):
                 if task.pertinent_duration:
                     self.task_durations.append(task.duration)
                     # print(f"task durations: {self.task_durations}")
+                self.timeout_policy.record(task.request_type,
+                                           trio.current_time() - trial_start)
                 ################
             if self.cancel_scope.cancelled_caught:
                 self.log.debug("Cancelling current task")
-                if task.status == "cancellation_required":
+                if (trial_start is not None and task.status not in
+                        ("preempted", "cancellation_required")):
+                    # Timeout: task lasted at least that long
+                    self.timeout_policy.record(task.request_type,
+                                               trio.current_time()
+                                               - trial_start)
+                if task.status == "preempted":
+                    # Put task back in queue, it will be launched again later
+                    self.nb_preempted += 1
+                    if task.cancel_fct:
+                        task.cancel_fct()
+                    if self.on_preemption:
+                        self.on_preemption(task)
+                    task.status = "in_queue"
+                    task.queue_time = time()
+                    self.__push(task, order=task.queue_order)
+                    self.log.debug(f"Task preempted, metrics: "
+                                   f"{self.metrics()}")
+                    self.next_task()
+                    return
+                elif task.status == "cancellation_required":
                     error_type = 7
                 else:
                     self.log.warning(f"No answer within "
                                      f"{self.actual_timeout}s (trial {nb})")
                     error_type = 3
+                    self.nb_timeouts += 1
                     self.actual_timeout = 2 * self.actual_timeout
                 no_more_trials = (nb == self.NB_TRIALS
                                   or task.status == "cancellation_required")
@@ -289,6 +452,103 @@ class ServerQueue(list):
     def cancel_task(self, task):
         if self.current_task is task and self.cancel_scope:
             self.cancel_scope.cancel()
+        elif task.status == "cancellation_required":  # Task is still queued
+            self.__remove([task])
+            task.status = "cancelled"
+
+
+########################
+# LeanServerPool class #
+########################
+class LeanServerPool:
+    """
+    This class keeps SIZE Lean servers started in the background, so that
+    starting (or restarting) the ServerInterface does not wait for Lean.
+    Warm servers are synced with warm_content (typically the imports and
+    preamble of the current course), so that Lean has already loaded the
+    imports and elaborated the preamble when the first exercise is sent.
+    Each time a warm server is handed over, a replacement is warmed up in
+    the background.
+    """
+
+    WARM_UP_TIMEOUT = 60
+
+    def __init__(self, nursery, lean_env, size=1):
+        self.log = logging.getLogger("LeanServerPool")
+        self.nursery = nursery
+        self.lean_env = lean_env
+        self.size = size
+        self.warm_content = ""
+        self.warm_servers: [LeanServer] = []
+        self.nb_warming = 0
+
+    def fill(self):
+        """
+        Start warming up servers in the background, up to self.size.
+        """
+        while len(self.warm_servers) + self.nb_warming < self.size:
+            self.nb_warming += 1
+            self.nursery.start_soon(self.__warm_up)
+
+    async def __warm_up(self):
+        lean_server = LeanServer(self.nursery, self.lean_env)
+        content = self.warm_content
+        try:
+            await lean_server.start()
+            await self.__sync(lean_server, content)
+        except Exception as error:
+            self.log.warning(f"Unable to warm up a Lean server: {error}")
+            lean_server.stop()
+            return
+        finally:
+            self.nb_warming -= 1
+        if content != self.warm_content:  # Obsolete, try again
+            lean_server.stop()
+            self.fill()
+        elif len(self.warm_servers) < self.size:
+            self.warm_servers.append(lean_server)
+            self.log.debug(f"{len(self.warm_servers)} warm Lean server(s)")
+        else:  # Pool has been stopped meanwhile
+            lean_server.stop()
+
+    async def __sync(self, lean_server, content):
+        if not content:
+            return
+        with trio.move_on_after(self.WARM_UP_TIMEOUT):
+            req = SyncRequest(file_name="deaduction_lean", content=content)
+            await lean_server.send(req)
+            await lean_server.running_monitor.wait_ready()
+
+    def set_warm_content(self, content: str):
+        """
+        Set the content to be elaborated by warm servers. Warm servers
+        with another content are replaced in the background.
+        """
+        if content == self.warm_content:
+            return
+        self.warm_content = content
+        for lean_server in self.warm_servers:
+            lean_server.stop()
+        self.warm_servers = []
+        self.fill()
+
+    def pop_warm(self, content: str) -> Optional[LeanServer]:
+        """
+        Return a warm server synced with content, if there is one, and warm
+        up a replacement in the background.
+        """
+        if not self.warm_servers or content != self.warm_content:
+            return None
+        lean_server = self.warm_servers.pop(0)
+        self.log.debug("Using warm Lean server")
+        self.fill()
+        return lean_server
+
+    def stop(self):
+        for lean_server in self.warm_servers:
+            lean_server.stop()
+        self.warm_servers = []
+        self.size = 0
 
 
 #########################
@@ -350,10 +610,22 @@ class ServerInterface(QObject):
         self.pending_requests: Dict[int, HighLevelServerRequest] = {}
         # self.__desirable_lean_rqst_fpps_method(force_normal=True)
 
+        # Pool of warm Lean servers, if any
+        pool_size = cvars.get('others.lean_server_pool_size', 0)
+        self.server_pool: Optional[LeanServerPool] = (
+            LeanServerPool(nursery, self.lean_env, pool_size)
+            if pool_size else None)
+        # Course preamble of the last exercise synced with self.lean_server:
+        self.synced_preamble: Optional[str] = None
+
+        # Cache of Lean responses to ProofStepRequests, if any
+        self.response_cache: Optional[LeanResponseCache] = None
+        if cvars.get('others.lean_response_cache', False):
+            max_size = cvars.get('others.lean_response_cache_size', 1000)
+            self.response_cache = LeanResponseCache(max_size)
+
         # Set server callbacks
-        self.lean_server.on_message_callback = self.__on_lean_message
-        self.lean_server.running_monitor.on_state_change_callback = \
-            self.__on_lean_state_change
+        self.__set_lean_server_callbacks()
 
         # Current exercise (when processing one exercise)
         self.lean_file: Optional[LeanFile] = None
@@ -381,16 +653,59 @@ class ServerInterface(QObject):
         self.server_queue = ServerQueue(nursery=nursery,
                                         timeout_signal=self.lean_response)
         self.server_queue.lean_server_running = self.lean_server_running
+        self.server_queue.on_preemption = self.cancel_pending_request
+
+    def __set_lean_server_callbacks(self):
+        self.lean_server.on_message_callback = self.__on_lean_message
+        self.lean_server.running_monitor.on_state_change_callback = \
+            self.__on_lean_state_change
 
     async def start(self):
         """
-        Asynchronously start the Lean server.
+        Asynchronously start the Lean server, or get a warm one from
+        self.server_pool.
         """
-        self.request_seq_num           = -1
-        await self.lean_server.start()
+        lean_server = None
+        if self.server_pool:
+            preamble = self.server_pool.warm_content
+            lean_server = self.server_pool.pop_warm(preamble)
+            self.server_pool.fill()
+        if lean_server:
+            self.__use_lean_server(lean_server, preamble)
+        else:
+            self.request_seq_num = -1
+            await self.lean_server.start()
+            self.synced_preamble = None
+        if self.response_cache:
+            self.response_cache.new_session()
         self.file_invalidated.set()  # No file at starting
         self.lean_server_running.set()
 
+    def __use_lean_server(self, lean_server: LeanServer, preamble: str):
+        """
+        Replace self.lean_server by a warm lean_server from the pool, which
+        has been synced with preamble. The previous server is stopped.
+        """
+        if self.lean_server is not lean_server:
+            self.lean_server.stop()
+        self.lean_server = lean_server
+        self.__set_lean_server_callbacks()
+        self.pending_requests = {}
+        # Requests sent by the pool to warm up the server shift seq_num:
+        self.request_seq_num = self.lean_server.pending_reqs.seq_num - 1
+        self.synced_preamble = preamble
+        if self.response_cache:
+            self.response_cache.new_session()
+
+    def warm_up(self, course):
+        """
+        Warm up the servers of the pool, if any, with course's preamble, in
+        the background, so that the next exercise of course may be set on a
+        server that has already elaborated the imports and preamble.
+        """
+        if self.server_pool:
+            self.server_pool.set_warm_content(course.lean_preamble)
+
     async def secured_stop(self):
         """
         Stop the Lean server, but only after all pending tasks of the
@@ -412,6 +727,14 @@ class ServerInterface(QObject):
         # Reset task durations
         self.server_queue.task_durations = []
 
+    def stop_pool(self):
+        """
+        Stop the warm Lean servers, if any. This should be called when
+        quitting d∃∀duction.
+        """
+        if self.server_pool:
+            self.server_pool.stop()
+
     def add_task(self, task: Task):
         self.server_queue.add_task(task)
 
@@ -516,6 +839,9 @@ class ServerInterface(QObject):
             self.log.debug(f"ignoring msg from seq_num {msg.seq_num}")
             return
 
+        if isinstance(request, ProofStepRequest):
+            request.lean_messages.append(msg)
+
         severity = msg.severity
         # last_line_of_inner_content = self.lean_file.last_line_of_inner_content
 
@@ -595,6 +921,41 @@ class ServerInterface(QObject):
         if nb > 1:
             self.log.warning(f"{nb} requests pending")
 
+    def __get_response_from_cache(self, request) -> bool:
+        """
+        If the Lean response to request is in self.response_cache, then
+        process the cached Lean messages as if they came from Lean, and
+        return True.
+        Note that request gets the next seq_num, but self.request_seq_num
+        is not incremented, since it must stay in line with the Lean
+        server's seq_num.
+        """
+        if not (self.response_cache and isinstance(request, ProofStepRequest)):
+            return False
+        seq_num = self.request_seq_num + 1
+        request.set_seq_num(seq_num)
+        messages = self.response_cache.get(request.file_contents(), seq_num)
+        if messages is None:
+            return False
+
+        self.log.debug("Using cached Lean response")
+        request.init_proof_received_event(trio.Event())
+        self.pending_requests[seq_num] = request
+        for msg in messages:
+            msg.seq_num = seq_num
+            self.__on_lean_message(msg)
+        if request.proof_received_event.is_set():
+            return True
+        else:  # Incomplete response, ask Lean
+            self.pending_requests.pop(seq_num)
+            request.reset_response()
+            try:
+                while True:
+                    self.error_recv.receive_nowait()
+            except trio.WouldBlock:
+                pass
+            return False
+
     async def __get_response_for_request(self, request=None):
         """
         Call Lean server to update the proof_state.
@@ -615,32 +976,30 @@ class ServerInterface(QObject):
         resp = None
         error_type = 0
 
-        # (2) Let's send request to Lean
-        # Loop in case Lean's answer is None, which happens...
-        while not resp:
-            # print(request.file_contents())
-            # self.request_seq_num += 1
-
-            # FIXME: replace wait_ready at the end by the following,
-            #   with a waiting of the running state going to False.
-            # if self.is_running:
-            #     pass
-
-            self.__add_pending_request(request)
-            self.log.debug(f"Request seq_num: {self.request_seq_num}")
-            # try:
-            #     self.log.info(f"Inner contents:{request.lean_file.inner_contents}")
-            # except:
-            #     pass
-            req = SyncRequest(file_name="deaduction_lean",
-                              content=request.file_contents())
-            resp = await self.lean_server.send(req)
-            if not resp:
-                self.pending_requests.pop(self.request_seq_num)
+        # (2) Let's send request to Lean, unless response is in cache
+        from_cache = self.__get_response_from_cache(request)
+        if from_cache:
+            response_message = "file invalidated"
+        else:
+            # Loop in case Lean's answer is None, which happens...
+            while not resp:
+                # FIXME: replace wait_ready at the end by the following,
+                #   with a waiting of the running state going to False.
+                # if self.is_running:
+                #     pass
+
+                self.__add_pending_request(request)
+                self.log.debug(f"Request seq_num: {self.request_seq_num}")
+                req = SyncRequest(file_name="deaduction_lean",
+                                  content=request.file_contents())
+                resp = await self.lean_server.send(req)
+                if not resp:
+                    self.pending_requests.pop(self.request_seq_num)
+            self.log.debug("Response seq_num: "+str(resp.seq_num))
+            response_message = resp.message
 
         # (3) Several types of response: normal/unchanged/other
-        if resp.message == "file invalidated":
-            self.log.debug("Response seq_num: "+str(resp.seq_num))
+        if response_message == "file invalidated":
             self.file_invalidated.set()
 
             #########################################
@@ -649,27 +1008,34 @@ class ServerInterface(QObject):
             await request.proof_received_event.wait()
             self.log.debug(_("Proof State received"))
 
-        elif resp.message == "file_unchanged":
+        elif response_message == "file_unchanged":
             # (This should never happen, but just in case)
             self.log.warning("File unchanged!")
             error_type = 6
 
         else:
-            self.log.warning(f"Unexpected Lean response: {resp.message}")
+            self.log.warning(f"Unexpected Lean response: {response_message}")
             error_type = 10
 
         # ------ Up to here task may be cancelled by timeout ------ #
         self.server_queue.cancel_scope.shield = True
-        if not self.pending_requests.get(self.request_seq_num):
+        if not self.pending_requests.get(request.seq_num):
             # Request has been cancelled
             self.log.info(f"Ignoring server's response for request "
-                          f"{self.request_seq_num} (task has been cancelled)")
+                          f"{request.seq_num} (task has been cancelled)")
             return
 
-        self.pending_requests.pop(self.request_seq_num)
+        self.pending_requests.pop(request.seq_num)
 
         self.log.debug(_("After request"))
 
+        if (self.response_cache and not from_cache
+                and isinstance(request, ProofStepRequest)
+                and response_message == "file invalidated"):
+            self.response_cache.set(request.file_contents(),
+                                    request.seq_num,
+                                    request.lean_messages)
+
         if hasattr(self.update_ended, "emit"):
             self.update_ended.emit()
 
@@ -711,7 +1077,7 @@ class ServerInterface(QObject):
                                          from_previous_state=request.from_previous_state_method)
             self.lean_response.emit(lean_response)
 
-        self.log.debug(f"End of request #{str(resp.seq_num)}")
+        self.log.debug(f"End of request #{request.seq_num}")
         # Timeout TODO: move this at the end
         # FIXME: useful??
         with trio.move_on_after(1):
@@ -735,10 +1101,20 @@ class ServerInterface(QObject):
                                   proof_step=proof_step,
                                   exercise=exercise)
         self.lean_file = request.lean_file
+        if self.response_cache:  # MathObject has been cleared
+            self.response_cache.new_session()
+        preamble = exercise.course.lean_preamble
+        if self.server_pool and preamble != self.synced_preamble:
+            # Hand the exercise to a server that already knows the preamble
+            lean_server = self.server_pool.pop_warm(preamble)
+            if lean_server:
+                self.__use_lean_server(lean_server, preamble)
+            self.server_pool.set_warm_content(preamble)
         # self.log.debug("Lean file content:")
         # self.log.debug(self.lean_file.contents)
 
         await self.__get_response_for_request(request=request)
+        self.synced_preamble = preamble
 
         # Method for next request = normal
         self.__desirable_lean_rqst_fpps_method(force_normal=True)
@@ -874,10 +1250,18 @@ class ServerInterface(QObject):
         elif len(statements) <= self.MAX_CAPACITY:
 
             self.log.debug(f"Set {len(statements)} statement(s)")
+            # Initial proof states are computed in the background, unless
+            # needed right now.
+            priority = Task.INTERACTIVE if on_top else Task.BACKGROUND
+            coalesce_key = ('IPS', id(course),
+                            tuple(st.lean_name for st in statements))
             task = Task(fct=self.__get_initial_proof_states,
                         kwargs={'course': course,
                                 'statements': statements,
                                 'on_top': on_top,
+                                'priority': priority,
+                                'coalesce_key': coalesce_key,
+                                'request_type': 'IPS',
                                 'pertinent_duration': False})
             self.server_queue.add_task(task)
 
@@ -170,10 +170,14 @@ class InitialProofStateRequest(HighLevelServerRequest):
     A request to get initial proof states for a course's statements.
     Note that this request is not cancellable.
     """
-    def __init__(self, task, course: Course, statements: [] = None):
+    def __init__(self, task, course: Course, statements: [] = None,
+                 incremental=True):
         super().__init__(task=task)
         self.course = course
         self.statements = statements if statements else course.statements
+        # In incremental mode, proofs of statements that are not requested
+        # are replaced by sorry, so that Lean does not elaborate them again.
+        self.incremental = incremental
 
         # The following dictionaries provide access to a given statement
         # from the line where hypo_analysis / targets_analysis is called.
@@ -193,38 +197,47 @@ class InitialProofStateRequest(HighLevelServerRequest):
         """
         Starting with course's file content,
         add "hypo/target analysis" at relevant places, once for each
-        statement to be processed.
+        statement to be processed. In incremental mode, the proofs of
+        the other statements are replaced by sorry: their initial proof
+        states are in the course's store, and their statements (which may
+        be used later in the file) are not affected.
         """
         lines        = self.course.file_content.splitlines()
         hypo_tactic    = "    hypo_analysis2 {},"
         targets_tactic = "    targets_analysis2 {},"
+        sorry_tactic   = "    sorry"
+        requested = {id(statement) for statement in self.statements}
+        # Statements are processed in the order of the Lean file:
+        statements = (self.course.statements if self.incremental
+                      else self.statements)
 
         shift = 0  # Shift due to line insertion/deletion
-        counter = -1
-        for statement in self.statements:
-            counter += 1
-            # self.log.debug(f"Statement n° {self.statements.index(
-            # statement)}")
+        for statement in statements:
+            if (statement.lean_begin_line_number is None
+                    or statement.lean_end_line_number is None):
+                continue
+            is_requested = id(statement) in requested
+            if not is_requested and not self.incremental:
+                continue
             begin_line   = statement.lean_begin_line_number + shift
             end_line     = statement.lean_end_line_number + shift
-            # self.log.debug(f"{len(lines)} lines")
             # self.log.debug(f"begin, end =  {begin_line, end_line}")
             proof_lines = list(range(begin_line, end_line-1))
-            # self.log.debug(proof_lines)
             proof_lines.reverse()
             for index in proof_lines:
                 lines.pop(index)
-            # Insert seq_num and statement nb
-            # tag = str(self.seq_num) + '.' + str(counter)
-            tag = str(self.seq_num)
-            lines.insert(begin_line, hypo_tactic.format(tag))
-            lines.insert(begin_line+1, targets_tactic.format(tag))
-            self.statement_from_hypo_line[begin_line+1] = statement
-            self.statement_from_targets_line[begin_line+2] = statement
-            # No shift if end_line = begin_line + 3
-            shift += 3 - (end_line - begin_line)
-            # self.log.debug(f"Shift: {shift}")
-            # Construct lean file
+            if is_requested:
+                # Insert seq_num
+                tag = str(self.seq_num)
+                lines.insert(begin_line, hypo_tactic.format(tag))
+                lines.insert(begin_line+1, targets_tactic.format(tag))
+                self.statement_from_hypo_line[begin_line+1] = statement
+                self.statement_from_targets_line[begin_line+2] = statement
+                # No shift if end_line = begin_line + 3
+                shift += 3 - (end_line - begin_line)
+            else:
+                lines.insert(begin_line, sorry_tactic)
+                shift += 2 - (end_line - begin_line)
 
         file_contents = "\n".join(lines)
         # print(file_contents)
@@ -296,6 +309,8 @@ class ProofStepRequest(HighLevelServerRequest):
         self.hypo_analyses: [str] = []
         self.targets_analyses: [str] = []
         self.effective_code_received = False
+        # All Lean messages received, to be stored in response cache
+        self.lean_messages = []
 
         self.code_string = ""
         self.decorated_code = None  # will be decorated_code
@@ -383,6 +398,18 @@ class ProofStepRequest(HighLevelServerRequest):
         targets = self.targets_from_targets_analysis(analysis)
         self.targets_analyses = targets
 
+    def reset_response(self):
+        """
+        Forget all pieces of response received so far.
+        """
+        self.hypo_analyses = []
+        self.targets_analyses = []
+        self.targets_received = False
+        self.effective_code_received = False
+        self.effective_code = (self.decorated_code.copy()
+                               if self.decorated_code else None)
+        self.lean_messages = []
+
     def process_effective_code(self, txt):
         for txt_line in txt.splitlines():
             if not txt_line.startswith("EFFECTIVE CODE"):
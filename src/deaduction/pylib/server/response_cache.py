@@ -0,0 +1,117 @@
+"""
+###########################################################
+# response_cache.py : a session cache of Lean messages    #
+###########################################################
+
+This module stores the Lean messages received for a ProofStepRequest,
+keyed by a digest of the file contents sent, so that a repeated request
+(same step again, undo/redo) does not need a Lean round trip.
+
+Lean messages contain names of local variables that Lean creates, like
+"_fresh.1234.5678", which are registered in MathObject.Variables. Nothing
+guarantees that these names are the same when the same file is elaborated
+by another Lean process, so responses are only replayed within the session
+where they were received, and the cache is kept in memory. A new session,
+which empties the cache, should be started with new_session() each time a
+Lean server is started and each time MathObject is cleared.
+
+The contents sent to Lean contain the request's seq_num, in the first line
+"-- Seq num xxx" and in the analysis tactics, and Lean messages contain
+it in "context #xxx:" / "targets #xxx:". These are replaced by a placeholder
+before computing keys and storing messages, and the placeholder is replaced
+by the new seq_num when messages are replayed.
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import re
+from dataclasses import replace
+from typing import List, Optional
+
+from deaduction.pylib.coursedata.ips_store import stable_digest
+from deaduction.pylib.lean.response import Message
+from deaduction.pylib.utils import LRUCache
+
+SEQ_NUM_PLACEHOLDER = "?"
+
+
+def contents_without_seq_num(contents: str, seq_num: int) -> str:
+    return re.sub(rf"(-- Seq num |analysis2 ){seq_num}\b",
+                  rf"\g<1>{SEQ_NUM_PLACEHOLDER}", contents)
+
+
+def text_without_seq_num(text: str, seq_num: int) -> str:
+    return re.sub(rf"^(context|targets) #{seq_num}:",
+                  rf"\g<1> #{SEQ_NUM_PLACEHOLDER}:", text)
+
+
+def text_with_seq_num(text: str, seq_num: int) -> str:
+    return re.sub(rf"^(context|targets) #{re.escape(SEQ_NUM_PLACEHOLDER)}:",
+                  rf"\g<1> #{seq_num}:", text)
+
+
+class LeanResponseCache:
+    """
+    An LRUCache of at most max_size responses, each one stored as the list
+    of Lean messages, with seq_num replaced by a placeholder.
+    """
+
+    def __init__(self, max_size=1000):
+        self.responses = LRUCache(max_size)
+
+    def new_session(self):
+        """
+        Start a new session: responses received before are forgotten.
+        """
+        self.responses.clear()
+
+    @property
+    def hits(self) -> int:
+        return self.responses.hits
+
+    @property
+    def misses(self) -> int:
+        return self.responses.misses
+
+    @staticmethod
+    def key(contents: str, seq_num: int) -> str:
+        return stable_digest(contents_without_seq_num(contents, seq_num))
+
+    def get(self, contents: str, seq_num: int) -> Optional[List[Message]]:
+        """
+        Return the list of Lean messages for contents, with seq_num in
+        analyses, or None if contents is not in the cache.
+        """
+        messages = self.responses.get(self.key(contents, seq_num))
+        if messages is None:
+            return None
+        return [replace(msg, text=text_with_seq_num(msg.text, seq_num))
+                for msg in messages]
+
+    def set(self, contents: str, seq_num: int, messages: List[Message]):
+        """
+        Store messages as Lean's response to contents.
+        """
+        stored = [replace(msg, text=text_without_seq_num(msg.text, seq_num))
+                  for msg in messages]
+        self.responses.set(self.key(contents, seq_num), stored)
@@ -28,12 +28,16 @@ This file is part of d∃∀duction.
 from pathlib import Path
 from io import BufferedWriter
 import os.path
+import stat
 import logging
 from gettext import gettext as _
-from typing import Callable
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import hashlib
 import gzip
+import json
+import mmap
 
 from .exceptions import ( FileCheckError,
                           FileDontExistError,
@@ -50,6 +54,7 @@ log = logging.getLogger(__name__)
 # Some configuration variables
 ############################################
 CHUNK_SIZE = 4096
+HASH_CHUNK_SIZE = 1024 * 1024
 HASH_REGEX = re.compile(r"^((?:.+)\/(?:[^\/]+)) ([a-zA-Z0-9]+) ([0-9]{3})$")
 
 
@@ -67,18 +72,27 @@ def path_helper(pp: Path):
 # Hashing and permissions
 ############################################
 def file_hash(fp: Path):
+    """
+    Return the sha1 checksum of a file, read by chunks of HASH_CHUNK_SIZE
+    bytes so that big files are not loaded in memory.
+    """
     hh = hashlib.sha1()
-    hh.update(fp.read_bytes())
+    with open(fp, "rb") as fhandle:
+        for chunk in iter(lambda: fhandle.read(HASH_CHUNK_SIZE), b""):
+            hh.update(chunk)
 
     return hh.hexdigest()
 
+def permissions_octal(mode: int):
+    return "{:03o}".format(mode & 0x1FF)
+
 def file_permissions_octal(fp: Path):
     """
     Return a file's permissions as
     an octal string.
     """
 
-    return "{:03o}".format(fp.stat().st_mode & 0x1FF)
+    return permissions_octal(fp.stat().st_mode)
 
 
 ############################################
@@ -100,6 +114,69 @@ def check_dir(path: Path, exc=False, create=False):
     elif not path.is_dir():
         raise FileNotDirectoryError(path)
 
+############################################
+# Hash cache class
+############################################
+class HashCache:
+    """
+    A persistent cache of file checksums, stored as a json file.
+    A file's checksum is reused as long as the file's size, modification
+    time (in ns) and inode are unchanged, so that only modified files need
+    to be hashed again.
+    """
+    def __init__(self, cache_file: Path):
+        self.cache_file = Path(cache_file)
+        self.files      = dict()  # relative path -> (size, mtime, inode, hash)
+        self.hits       = 0
+        self.misses     = 0
+
+        if self.cache_file.exists():
+            try:
+                self.files = json.loads(self.cache_file.read_text())
+            except (OSError, ValueError) as e:
+                log.warning(_("Unable to read hash cache {}: {}")
+                            .format(str(self.cache_file), e))
+
+    @staticmethod
+    def state(st: os.stat_result):
+        return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+    def get(self, fpr: Path, st: os.stat_result) -> Optional[str]:
+        """
+        Return the cached checksum of the file at relative path fpr,
+        whose stat is st, if the file has not been modified.
+        """
+        cached = self.files.get(str(fpr))
+        if cached and cached[:3] == self.state(st):
+            self.hits += 1
+            return cached[3]
+        self.misses += 1
+
+    def set(self, fpr: Path, st: os.stat_result, hh: str):
+        self.files[str(fpr)] = self.state(st) + [hh]
+
+    def clear(self):
+        self.files = dict()
+
+    def retain(self, keys):
+        """
+        Forget files whose relative path is not in keys.
+        """
+        keys = set(keys)
+        self.files = {key: value for key, value in self.files.items()
+                      if key in keys}
+
+    def save(self):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(".tmp")
+            tmp_file.write_text(json.dumps(self.files))
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            log.warning(_("Unable to save hash cache {}: {}")
+                        .format(str(self.cache_file), e))
+
+
 ############################################
 # Hashlist class
 ############################################
@@ -125,70 +202,149 @@ class HashList:
 
     # ───────────── Constructors ───────────── #
     @classmethod
-    def from_path(cls, path: Path):
+    def from_path(cls, path: Path, cache: HashCache = None,
+                  max_workers: int = None):
         """
         Computes hash list for a given path into output
-        gzipped file
+        gzipped file.
+        If cache is given, only files that are not in cache, or have been
+        modified, are hashed. Files are hashed in a pool of max_workers
+        threads.
         """
         path   = Path(path).resolve()
         r      = dict()
+        to_hash = []  # (fpr, st, zz) for files that must be hashed
 
         log.info(_("Generate hashlist from directory at {}").format(str(path)))
         for fp in path.rglob("*"):  # File path
-            if fp.is_file():
-                hh     = file_hash(fp)
-                zz     = file_permissions_octal(fp)
+            try:
+                st = fp.stat()
+            except OSError:  # e.g. broken symbolic link
+                log.warning(_("Ignoring non regular file {}").format(str(fp)))
+                continue
+
+            if stat.S_ISREG(st.st_mode):
+                zz     = permissions_octal(st.st_mode)
 
                 fpr    = fp.relative_to(path)  # File Path Relative
+                hh     = cache.get(fpr, st) if cache is not None else None
                 r[fpr] = (hh,zz)
+                if hh is None:
+                    to_hash.append((fpr, st, zz))
 
-            elif not fp.is_dir():
+            elif not stat.S_ISDIR(st.st_mode):
                 log.warning(_("Ignoring non regular file {}").format(str(fp)))
 
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            hashes = executor.map(file_hash,
+                                  (path / item[0] for item in to_hash))
+            for (fpr, st, zz), hh in zip(to_hash, hashes):
+                r[fpr] = (hh,zz)
+                if cache is not None:
+                    cache.set(fpr, st, hh)
+
+        if cache is not None:
+            cache.retain(str(fpr) for fpr in r)
+            cache.save()
         return cls(base_path=path, files=r)
 
     @classmethod
     def from_file(cls, hh_file: Path):
         """
-        Loads an hashlist from the given gzipped file
+        Loads an hashlist from the given gzipped file. The file is read
+        line by line, as a text stream.
         """
         hh_file = Path(hh_file).resolve()
-
-        buff    = ""   # Line buffer
-        line    = ""
-
         r       = dict()
 
         log.info(_("Load hashlist from path {}").format(str(hh_file)))
-        with gzip.open(str(hh_file), "rb") as fhandle:
-            eof = False
-            while not eof:
-                chunk = fhandle.read(CHUNK_SIZE)
-                buff += chunk.decode("utf8")
+        with gzip.open(str(hh_file), "rt", encoding="utf8",
+                       newline="\n") as fhandle:
+            match = HASH_REGEX.match
+            for line in fhandle:
+                mt = match(line.rstrip("\n"))
+                if mt:
+                    path, hash_, perm_ = mt.groups()
+                    r[Path(path)] = (hash_, perm_)
+
+                else:
+                    log.warning(_("Cannot parse line: {}")
+                                .format(repr(line)))
 
-                eof   = len(chunk) < CHUNK_SIZE
+        return cls(base_path=None, files=r)
 
-                while buff.find("\n") >= 0:
-                    # Find new line and update buffer
-                    idx   = buff.find("\n")
 
-                    line  = buff[:idx]
-                    buff  = buff[(idx + 1):]  # idx + 1 = discard \n
+############################################
+# Hash index class
+############################################
+class HashIndex:
+    """
+    An uncompressed hashlist file, with lines sorted by path, written by
+    HashIndex.write. The file is memory-mapped, and the hash and
+    permissions of a given path are found by a binary search, without
+    loading the whole file.
+    """
+    def __init__(self, index_file: Path):
+        self.index_file = Path(index_file).resolve()
+        self.fhandle    = open(str(self.index_file), "rb")
+        size            = os.fstat(self.fhandle.fileno()).st_size
+        # mmap does not accept empty files
+        self.data       = (mmap.mmap(self.fhandle.fileno(), 0,
+                                     access=mmap.ACCESS_READ)
+                           if size else b"")
+
+    @staticmethod
+    def write(hlist: HashList, index_file: Path):
+        """
+        Write hlist as an index file, sorted by path.
+        """
+        lines = sorted((str(pp).encode("utf8"), f" {hh} {zz}\n".encode())
+                       for pp, (hh, zz) in hlist.files.items())
+        with open(str(index_file), "wb") as fhandle:
+            for pp, rest in lines:
+                fhandle.write(pp + rest)
 
-                    # Get info from found line and register
-                    mt    = HASH_REGEX.match(line)
-                    if mt:
-                        path  = Path(mt.group(1))
-                        hash_ = mt.group(2)
-                        perm_ = mt.group(3)
+    def __enter__(self):
+        return self
 
-                        r[path] = (hash_, perm_)
+    def __exit__(self, *args):
+        self.close()
 
-                    else:
-                        log.warning(_("Cannot parse line: {}")
-                                    .format(repr(line)))
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.fhandle.close()
 
-        return cls(base_path=None, files=r)
+    def __line_at(self, pos: int):
+        """
+        Return (start, end, path) for the line containing position pos.
+        """
+        start = self.data.rfind(b"\n", 0, pos) + 1
+        end   = self.data.find(b"\n", pos)
+        if end < 0:
+            end = len(self.data)
+        path  = self.data[start:end].rsplit(b" ", 2)[0]
+        return start, end, path
+
+    def get(self, path: Path):
+        """
+        Return (hash, permissions) of path, or None if path is not in the
+        index.
+        """
+        key = str(path).encode("utf8")
+        lo, hi = 0, len(self.data)  # Search in lines starting in [lo, hi[
+        while lo < hi:
+            start, end, line_path = self.__line_at((lo + hi) // 2)
+            if line_path == key:
+                mt = HASH_REGEX.match(self.data[start:end].decode("utf8"))
+                return (mt.group(2), mt.group(3)) if mt else None
+            elif line_path < key:
+                lo = end + 1
+            else:
+                hi = start
+
+    def __contains__(self, path: Path):
+        return self.get(path) is not None
 
 
 ############################################
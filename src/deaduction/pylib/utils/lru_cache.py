@@ -0,0 +1,88 @@
+"""
+###################################################################
+# lru_cache.py : A bounded dict with least-recently-used eviction #
+###################################################################
+
+Author(s)      : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Maintainers(s) : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Date           : October 2026
+
+Copyright (c) 2026 the dEAduction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with d∃∀duction. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    A dict-like cache with at most max_size entries; when full, the least
+    recently used entry is evicted. Hits and misses are counted, so that
+    the efficiency of the cache can be checked.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.__dict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.__dict)
+
+    def __contains__(self, key):
+        return key in self.__dict
+
+    def get(self, key, default=None):
+        """
+        Return the value stored for key, and count a hit, or count a miss
+        and return default.
+        """
+        try:
+            value = self.__dict[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.__dict.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.__dict[key] = value
+        self.__dict.move_to_end(key)
+        if len(self.__dict) > self.max_size:
+            self.__dict.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self.__dict.pop(key, default)
+
+    def clear(self):
+        """
+        Remove all entries, and reset counters.
+        """
+        self.__dict.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.
+
+    def stats(self) -> str:
+        return (f"{self.hits} hits, {self.misses} misses "
+                f"({100 * self.hit_rate:.0f}%), {len(self)} entries")
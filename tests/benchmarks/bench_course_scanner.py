@@ -0,0 +1,85 @@
+"""
+##########################################################################
+# bench_course_scanner.py : benchmark parsers of Lean course files       #
+##########################################################################
+
+Compare the throughput of the reference grammar
+(lean_course_grammar + LeanCourseVisitor) with the LeanCourseScanner,
+over all courses of share/courses (or the Lean files given as arguments).
+With --proof-lines N, N lines are added to each proof, as in history files
+where saved proofs accumulate.
+
+Usage:
+    python bench_course_scanner.py [file.lean ...] [--repeat N]
+                                   [--proof-lines N]
+
+Author(s)      : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Maintainers(s) : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Date           : October 2026
+
+Copyright (c) 2026 the dEAduction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with d∃∀duction. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from parsimonious.exceptions import VisitationError
+
+import deaduction.pylib.config.i18n
+from deaduction.pylib.coursedata.parser_course import \
+    course_history_and_metadata
+
+COURSES_DIR = (Path(__file__).parents[2] / 'src' / 'deaduction' / 'share'
+               / 'courses')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--proof-lines", type=int, default=0)
+    args = parser.parse_args()
+
+    files = args.files or sorted(COURSES_DIR.rglob('*.lean'))
+    proof = "begin\n" + "    -- saved step\n" * args.proof_lines
+    contents = []
+    for file in files:
+        content = file.read_text().replace("begin\n", proof)
+        if not content.endswith("\n"):
+            content += "\n"
+        try:
+            course_history_and_metadata(content, use_grammar=True)
+        except VisitationError:  # Bad metadata
+            continue
+        contents.append(content)
+    nb_chars = sum(len(content) for content in contents)
+    print(f"{len(contents)} files, {nb_chars / 1e3:.0f} kB")
+
+    for name, use_grammar in (("Grammar", True), ("LeanCourseScanner", False)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for content in contents:
+                course_history_and_metadata(content, use_grammar=use_grammar)
+        duration = time.perf_counter() - start
+        print(f"{name}: {duration:.3f}s, "
+              f"{nb_chars * args.repeat / duration / 1e6:.2f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
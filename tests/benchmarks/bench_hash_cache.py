@@ -0,0 +1,88 @@
+"""
+##########################################################################
+# bench_hash_cache.py : benchmark the checking of installed files       #
+##########################################################################
+
+Compare the time needed to compute the HashList of a folder (e.g. the
+Lean toolchain or mathlib folder) without cache, with an empty cache
+(cold), with a filled cache (warm) and with a cleared cache (as with
+--verify-installation). Without a folder argument, a synthetic tree of
+--nb-files files is created in a temporary directory.
+
+Usage:
+    python bench_hash_cache.py [folder] [--nb-files N] [--file-size N]
+
+Author(s)      : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Maintainers(s) : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Date           : October 2026
+
+Copyright (c) 2026 the dEAduction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with d∃∀duction. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import deaduction.pylib.utils.filesystem as fs
+
+
+def make_tree(path: Path, nb_files: int, file_size: int):
+    for nb in range(nb_files):
+        folder = path / f"dir{nb % 50}"
+        folder.mkdir(exist_ok=True)
+        (folder / f"file{nb}.olean").write_bytes(os.urandom(file_size))
+
+
+def timed(name, path, cache=None):
+    start = time.perf_counter()
+    hlist = fs.HashList.from_path(path, cache=cache)
+    duration = time.perf_counter() - start
+    stats = f" ({cache.misses} hashed, {cache.hits} cached)" if cache else ""
+    print(f"{name}: {duration:.3f}s{stats}")
+    return hlist
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", nargs="?", type=Path)
+    parser.add_argument("--nb-files", type=int, default=5000)
+    parser.add_argument("--file-size", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        folder = args.folder
+        if folder is None:
+            folder = tmp_dir / "tree"
+            folder.mkdir()
+            make_tree(folder, args.nb_files, args.file_size)
+        cache_file = tmp_dir / "cache.json"
+
+        reference = timed("No cache", folder)
+        cold = timed("Cold cache", folder, fs.HashCache(cache_file))
+        warm = timed("Warm cache", folder, fs.HashCache(cache_file))
+        cache = fs.HashCache(cache_file)
+        cache.clear()
+        full = timed("Full verify", folder, cache)
+        assert reference.files == cold.files == warm.files == full.files
+
+
+if __name__ == '__main__':
+    main()
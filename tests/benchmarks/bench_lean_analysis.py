@@ -0,0 +1,83 @@
+"""
+##########################################################################
+# bench_lean_analysis.py : benchmark parsers of hypo/targets_analysis    #
+##########################################################################
+
+Compare the throughput of the reference grammar
+(lean_expr_with_type_grammar + LeanEntryVisitor) with the LeanEntryParser,
+over the analyses recorded in
+    tests/lean_files_for_pytest/recorded_analyses.json
+(or any json file with the same format given as argument).
+
+Usage:
+    python bench_lean_analysis.py [recorded_analyses.json] [--repeat N]
+
+Author(s)      : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Maintainers(s) : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Date           : October 2026
+
+Copyright (c) 2026 the dEAduction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with d∃∀duction. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import deaduction.pylib.config.i18n
+from deaduction.pylib.mathobj import (MathObject, BoundVar,
+                                      lean_entries, parse_lean_entry)
+
+RECORDED_ANALYSES = (Path(__file__).parent.parent / 'lean_files_for_pytest'
+                     / 'recorded_analyses.json')
+
+
+def parse_all(entries, use_grammar):
+    MathObject.clear()
+    MathObject.constants = {}
+    BoundVar.identifier_nb = 0
+    for entry in entries:
+        parse_lean_entry(entry, use_grammar=use_grammar, use_cache=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("analyses", nargs="?", default=RECORDED_ANALYSES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.analyses, encoding='utf-8') as json_file:
+        recorded_analyses = json.load(json_file)
+    entries = [entry for analyses in recorded_analyses
+               for analysis in analyses
+               for entry in lean_entries(analysis)]
+    nb_chars = sum(len(entry) for entry in entries) * args.repeat
+    print(f"{len(entries)} entries, {nb_chars / args.repeat / 1e3:.0f} kB")
+
+    for name, use_grammar in (("Grammar", True), ("LeanEntryParser", False)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            parse_all(entries, use_grammar)
+        duration = time.perf_counter() - start
+        print(f"{name}: {duration:.3f}s, "
+              f"{len(entries) * args.repeat / duration:.0f} entries/s, "
+              f"{nb_chars / duration / 1e6:.2f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+#########################################################################
+# bench_lean_receiver.py : benchmark line framing of Lean's JSON stream #
+#########################################################################
+
+Replay a Lean stdout stream through the LeanServer.LineFramer, and compare
+with the former str-based framing (re-slicing the whole buffer for every
+newline).
+
+Usage:
+    python bench_lean_receiver.py [--chunk-size N] [captured_stream]
+
+captured_stream is a file containing Lean's raw stdout, e.g. obtained with
+    lean --json --server < requests.json > captured_stream
+If no file is given, a multi-megabyte stream is synthesized, mimicking
+hypo_analysis messages for a big context.
+
+Author(s)      : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Maintainers(s) : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Date           : October 2026
+
+Copyright (c) 2026 the dEAduction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with d∃∀duction. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import time
+
+from deaduction.pylib.lean.server import LeanServer
+
+
+def synthetic_stream(nb_msgs=40, nb_hypos=400) -> bytes:
+    entry = ("¿¿¿object: ¿(CONSTANT¿[name:set_theory.ensemble¿]"
+             "¿(type: ¿(SET¿(TYPE¿)¿)¿)¿) ¿= ¿(LOCAL_CONSTANT¿[name:A/"
+             "identifier:0._fresh.{}¿]¿(type: ¿(SET¿(TYPE¿)¿)¿)¿) ∀∃∈⊂\n")
+    lines = []
+    for seq_num in range(nb_msgs):
+        text = "context:\n" + "".join(entry.format(i)
+                                      for i in range(nb_hypos))
+        msg = {"msgs": [{"caption": "", "file_name": "/tmp/deaduction.lean",
+                         "pos_col": 4, "pos_line": 100 + seq_num,
+                         "severity": "information", "text": text}],
+               "response": "all_messages"}
+        lines.append(json.dumps(msg, ensure_ascii=False))
+        lines.append(json.dumps({"message": "file invalidated",
+                                 "response": "ok", "seq_num": seq_num}))
+        # Lean sends many small current_tasks messages
+        for _ in range(200):
+            lines.append(json.dumps({"is_running": False, "response":
+                                     "current_tasks", "tasks": []}))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def chunks(stream: bytes, chunk_size: int):
+    for idx in range(0, len(stream), chunk_size):
+        yield stream[idx:idx + chunk_size]
+
+
+def old_framing(stream: bytes, chunk_size: int) -> [str]:
+    """
+    The former LeanServer.receiver algorithm.
+    """
+    buffer = ""
+    lines = []
+    for data in chunks(stream, chunk_size):
+        try:
+            buffer += data.decode("utf-8")
+        except UnicodeDecodeError:
+            pass  # Data is lost
+        idx = buffer.find("\n")
+        while idx >= 0:
+            lines.append(buffer[:idx])
+            buffer = buffer[idx + 1:]
+            idx = buffer.find("\n")
+    return lines
+
+
+def new_framing(stream: bytes, chunk_size: int) -> [str]:
+    framer = LeanServer.LineFramer()
+    lines = []
+    for data in chunks(stream, chunk_size):
+        lines.extend(raw_line.decode("utf-8")
+                     for raw_line in framer.feed(data))
+    return lines
+
+
+def bench(fct, stream, chunk_size):
+    start = time.perf_counter()
+    lines = fct(stream, chunk_size)
+    return time.perf_counter() - start, lines
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("captured_stream", nargs="?")
+    # Lean's stdout is typically read by 64kB chunks
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    args = parser.parse_args()
+
+    if args.captured_stream:
+        with open(args.captured_stream, "rb") as file:
+            stream = file.read()
+    else:
+        stream = synthetic_stream()
+    chunk_size = args.chunk_size
+
+    new_time, new_lines = bench(new_framing, stream, chunk_size)
+    old_time, old_lines = bench(old_framing, stream, chunk_size)
+    expected = stream.decode("utf-8").split("\n")[:-1]
+    nb_bad_lines = len(set(expected).difference(old_lines))
+
+    print(f"Stream: {len(stream) / 1e6:.1f} MB, {len(expected)} lines, "
+          f"chunks of {chunk_size} bytes")
+    print(f"Old framing: {old_time:.3f}s, "
+          f"{nb_bad_lines} lines lost or broken")
+    print(f"New framing: {new_time:.3f}s")
+    assert new_lines == expected
+
+
+if __name__ == '__main__':
+    main()
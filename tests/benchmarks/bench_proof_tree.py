@@ -0,0 +1,218 @@
+"""
+##########################################################################
+# bench_proof_tree.py : benchmark ProofTree with long proofs             #
+##########################################################################
+
+Feed ProofTrees with thousands of ProofSteps, as the Coordinator does, and
+measure the time spent in ProofTree.process_new_proof_step() (which computes
+the unsolved goal nodes before each step), and in status queries:
+unsolved goal nodes and solved/sorry status of all nodes, in normal and in
+truncate mode (i.e. after history moves).
+Each query is run with GoalNodes' cached status, and after clearing the
+cache of every GoalNode, which amounts to re-computing the whole tree.
+
+Proofs are:
+    - linear: no fork, the tree is a path,
+    - forks: a fork every other step, then all goals are solved,
+    - random: random forks, solved and sorry goals, and history moves.
+
+Usage:
+    python bench_proof_tree.py [--steps N] [--seed S]
+
+Author(s)      : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Maintainers(s) : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Date           : October 2026
+
+Copyright (c) 2026 the dEAduction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with d∃∀duction. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import random
+import time
+
+import deaduction.pylib.config.i18n
+from deaduction.pylib.actions import CodeForLean, ProofMethods
+from deaduction.pylib.mathobj import MathObject
+from deaduction.pylib.proof_state import Goal, ProofState
+from deaduction.pylib.proof_step import ProofStep
+from deaduction.pylib.proof_tree import ProofTree
+
+TARGET = ("¿¿¿property¿[pp_type: P¿]: METAVAR¿[name: _mlocal._fresh.12.215¿]"
+          "¿= PROP¿[type: PROP¿]")
+ENTRY = ("¿¿¿object: LOCAL_CONSTANT¿[name: x¿/ identifier: "
+         "0._fresh.1.x¿]¿= CONSTANT¿[name: ℝ/1¿]")
+
+
+def goal() -> Goal:
+    MathObject.clear()
+    return Goal.from_lean_data("context:\n" + ENTRY + "\n", TARGET,
+                               to_prove=True)
+
+
+def linear_actions(nb_steps, rng):
+    return [(0, False)] * (nb_steps - 1) + [(-1, False)]
+
+
+def fork_actions(nb_steps, rng):
+    nb_forks = nb_steps // 3
+    return [(1, False), (0, False)] * nb_forks + [(-1, False)] * (nb_forks+1)
+
+
+def random_actions(nb_steps, rng):
+    """
+    A list of (delta, sorry), or ('history', None) for history moves.
+    """
+    actions = []
+    for _ in range(nb_steps):
+        action = rng.random()
+        if action < 0.02:
+            actions.append(('history', None))
+        elif action < 0.3:
+            actions.append((1, False))
+        elif action < 0.5:
+            actions.append((-1, action < 0.32))
+        else:
+            actions.append((0, False))
+    return actions
+
+
+class ProofBuilder:
+    """
+    Feed a ProofTree with ProofSteps as the Coordinator does.
+    Only the ProofTree methods are timed, not the construction of goals.
+    """
+
+    def __init__(self):
+        self.proof_tree = ProofTree()
+        self.proof_steps = []
+        self.nb_goals = 1
+        self.nb_calls = 0
+        self.duration = 0
+        self.proof_step(0)
+
+    def proof_step(self, delta, sorry=False):
+        proof_step = ProofStep()
+        proof_step.parent_goal_node = self.proof_tree.current_goal_node
+        proof_step.lean_code = CodeForLean("")
+        if sorry:
+            proof_step.button_name = "proof_methods"
+            proof_step.user_input = [ProofMethods.reference_list.index('sorry')]
+        self.nb_goals += delta
+        goals = [goal() for _ in range(min(self.nb_goals, 2))]
+        if not goals:  # As in Coordinator.set_fireworks()
+            goals = [goal()]
+            goals[0].target.math_type = MathObject.NO_MORE_GOALS
+        proof_step.proof_state = ProofState(goals)
+
+        start = time.perf_counter()
+        self.proof_tree.process_new_proof_step(proof_step)
+        self.duration += time.perf_counter() - start
+        self.nb_calls += 1
+        self.proof_steps.append(proof_step)
+
+    def history_move(self, index):
+        proof_step = self.proof_steps[index]
+        start = time.perf_counter()
+        self.proof_tree.current_goal_node = proof_step.children_goal_nodes[0]
+        self.proof_tree.last_proof_step = proof_step
+        self.nb_goals = len(self.proof_tree.unsolved_goal_nodes())
+        self.duration += time.perf_counter() - start
+        self.proof_steps = self.proof_steps[:index+1]
+
+    def run(self, actions, rng):
+        for delta, sorry in actions:
+            if delta == 'history' or (self.nb_goals == 0
+                                      and len(self.proof_steps) > 2):
+                self.history_move(rng.randrange(1, len(self.proof_steps)))
+            elif self.nb_goals + delta >= 0:
+                self.proof_step(delta, sorry)
+
+
+def goal_nodes(proof_tree) -> list:
+    nodes = []
+    stack = [proof_tree.root_node]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.children_goal_nodes)
+    return nodes
+
+
+def clear_cache(nodes):
+    for node in nodes:
+        node._status = dict()
+
+
+def query_status(proof_tree, nodes, sample, truncate, cache) -> float:
+    """
+    Time the computation of the unsolved goal nodes and of the status of
+    the nodes of sample. If cache is False, the status of all nodes is
+    cleared before each query.
+    """
+    start = time.perf_counter()
+    if not cache:
+        clear_cache(nodes)
+    proof_tree.unsolved_goal_nodes(truncated=truncate)
+    for node in sample:
+        if not cache:
+            clear_cache(nodes)
+        node.is_recursively_solved(truncate)
+        node.is_recursively_sorry(truncate)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    for name, actions in (("linear", linear_actions),
+                          ("forks", fork_actions),
+                          ("random", random_actions)):
+        builder = ProofBuilder()
+        builder.run(actions(args.steps, rng), rng)
+        proof_tree = builder.proof_tree
+        nodes = goal_nodes(proof_tree)
+        print(f"{name}: {builder.nb_calls} proof steps processed, "
+              f"{len(nodes)} goal nodes in final tree, "
+              f"{len(proof_tree.unsolved_goal_nodes())} unsolved")
+        print(f"    process_new_proof_step and history moves: "
+              f"{builder.duration:.3f}s, "
+              f"{builder.duration / builder.nb_calls * 1e6:.0f}µs/step")
+
+        # Queries on a sample of nodes, as cleared cache makes them slow
+        sample = nodes[::max(1, len(nodes) // 50)]
+        # Go back in history, at the middle of the proof
+        proof_steps = builder.proof_steps
+        for truncate in (False, True):
+            if truncate:
+                proof_tree.last_proof_step = proof_steps[len(proof_steps)//2]
+            cached = query_status(proof_tree, nodes, sample, truncate,
+                                  cache=True)
+            cleared = query_status(proof_tree, nodes, sample, truncate,
+                                   cache=False)
+            mode = "truncated" if truncate else "whole tree"
+            print(f"    status of {len(sample)} nodes ({mode}): "
+                  f"cached {cached * 1e3:.1f}ms, "
+                  f"cleared {cleared * 1e3:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
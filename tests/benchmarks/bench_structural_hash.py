@@ -0,0 +1,98 @@
+"""
+##########################################################################
+# bench_structural_hash.py : benchmark MathObject equality tests         #
+##########################################################################
+
+Compare equality tests between MathObjects with and without structural
+hashes, over the math_types of the goals recorded in
+    tests/lean_files_for_pytest/recorded_analyses.json
+(or any json file with the same format given as argument).
+Every math_type is compared to every other one, as in MathObject.is_in()
+or actions.magic.find_target_in_props(), and searched in a set, which is
+possible only with hashes.
+
+Usage:
+    python bench_structural_hash.py [recorded_analyses.json] [--repeat N]
+
+Author(s)      : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Maintainers(s) : Frédéric Le Roux <frederic.le-roux@imj-prg.fr>
+Date           : October 2026
+
+Copyright (c) 2026 the dEAduction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with d∃∀duction. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import deaduction.pylib.config.i18n
+from deaduction.pylib.mathobj import MathObject, lean_entries, parse_lean_entry
+
+RECORDED_ANALYSES = (Path(__file__).parent.parent / 'lean_files_for_pytest'
+                     / 'recorded_analyses.json')
+
+
+def compare_all(math_types) -> int:
+    return sum(1 for mt0 in math_types for mt1 in math_types if mt0 == mt1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("analyses", nargs="?", default=RECORDED_ANALYSES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.analyses, encoding='utf-8') as json_file:
+        recorded_analyses = json.load(json_file)
+    entries = [entry for analyses in recorded_analyses
+               for analysis in analyses
+               for entry in lean_entries(analysis)]
+
+    for name, use_hash, use_interning in (
+            ("Recursive comparison", False, False),
+            ("Structural hash", True, False),
+            ("Structural hash + interning", True, True)):
+        MathObject.clear()
+        MathObject.use_interning = use_interning
+        math_types = [parse_lean_entry(entry, use_cache=False).math_type
+                      for entry in entries]
+        nb_tests = len(math_types) ** 2 * args.repeat
+        MathObject.caches_structural_hash = use_hash
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            nb_equal = compare_all(math_types)
+        duration = time.perf_counter() - start
+        print(f"{name}: {duration:.3f}s, {nb_tests / duration:.0f} tests/s "
+              f"({nb_equal} equal pairs)")
+    MathObject.caches_structural_hash = True
+    MathObject.use_interning = False
+    print(f"({len(math_types)} math_types, {nb_tests} equality tests)")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        math_types_set = set(math_types)
+        nb_found = sum(1 for math_type in math_types
+                       if math_type in math_types_set)
+    duration = time.perf_counter() - start
+    print(f"Set lookups: {duration:.3f}s "
+          f"({len(math_types_set)} distinct math_types, {nb_found} found)")
+
+
+if __name__ == '__main__':
+    main()
@@ -29,6 +29,7 @@ This file is part of d∃∀duction.
 import pytest
 from pathlib import Path
 import os
+import json
 import logging
 
 import ctypes
@@ -155,3 +156,16 @@ def targets(goals):
 def target_displays(goals):
     displays = [goal.display_target for goal in goals]
     return displays
+
+
+@pytest.fixture
+def recorded_analyses():
+    """
+    List of pairs (hypo_analysis, targets_analysis) of strings, as recorded
+    from Lean.
+    """
+    dir = os.path.join(os.path.dirname(__file__))
+    json_path = dir / Path('lean_files_for_pytest/recorded_analyses.json')
+    with open(json_path, encoding='utf-8') as json_file:
+        analyses = json.load(json_file)
+    return analyses
@@ -0,0 +1,100 @@
+"""
+##############################################################
+# test_course_scanner.py : compare LeanCourseScanner with    #
+# the lean_course_grammar                                    #
+##############################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from pathlib import Path
+
+import pytest
+from parsimonious.exceptions import VisitationError
+
+from deaduction.pylib.coursedata.parser_course import (
+    LeanCourseScanner, course_history_and_metadata, extract_core_statement,
+    split_statement)
+
+COURSES_DIR = (Path(__file__).parents[2] / 'src' / 'deaduction' / 'share'
+               / 'courses')
+COURSE_FILES = sorted(COURSES_DIR.rglob('*.lean'))
+
+
+def file_content(path: Path) -> str:
+    content = path.read_text()
+    return content if content.endswith("\n") else content + "\n"
+
+
+@pytest.mark.parametrize('path', COURSE_FILES,
+                         ids=[path.name for path in COURSE_FILES])
+def test_scanner_vs_grammar(path):
+    content = file_content(path)
+    scanner = LeanCourseScanner(content)
+    scanner.scan()
+    try:
+        expected = course_history_and_metadata(content, use_grammar=True)
+    except VisitationError:  # e.g. metadata in the old, non-toml, format
+        with pytest.raises(ValueError):
+            scanner.visit()
+    else:
+        assert scanner.visit() == expected
+
+
+def test_scanner_corner_cases():
+    contents = [
+        # "end" at the beginning of a line ends the proof, "  end" does not
+        "lemma exercise.a (x : X) : P x :=\nbegin\n  induction x,\n  end\n"
+        "end\nend some_namespace\n",
+        # Proofs and metadata are optional for definitions
+        "namespace foo\n-- open set\nlemma definition.b : Q :=\n"
+        "iff.rfl\nlemma theorem.c : R :=\n/- dEAduction\n"
+        "pretty_name = 'Théorème'\n-/\nbegin\nend\nend foo\n",
+        # Namespace metadata may come after other lines, even "end"
+        "namespace foo\nopen nat\nend foo\n/- dEAduction\n"
+        "pretty_name = 'Foo'\n-/\nopen set -- comment\n",
+        # Course metadata
+        "-- Comment\n/- dEAduction\ntitle = 'Course'\n-/\nopen set\n"]
+    for content in contents:
+        scanner = LeanCourseScanner(content)
+        scanner.scan()
+        assert scanner.visit() == course_history_and_metadata(
+            content, use_grammar=True)
+
+
+def test_scanner_fails_as_grammar():
+    for content in ["lemma exercise.a : P := by simp\n",
+                    "x := open set\n",
+                    "-- Only comments\n"]:
+        with pytest.raises(ValueError):
+            LeanCourseScanner(content).scan()
+
+
+def test_split_statement():
+    for statement in [" : P", "{X : Type} (A B : set X)\n : A ∪ B = B ∪ A",
+                      "(f : X → Y) [h : (∀ x, P (f x))] : Q f ",
+                      "(H : ∀ i:I, (E i = f ⁻¹' (F i))) :\n ∃ x, x ∈ E"]:
+        assert split_statement(statement) == extract_core_statement(statement)
+    for statement in ["(x : X] : P", "(x : X) P", " : "]:
+        with pytest.raises(ValueError):
+            split_statement(statement)
@@ -0,0 +1,128 @@
+"""
+##########################################################
+# test_history_store.py : test the indexed store of      #
+# saved exercises                                        #
+##########################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from pathlib import Path
+
+import deaduction.pylib.config.dirs as cdirs
+from deaduction.pylib.coursedata import Course
+from deaduction.pylib.coursedata.history_store import HistoryStore
+
+LEAN_FILE = (Path(__file__).parents[2] / 'src' / 'deaduction' / 'share'
+             / 'courses' / 'ANALYSE' / 'Fonctions_paires.lean')
+
+
+def append(store, original, number, solved=False):
+    return store.append(original=original,
+                        lean_name=f"{original}_{number}",
+                        date="17Oct10h00", number=number, solved=solved,
+                        statement="digest",
+                        lemma=f"lemma {original}_{number} :=\n")
+
+
+def test_history_store(tmp_path):
+    store = HistoryStore(tmp_path, 'history_course')
+    assert not store
+    for number in (1, 2, 3):
+        append(store, "exercise.a", number, solved=(number == 2))
+    append(store, "exercise.b", 1)
+
+    # Index is saved on disk
+    store = HistoryStore(tmp_path, 'history_course')
+    assert [entry['number'] for entry in store.versions("exercise.a")] \
+        == [1, 2, 3]
+    assert store.versions("exercise.a", statement="other digest") == []
+    assert store.next_number("exercise.a") == 4
+    assert store.lemma(store.entry("exercise.b", "exercise.b_1")) \
+        == "lemma exercise.b_1 :=\n"
+
+    lemma_size = len("lemma exercise.a_1 :=\n")
+    store.delete("exercise.a", ["exercise.a_1", "exercise.a_3"])
+    assert [entry['number'] for entry in store.versions("exercise.a")] == [2]
+    assert store.data_path.stat().st_size == 4 * lemma_size
+    store.delete("exercise.a")
+    assert store.versions("exercise.a") == [] and store
+    # Deleted lemmas have been removed from data file
+    assert store.data_path.stat().st_size == lemma_size
+    assert store.lemma(store.versions("exercise.b")[0]) \
+        == "lemma exercise.b_1 :=\n"
+
+    content = "line 1\nline 2\nline 3\n"
+    assert store.lean_file_content(content, {"exercise.b": 2}) \
+        == "line 1\nline 2\n\nlemma exercise.b_1 :=\n\nline 3\n"
+
+    store.clear()
+    assert not store and not store.data_path.exists()
+
+
+def test_saved_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdirs, 'history', tmp_path)
+    course = Course.from_file(LEAN_FILE)
+    exercise = course.exercises[0]
+    assert exercise.nb_versions_saved_in_history_course() == 0
+    # An empty store is not built again at each access
+    assert course.history_store is course.history_store
+
+    for solved in (False, True, False):
+        metadata = {'auto_test': [{'button': 'forall'}]}
+        if solved:
+            metadata['all_goals_solved'] = 'True'
+        exercise.save_with_auto_steps(metadata, "  intro x,\n")
+    assert exercise.nb_versions_saved_in_history_course() == 3
+    assert exercise.is_solved_in_history_course()
+    versions = course.history_versions_from_exercise(exercise)
+    assert [exo.lean_name for exo in versions] == [
+        exercise.lean_name + '_' + str(number) for number in (3, 2, 1)]
+    assert all(exo.original_exercise is exercise for exo in versions)
+    # Versions are read from the store, without writing the history file
+    assert not course.history_store.lean_path.exists()
+
+    # Only new versions are parsed after a save
+    exercise.save_with_auto_steps({'auto_test': [{'button': 'forall'}]},
+                                  "  intro x,\n")
+    new_versions = course.history_versions_from_exercise(exercise)
+    assert new_versions[0].lean_name == exercise.lean_name + '_4'
+    assert all(new is old for new, old in zip(new_versions[1:], versions))
+    new_versions[0].delete_in_history_file()
+    assert [entry['number'] for entry in course.history_entries(exercise)] \
+        == [1, 2, 3]
+
+    # The Lean history file may be imported by a new course
+    assert course.history_course()
+    store = course.history_store
+    store.index_path.unlink()
+    store.data_path.unlink()
+    other_course = Course.from_file(LEAN_FILE)
+    other_exercise = other_course.exercises[0]
+    assert other_exercise.nb_versions_saved_in_history_course() == 3
+
+    versions[1].delete_in_history_file()
+    assert [entry['number'] for entry in course.history_entries(exercise)] \
+        == [1, 3]
+    course.delete_all_saved_proofs_of_exercise(exercise)
+    assert not exercise.has_versions_in_history_course()
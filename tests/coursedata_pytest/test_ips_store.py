@@ -0,0 +1,116 @@
+"""
+##########################################################
+# test_ips_store.py : test the per-statement store of    #
+# initial proof states                                   #
+##########################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from pathlib import Path
+
+import deaduction.pylib.config.dirs as cdirs
+from deaduction.pylib.coursedata import Course
+from deaduction.pylib.coursedata.ips_store import (InitialProofStateStore,
+                                                   stable_digest)
+from deaduction.pylib.utils import load_object, save_object
+
+LEAN_FILE = (Path(__file__).parents[2] / 'src' / 'deaduction' / 'share'
+             / 'courses' / 'ANALYSE' / 'Fonctions_paires.lean')
+
+
+def course_from_content(file_content):
+    course = Course.from_file_content(file_content)
+    course.abs_course_path = LEAN_FILE
+    return course
+
+
+def test_stable_digest():
+    assert stable_digest("ab", "c") == stable_digest("ab", "c")
+    assert stable_digest("ab", "c") != stable_digest("a", "bc")
+
+
+def test_ips_keys():
+    file_content = LEAN_FILE.read_text()
+    keys = course_from_content(file_content).ips_keys()
+    assert len(set(keys.values())) == len(keys)
+
+    # Proofs and comments do not affect keys
+    edited = file_content.replace("begin", "begin\n  -- edited proof")
+    assert course_from_content(edited).ips_keys() == keys
+
+    # Changing context before a statement affects the next keys only
+    course = course_from_content(file_content)
+    last = course.statements[-1]
+    lines = file_content.splitlines()
+    lines.insert(last.lean_line - 1, "open nat")
+    new_keys = course_from_content("\n".join(lines)).ips_keys()
+    for st in course.statements:
+        assert (new_keys[st.lean_name] == keys[st.lean_name]) \
+            == (st is not last)
+
+
+def test_store(tmp_path):
+    store = InitialProofStateStore(tmp_path / 'store')
+    assert store.load('key') is None
+    store.save('key', {'goals': [1, 2]})
+    assert 'key' in store
+
+    new_store = InitialProofStateStore(tmp_path / 'store')
+    assert new_store.load('key') == {'goals': [1, 2]}
+    assert new_store.load('other_key') is None
+
+
+def test_migrate_obsolete_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdirs, 'all_courses_ipf_dir', tmp_path)
+    file_content = LEAN_FILE.read_text()
+    course = course_from_content(file_content)
+    ips_list = [{'ips': st.lean_name} for st in course.statements]
+    other_content = file_content + "\n-- Another version\n"
+    path = course.obsolete_ips_path
+    save_object({file_content: ips_list, other_content: []}, path)
+
+    course.load_initial_proof_states()
+    for st, ips in zip(course.statements, ips_list):
+        assert st.initial_proof_state == ips
+    # Entries of other file contents are kept
+    assert load_object(path) == {other_content: []}
+
+    course_from_content(other_content).load_initial_proof_states()
+    assert not path.exists()
+
+
+def test_has_initial_proof_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(cdirs, 'all_courses_ipf_dir', tmp_path)
+    course = course_from_content(LEAN_FILE.read_text())
+    first, second = course.statements[:2]
+    course.ips_store.save(course.ips_keys()[first.lean_name], {'ips': 1})
+
+    course = course_from_content(LEAN_FILE.read_text())
+    first, second = course.statements[:2]
+    assert first.has_initial_proof_state
+    assert not second.has_initial_proof_state
+    # Availability is checked without loading
+    assert first.computed_initial_proof_state is None
+    second.initial_proof_state = {'ips': 2}
+    assert second.has_initial_proof_state
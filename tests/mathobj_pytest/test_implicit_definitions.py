@@ -0,0 +1,112 @@
+"""
+###################################################################
+# test_implicit_definitions.py : test memoized implicit definitions #
+###################################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import pytest
+
+from deaduction.pylib.mathobj import (MathObject, lean_entries,
+                                      parse_lean_entry)
+from deaduction.pylib.pattern_math_obj import PatternMathObject
+
+
+class IffDefinition:
+    """
+    A definition whose statement is an iff from the recorded analyses.
+    """
+    def __init__(self, iff, nb):
+        self.iff = iff
+        self.pretty_name = f"definition {nb}"
+
+    def extract_iff(self):
+        return self.iff
+
+
+@pytest.fixture
+def recorded_props(recorded_analyses) -> list:
+    MathObject.clear()
+    return [parse_lean_entry(entry, use_cache=False).math_type
+            for analyses in recorded_analyses
+            for analysis in analyses
+            for entry in lean_entries(analysis)
+            if "property" in entry.split(":")[0]]
+
+
+@pytest.fixture
+def definitions(recorded_props):
+    iffs = [prop for prop in recorded_props
+            if prop.is_iff(is_math_type=True)]
+    PatternMathObject.set_definitions_for_implicit_use(
+        [IffDefinition(iff, nb) for nb, iff in enumerate(iffs)])
+    yield MathObject.implicit_definitions
+    MathObject.implicit_definitions = []
+    MathObject.definition_patterns = []
+
+
+def all_indices(math_object, test) -> list:
+    """
+    Indices of matching definitions, trying all definition patterns.
+    """
+    indices = []
+    for index, pattern in enumerate(MathObject.definition_patterns):
+        if pattern.children[0].match(math_object):
+            if test(pattern.children[1], is_math_type=True):
+                indices.append(index)
+    return indices
+
+
+def test_implicit_definition_indices(recorded_props, definitions):
+    """
+    Memoized indices, computed from the patterns with the same head node,
+    must be those computed by trying all definitions.
+    """
+    assert definitions
+    tests = (MathObject.is_and, MathObject.is_or, MathObject.is_exists,
+             MathObject.is_for_all, MathObject.is_implication)
+    props = recorded_props[:150]
+    nb_matches = 0
+    for test in tests:
+        for prop in props:
+            indices = all_indices(prop, test)
+            nb_matches += len(indices)
+            assert prop.implicit_definition_indices(test) == indices
+            # Second call is memoized
+            hits = MathObject.implicit_memo.hits
+            assert prop.implicit_definition_indices(test) == indices
+            assert MathObject.implicit_memo.hits == hits + 1
+    assert nb_matches
+
+
+def test_memo_is_cleared_with_definitions(recorded_props, definitions):
+    prop = recorded_props[0]
+    prop.implicit_definition_indices()
+    assert len(MathObject.implicit_memo)
+
+    MathObject.definition_patterns = MathObject.definition_patterns[:1]
+    MathObject.implicit_definitions = MathObject.implicit_definitions[:1]
+    assert prop.implicit_definition_indices() == all_indices(
+        prop, lambda math_object, is_math_type: True)
+    assert len(MathObject.implicit_memo) == 1
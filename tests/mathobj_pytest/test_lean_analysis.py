@@ -0,0 +1,99 @@
+"""
+# test_lean_analysis.py : test the parsers of lean_analysis.py #
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import pytest
+
+from deaduction.pylib.mathobj import (MathObject, BoundVar,
+                                      LeanEntryParser,
+                                      lean_entries, parse_lean_entry)
+
+
+def tree_signature(math_object, depth=0):
+    """
+    Return a hashable description of the whole tree of math_object,
+    including classes, info and math_types.
+    """
+    if not isinstance(math_object, MathObject) or depth > 30:
+        return repr(math_object)
+    info = tuple((key, tree_signature(value, depth + 1))
+                 for key, value in math_object.info.items())
+    return (type(math_object).__name__, math_object.node, info,
+            tree_signature(math_object._math_type, depth + 1),
+            tuple(tree_signature(child, depth + 1)
+                  for child in math_object.children))
+
+
+def parse_all(entries, use_grammar):
+    MathObject.clear()
+    MathObject.constants = {}
+    BoundVar.identifier_nb = 0
+    return [parse_lean_entry(entry, use_grammar=use_grammar,
+                             use_cache=False)
+            for entry in entries]
+
+
+def test_lean_entry_parser(recorded_analyses):
+    """
+    Differential test: LeanEntryParser must produce the same trees as the
+    reference grammar lean_expr_with_type_grammar + LeanEntryVisitor.
+    """
+    entries = [entry for analyses in recorded_analyses
+               for analysis in analyses
+               for entry in lean_entries(analysis)]
+    reference = parse_all(entries, use_grammar=True)
+    computed = parse_all(entries, use_grammar=False)
+    for entry, ref_object, new_object in zip(entries, reference, computed):
+        assert tree_signature(ref_object) == tree_signature(new_object), \
+            entry
+
+
+@pytest.mark.parametrize("entry", [
+    "¿¿¿object: LOCAL_CONSTANT¿[name: X¿/ identifier: 0._fresh.1.2¿]",
+    "¿¿¿object: LOCAL_CONSTANT¿[name: X¿/ identifier: 0._fresh.1.2¿]¿= "
+    "SET¿(TYPE",
+    "¿¿¿object: LOCAL_CONSTANT¿[name: X¿]¿= SET¿(TYPE¿)¿)",
+    "¿¿¿object: LOCAL_CONSTANT¿[name: X¿]¿= SET¿[type: TYPE¿(PROP¿)",
+    "¿¿¿property¿[pp_type: P¿]: LOCAL_CONSTANT¿= PROP¿[foo: bar¿]"])
+def test_lean_entry_parser_errors(entry):
+    with pytest.raises(ValueError):
+        LeanEntryParser(entry).parse()
+
+
+def test_parsed_entries_cache(recorded_analyses):
+    """
+    Parsing the same analyses twice should hit MathObject.parsed_entries,
+    and return equal objects.
+    """
+    MathObject.clear()
+    hypo_analysis, targets_analysis = recorded_analyses[0]
+    entries = lean_entries(hypo_analysis) + lean_entries(targets_analysis)
+    first = [parse_lean_entry(entry) for entry in entries]
+    assert MathObject.parsed_entries.misses == len(entries)
+    second = [parse_lean_entry(entry) for entry in entries]
+    assert MathObject.parsed_entries.hits == len(entries)
+    assert first == second
+    MathObject.clear()
+    assert len(MathObject.parsed_entries) == 0
@@ -0,0 +1,121 @@
+"""
+#####################################################################
+# test_pattern_index.py : test the PatternIndex and PatternSnapshots #
+#####################################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+from deaduction.pylib.mathobj import MathObject, lean_entries, parse_lean_entry
+from deaduction.pylib.math_display import PatternInit
+import deaduction.pylib.pattern_math_obj.pattern_snapshot as pattern_snapshot
+from deaduction.pylib.pattern_math_obj.pattern_snapshot import \
+    PatternSnapshots
+
+
+def all_sub_objects(math_object, depth=0) -> list:
+    if depth > 20:
+        return []
+    objects = [math_object]
+    for child in math_object.children + [math_object.math_type]:
+        if not child.is_no_math_type():
+            objects.extend(all_sub_objects(child, depth+1))
+    return objects
+
+
+def first_match(patterns, math_object):
+    for index, (pattern, shape, metavars) in enumerate(patterns):
+        if pattern.match(math_object):
+            return shape
+
+
+def recorded_sub_objects(recorded_analyses) -> list:
+    MathObject.clear()
+    math_objects = []
+    for analyses in recorded_analyses[:10]:
+        for analysis in analyses:
+            for entry in lean_entries(analysis):
+                math_objects.extend(all_sub_objects(
+                    parse_lean_entry(entry, use_cache=False)))
+    return math_objects
+
+
+def test_candidate_patterns(recorded_analyses):
+    """
+    The first matching pattern must be the same with and without index,
+    for every sub-object of the recorded analyses.
+    """
+    math_objects = recorded_sub_objects(recorded_analyses)
+
+    pattern_lists = (PatternInit.pattern_latex, PatternInit.pattern_text,
+                     PatternInit.pattern_latex_for_type,
+                     PatternInit.pattern_lean)
+    nb_candidates = 0
+    for math_object in math_objects:
+        for patterns in pattern_lists:
+            candidates = PatternInit.candidate_patterns(patterns, math_object)
+            nb_candidates += len(candidates)
+            assert (first_match(candidates, math_object)
+                    == first_match(patterns, math_object))
+    nb_patterns = sum(len(patterns) for patterns in pattern_lists)
+    assert nb_candidates < len(math_objects) * nb_patterns / 5
+
+
+def test_pattern_snapshot(recorded_analyses, tmp_path):
+    """
+    Patterns loaded from a snapshot must display objects as parsed
+    patterns do.
+    """
+    math_objects = recorded_sub_objects(recorded_analyses)[:200]
+    snapshots = PatternInit.snapshots
+    try:
+        PatternInit.snapshots = None
+        PatternInit.pattern_init()
+        displays = [math_object.to_display(format_='utf8')
+                    for math_object in math_objects]
+
+        PatternInit.snapshots = PatternSnapshots(tmp_path)
+        PatternInit.pattern_init()  # Save snapshot
+        assert len(list(tmp_path.iterdir())) == 1
+        PatternInit.pattern_init()  # Load snapshot
+        assert [math_object.to_display(format_='utf8')
+                for math_object in math_objects] == displays
+    finally:
+        PatternInit.snapshots = snapshots
+        PatternInit.pattern_init()
+
+
+def test_snapshot_digest(monkeypatch):
+    """
+    Snapshots are not installed at import, and their digest depends on the
+    sources of the pattern grammar and classes.
+    """
+    assert PatternInit.snapshots is None
+    pairs = PatternInit.dic_list_pairs
+    digest = PatternSnapshots.digest(pairs)
+    assert digest == PatternSnapshots.digest(pairs)
+
+    monkeypatch.setattr(pattern_snapshot, '_sources_digest',
+                        pattern_snapshot.sources_digest() + "modified")
+    assert PatternSnapshots.digest(pairs) != digest
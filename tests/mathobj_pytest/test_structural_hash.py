@@ -0,0 +1,123 @@
+"""
+###########################################################################
+# test_structural_hash.py : test MathObject.structural_hash() and intern() #
+###########################################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from deaduction.pylib.mathobj import (MathObject, lean_entries,
+                                      parse_lean_entry)
+
+
+def recorded_math_types(recorded_analyses) -> list:
+    MathObject.clear()
+    return [parse_lean_entry(entry, use_cache=False).math_type
+            for analyses in recorded_analyses
+            for analysis in analyses
+            for entry in lean_entries(analysis)]
+
+
+def test_hash_is_compatible_with_equality(recorded_analyses):
+    """
+    Equal objects must have equal hashes, and hashes must not change the
+    result of equality tests.
+    """
+    math_types = recorded_math_types(recorded_analyses)[:150]
+    for mt0 in math_types:
+        for mt1 in math_types:
+            equal = mt0 == mt1
+            MathObject.caches_structural_hash = False
+            try:
+                assert equal == (mt0 == mt1)
+            finally:
+                MathObject.caches_structural_hash = True
+            if equal and mt0.structural_hash() is not None:
+                assert mt0.structural_hash() == mt1.structural_hash()
+
+
+def test_alpha_equivalence_and_invalidation():
+    x = MathObject.local_constant('x', 'ℝ')
+    y = MathObject.local_constant('y', 'ℝ')
+    zero = MathObject(node='NUMBER', info={'value': '0'}, children=[],
+                      math_type=x.math_type)
+
+    def positive(var):
+        return MathObject(node='PROP_>', info={}, children=[var, zero],
+                          math_type=MathObject.PROP)
+
+    for_all_x = MathObject.forall(x, positive(x))
+    for_all_y = MathObject.forall(y, positive(y))
+    assert for_all_x.bound_var.name != for_all_y.bound_var.name
+    assert hash(for_all_x) == hash(for_all_y)
+    assert for_all_x == for_all_y
+    assert len({for_all_x, for_all_y}) == 1
+
+    # Modifying a sub-object invalidates the hash of its parents
+    old_hash = hash(for_all_y)
+    zero.value = '1'
+    assert hash(for_all_y) != old_hash
+    assert for_all_y != MathObject.forall(y, MathObject(
+        node='PROP_>', info={}, children=[y, MathObject(
+            node='NUMBER', info={'value': '0'}, children=[],
+            math_type=x.math_type)], math_type=MathObject.PROP))
+
+
+def test_interning(recorded_analyses):
+    MathObject.clear()
+    MathObject.use_interning = True
+    try:
+        entry = lean_entries(recorded_analyses[0][1])[0]
+        target = parse_lean_entry(entry, use_cache=False)
+        same_target = parse_lean_entry(entry, use_cache=False)
+    finally:
+        MathObject.use_interning = False
+        MathObject.clear()
+    assert target is not same_target
+    shared = [(child0, child1) for child0, child1
+              in zip(target.math_type.children, same_target.math_type.children)
+              if not child0.all_bound_vars()]
+    assert shared
+    for child0, child1 in shared:
+        assert child0 is child1
+
+
+def test_display_cache():
+    MathObject.clear()
+    x = MathObject.local_constant('x', 'ℝ')
+    zero = MathObject(node='NUMBER', info={'value': '0'}, children=[],
+                      math_type=x.math_type)
+    prop = MathObject.forall(x, MathObject(node='PROP_>', info={},
+                                           children=[x, zero],
+                                           math_type=MathObject.PROP))
+    display = prop.to_display(format_='utf8')
+    assert prop.to_display(format_='utf8') == display
+    assert MathObject.display_cache.hits == 1
+    assert prop.to_display(format_='lean') != display
+
+    # Renaming bound vars, or modifying sub-objects, invalidates displays
+    prop.bound_var.name_bound_var('z')
+    assert prop.to_display(format_='utf8') == display.replace('x', 'z')
+    zero.value = '1'
+    assert prop.to_display(format_='utf8') == display.replace(
+        'x', 'z').replace('0', '1')
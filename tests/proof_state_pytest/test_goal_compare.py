@@ -0,0 +1,78 @@
+"""
+##########################################################
+# test_goal_compare.py : test comparison of goals        #
+##########################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from deaduction.pylib.mathobj import MathObject
+from deaduction.pylib.proof_state import Goal
+from deaduction.pylib.proof_state.proof_state import \
+    longest_increasing_subsequence
+
+TARGET = ("¿¿¿property¿[pp_type: P¿]: METAVAR¿[name: _mlocal._fresh.12.215¿]"
+          "¿= PROP¿[type: PROP¿]")
+
+
+def entry(name, typ='ℝ'):
+    return (f"¿¿¿object: LOCAL_CONSTANT¿[name: {name}¿/ identifier: "
+            f"0._fresh.1.{name}¿]¿= CONSTANT¿[name: {typ}/1¿]")
+
+
+def goal(entries) -> Goal:
+    # Lean gives new identifiers at each step:
+    MathObject.clear()
+    hypo_analysis = "context:\n" + "\n".join(entries) + "\n"
+    return Goal.from_lean_data(hypo_analysis, TARGET, to_prove=True)
+
+
+def names(math_objects) -> list:
+    return [math_object.name for math_object in math_objects]
+
+
+def test_longest_increasing_subsequence():
+    seq = [0, 1, 5, 2, 3, 9, 4]
+    indices = longest_increasing_subsequence(seq)
+    assert [seq[index] for index in indices] == [0, 1, 2, 3, 4]
+    assert longest_increasing_subsequence([]) == []
+    assert longest_increasing_subsequence([3, 2, 1]) in ([0], [1], [2])
+
+
+def test_compare():
+    old_goal = goal([entry(name) for name in "abcdef"])
+    # c is moved to the end with a new type, e is removed, g is new
+    new_goal = goal([entry('a'), entry('b'), entry('d'), entry('f'),
+                     entry('c', 'ℕ'), entry('g')])
+    diff = Goal.compare(new_goal, old_goal)
+
+    assert new_goal.context_diff is diff
+    assert names(new_goal.context) == list("abcdfg")
+    assert names(diff.added) == ['g']
+    assert names(diff.removed) == ['e']
+    assert names(diff.modified) == ['c']
+    assert names(diff.permuted) == ['c']
+    assert names(new_goal.new_context) == ['g']
+    assert names(new_goal.modified_context) == ['c']
+    assert [math_object.is_modified for math_object in new_goal.context] \
+        == [False, False, True, False, False, None]
@@ -0,0 +1,82 @@
+"""
+##########################################################
+# test_goal_naming.py : test bound vars naming in goals  #
+##########################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from copy import deepcopy
+
+from deaduction.pylib.mathobj import lean_entries
+from deaduction.pylib.proof_state import Goal
+
+
+def recorded_goals(recorded_analyses) -> list:
+    goals = []
+    for hypo_analysis, targets_analysis in recorded_analyses:
+        targets = [entry for entry in lean_entries(targets_analysis)
+                   if not entry.startswith("targets:")]
+        if targets:
+            goals.append(Goal.from_lean_data(hypo_analysis, targets[0]))
+    return goals
+
+
+def bound_vars_length(math_obj, hint) -> int:
+    """
+    Reference computation of the max nb of bound vars fitting hint in a
+    local context of math_obj.
+    """
+    if math_obj.is_app_of_local_constant():
+        return 0
+    local_length = 0
+    if math_obj.has_bound_var():
+        letter = math_obj.bound_var.preferred_letter()
+        if (math_obj.bound_var_type == hint.math_type and
+                (not letter or letter in hint.current_preferred_letters())):
+            local_length = 1
+    return local_length + max([bound_vars_length(child, hint)
+                               for child in math_obj.children] + [0])
+
+
+def test_max_local_length(recorded_analyses):
+    for goal in recorded_goals(recorded_analyses):
+        props = ([prop.math_type for prop in goal.context_props]
+                 + [goal.target.math_type])
+        for hint in goal.name_hints:
+            length = max(bound_vars_length(prop, hint) for prop in props)
+            assert goal.max_local_length(hint) == length
+
+
+def test_bound_vars_are_named_once(recorded_analyses):
+    for goal in recorded_goals(recorded_analyses):
+        bound_vars = goal.bound_variables()
+        assert all(not var.is_unnamed for var in bound_vars)
+        names = [var.display_name for var in bound_vars]
+        goal.smart_name_bound_vars()
+        assert [var.display_name for var in goal.bound_variables()] == names
+
+        # Cached data is not copied:
+        copied_goal = deepcopy(goal)
+        assert copied_goal._bound_var_data is None
+        assert len(copied_goal.bound_variables()) == len(bound_vars)
@@ -0,0 +1,212 @@
+"""
+##############################################################
+# test_proof_tree_controller.py : test ProofTreeController   #
+##############################################################
+
+Build random proof trees, with forks, sorry goals and history moves, and
+check that the ProofTreeWindow, updated incrementally from the changes of
+the ProofTree, is the same as a ProofTreeWindow built from scratch after
+each step.
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import random
+from typing import Optional
+
+import pytest
+from PySide2.QtWidgets import QApplication
+
+import deaduction.pylib.config.i18n
+from deaduction.dui.elements.proof_tree import ProofTreeController
+from deaduction.dui.elements.proof_tree.proof_tree_primitives import (
+    RawLabelMathObject, TargetWidget)
+from deaduction.dui.elements.proof_tree.proof_tree_widget import \
+    WidgetGoalBlock
+from deaduction.pylib.actions import CodeForLean, ProofMethods
+from deaduction.pylib.mathobj import MathObject
+from deaduction.pylib.proof_state import Goal, ProofState
+from deaduction.pylib.proof_step import ProofStep
+
+from test_proof_tree_status import ProofSimulator
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+qapp = QApplication.instance() or QApplication([])
+
+
+def target(nb) -> str:
+    return (f"¿¿¿property¿[pp_type: P{nb}¿]: "
+            f"METAVAR¿[name: _mlocal._fresh.12.2{nb}¿]¿= PROP¿[type: PROP¿]")
+
+
+def entry(nb) -> str:
+    return (f"¿¿¿object: LOCAL_CONSTANT¿[name: x{nb}¿/ identifier: "
+            f"0._fresh.1.x{nb}¿]¿= CONSTANT¿[name: ℝ/1¿]")
+
+
+def goal(target_nb, nb_objects) -> Goal:
+    MathObject.clear()
+    context = "".join(entry(nb) + "\n" for nb in range(nb_objects))
+    return Goal.from_lean_data("context:\n" + context, target(target_nb),
+                               to_prove=True)
+
+
+class DisplayedProofSimulator(ProofSimulator):
+    """
+    A ProofSimulator whose goals have various targets and contexts, and
+    whose steps are random intros, so that the display of each
+    WidgetGoalBlock depends on the step.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.nb_objects = 1
+        self.nb_sorry = 0
+        super().__init__()
+
+    def step(self, delta, sorry=False):
+        rng = self.rng
+        proof_step = ProofStep()
+        proof_step.parent_goal_node = self.proof_tree.current_goal_node
+        proof_step.lean_code = CodeForLean("")
+        if sorry:
+            proof_step.button_name = "proof_methods"
+            proof_step.user_input = [ProofMethods.reference_list.index('sorry')]
+            self.nb_sorry += 1
+        self.nb_goals += delta
+        if rng.random() < 0.4:
+            self.nb_objects += 1
+        goals = [goal(rng.randrange(3), self.nb_objects)
+                 for _ in range(min(self.nb_goals, 2))]
+        if not goals:
+            goals = [goal(0, self.nb_objects)]
+            goals[0].target.math_type = MathObject.NO_MORE_GOALS
+        proof_step.proof_state = ProofState(goals)
+        self.proof_tree.process_new_proof_step(proof_step)
+        for goal_node in proof_step.children_goal_nodes:
+            if goal_node.parent is proof_step and goal_node._is_intro is None:
+                draw = rng.random()
+                goal_node._is_intro = draw < 0.3
+                goal_node._is_implies = 0.3 <= draw < 0.4
+        self.proof_steps.append(proof_step)
+
+    def random_step(self, rng: random.Random):
+        if self.nb_goals > 1 and rng.random() < 0.15:
+            self.step(-1, sorry=True)
+        else:
+            super().random_step(rng)
+
+
+def label_state(label):
+    if label is None:
+        return None
+    return [label.text(), label.isEnabled(),
+            bool(getattr(label, 'bold', None)), label._is_activated,
+            label.timer.isActive()]
+
+
+def texts(widget) -> Optional[list]:
+    """
+    The texts to be displayed by the math labels of a context widget.
+    """
+    if widget is None:
+        return None
+    return [label.txt() for label in widget.findChildren(RawLabelMathObject)]
+
+
+def widget_parent(wgb) -> Optional[tuple]:
+    """
+    The goal_nb of the WidgetGoalBlock in which wgb is displayed, and
+    whether wgb is inside its target_widget, or None if wgb is not
+    displayed, e.g. if it lies in an obsolete target_widget.
+    """
+    widget = wgb.parentWidget()
+    in_target_widget = False
+    while widget is not None and not isinstance(widget, WidgetGoalBlock):
+        if isinstance(widget, TargetWidget):
+            if widget.parent_wgb.target_widget is not widget:
+                return None
+            in_target_widget = True
+        widget = widget.parentWidget()
+    return (widget.goal_nb, in_target_widget) if widget else None
+
+
+def widget_tree(controller) -> list:
+    """
+    A description of all WidgetGoalBlocks of controller's window: their
+    children and position in the window, enabled state, displayed
+    contexts, target and status, and merging.
+    """
+    description = []
+    wgbs = [controller.proof_tree_window.main_block]
+    while wgbs:
+        wgb = wgbs.pop()
+        wgbs.extend(reversed(wgb.logical_children))
+        target_widget = wgb.target_widget
+        description.append(
+            [wgb.goal_nb, type(wgb).__name__, wgb.isEnabled(),
+             [(child.goal_nb, type(child).__name__)
+              for child in wgb.children_widgets],
+             widget_parent(wgb) if wgb.logical_parent else None,
+             texts(wgb.context1_widget), texts(wgb.context2_widget),
+             texts(wgb.pure_context_widget),
+             target_widget.title_label.txt() if target_widget else None,
+             label_state(wgb.status_label) if target_widget else None,
+             bool(getattr(wgb.proof_title_label, 'bold', None)),
+             wgb.merge_up, wgb.merge_down])
+    return description
+
+
+def full_update(controller):
+    """
+    Update controller's window by building it from scratch.
+    """
+    controller.proof_tree_window.main_block = None
+    controller.update()
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_incremental_update(seed):
+    rng = random.Random(seed)
+    simulator = DisplayedProofSimulator(rng)
+    controller = ProofTreeController()
+    controller.set_proof_tree(simulator.proof_tree)
+    reference = ProofTreeController()
+    reference.set_proof_tree(simulator.proof_tree)
+
+    nb_history_moves = 0
+    for step_nb in range(40):
+        if step_nb:
+            nb_steps = len(simulator.proof_steps)
+            simulator.random_step(rng)
+            if len(simulator.proof_steps) < nb_steps:
+                nb_history_moves += 1
+        controller.update()  # Pops the changes of the ProofTree
+        full_update(reference)
+        assert widget_tree(controller) == widget_tree(reference), \
+            f"Step {step_nb}"
+        # A second update without changes does not modify the window
+        controller.update()
+        assert widget_tree(controller) == widget_tree(reference)
+    assert nb_history_moves and simulator.nb_sorry
@@ -0,0 +1,251 @@
+"""
+##########################################################
+# test_proof_tree_status.py : test ProofTree status      #
+##########################################################
+
+Build random proof trees, with forks, solved and sorry goals, and history
+moves, and check that the cached solved / sorry status of GoalNodes and the
+list of unsolved goal nodes agree with a naive recursive computation. Also
+check the changes recorded by the ProofTree for the display.
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import random
+
+import deaduction.pylib.config.i18n
+from deaduction.pylib.actions import CodeForLean, ProofMethods
+from deaduction.pylib.mathobj import MathObject
+from deaduction.pylib.proof_state import Goal, ProofState
+from deaduction.pylib.proof_step import ProofStep
+from deaduction.pylib.proof_tree import ProofTree
+
+TARGET = ("¿¿¿property¿[pp_type: P¿]: METAVAR¿[name: _mlocal._fresh.12.215¿]"
+          "¿= PROP¿[type: PROP¿]")
+ENTRY = ("¿¿¿object: LOCAL_CONSTANT¿[name: x¿/ identifier: "
+         "0._fresh.1.x¿]¿= CONSTANT¿[name: ℝ/1¿]")
+
+
+def goal() -> Goal:
+    MathObject.clear()
+    return Goal.from_lean_data("context:\n" + ENTRY + "\n", TARGET,
+                               to_prove=True)
+
+
+class ProofSimulator:
+    """
+    Feed a ProofTree with ProofSteps as the Coordinator does.
+    """
+
+    def __init__(self):
+        self.proof_tree = ProofTree()
+        self.proof_steps = []
+        self.nb_goals = 1
+        self.step(0)
+
+    def step(self, delta, sorry=False):
+        proof_step = ProofStep()
+        proof_step.parent_goal_node = self.proof_tree.current_goal_node
+        proof_step.lean_code = CodeForLean("")
+        if sorry:
+            proof_step.button_name = "proof_methods"
+            proof_step.user_input = [ProofMethods.reference_list.index('sorry')]
+        self.nb_goals += delta
+        goals = [goal() for _ in range(min(self.nb_goals, 2))]
+        if not goals:  # As in Coordinator.set_fireworks()
+            goals = [goal()]
+            goals[0].target.math_type = MathObject.NO_MORE_GOALS
+        proof_step.proof_state = ProofState(goals)
+        self.proof_tree.process_new_proof_step(proof_step)
+        self.proof_steps.append(proof_step)
+
+    def history_move(self, index):
+        """
+        Go back to the state right after self.proof_steps[index].
+        """
+        proof_step = self.proof_steps[index]
+        self.proof_tree.current_goal_node = proof_step.children_goal_nodes[0]
+        self.proof_tree.last_proof_step = proof_step
+        self.proof_steps = self.proof_steps[:index+1]
+        self.proof_tree.set_truncate_mode(True)
+        self.nb_goals = len(self.proof_tree.unsolved_goal_nodes())
+        self.proof_tree.set_truncate_mode(False)
+
+    def random_step(self, rng: random.Random):
+        action = rng.random()
+        if (action < 0.05 or self.nb_goals == 0) and len(self.proof_steps) > 2:
+            self.history_move(rng.randrange(1, len(self.proof_steps)))
+        elif self.nb_goals == 0:
+            return
+        elif action < 0.3:
+            self.step(1)
+        elif action < 0.55:
+            self.step(-1, sorry=(action < 0.35))
+        else:
+            self.step(0)
+
+
+def naive_solved(goal_node) -> bool:
+    if goal_node.is_immediately_solved or goal_node.is_no_more_goals():
+        return True
+    children = goal_node.children_goal_nodes
+    return bool(children) and all(naive_solved(child) for child in children)
+
+
+def naive_sorry(goal_node) -> bool:
+    if goal_node.is_immediately_sorry():
+        return True
+    children = goal_node.children_goal_nodes
+    sorry = [naive_sorry(child) for child in children]
+    solved = [naive_solved(child) for child in children]
+    return any(sorry) and all(sos[0] or sos[1] for sos in zip(solved, sorry))
+
+
+def naive_unsolved_leaves(goal_node) -> list:
+    if naive_solved(goal_node) or naive_sorry(goal_node):
+        return []
+    children = goal_node.children_goal_nodes
+    if not children:
+        return [goal_node]
+    return sum((naive_unsolved_leaves(child) for child in children), [])
+
+
+def all_goal_nodes(proof_tree) -> list:
+    goal_nodes = []
+    for proof_step in proof_tree.proof_steps():
+        goal_nodes.append(proof_step.parent_goal_node)
+        goal_nodes.extend(proof_step.children_goal_nodes)
+    return goal_nodes
+
+
+def check_status(proof_tree, truncate):
+    proof_tree.set_truncate_mode(truncate)
+    for goal_node in all_goal_nodes(proof_tree):
+        assert goal_node.is_recursively_solved() == naive_solved(goal_node)
+        assert goal_node.is_recursively_sorry() == naive_sorry(goal_node)
+        assert goal_node.unsolved_leaves == naive_unsolved_leaves(goal_node)
+    proof_tree.set_truncate_mode(False)
+
+
+def test_status_of_random_proofs():
+    for seed in range(8):
+        rng = random.Random(seed)
+        simulator = ProofSimulator()
+        proof_tree = simulator.proof_tree
+        for step_nb in range(50):
+            simulator.random_step(rng)
+            # Query status at each step, as the Coordinator does,
+            # so that obsolete cached values would be detected
+            proof_tree.set_truncate_mode(True)
+            expected = naive_unsolved_leaves(proof_tree.root_node)
+            proof_tree.set_truncate_mode(False)
+            assert proof_tree.unsolved_goal_nodes() == expected
+            if step_nb % 5 == 4:
+                check_status(proof_tree, truncate=False)
+                check_status(proof_tree, truncate=True)
+
+
+def test_solved_proof():
+    simulator = ProofSimulator()
+    simulator.step(1)
+    simulator.step(0)
+    root_node = simulator.proof_tree.root_node
+    assert not root_node.is_recursively_solved()
+    assert len(simulator.proof_tree.unsolved_goal_nodes()) == 2
+
+    simulator.step(-1, sorry=True)
+    assert not root_node.is_recursively_sorry()
+    simulator.step(-1)
+    # Goals solved by sorry are solved, and sorry:
+    assert root_node.is_recursively_solved()
+    assert root_node.is_recursively_sorry()
+    assert simulator.proof_tree.unsolved_goal_nodes() == []
+    # Status at the time of the 3rd step:
+    simulator.proof_tree.last_proof_step = simulator.proof_steps[2]
+    assert not root_node.is_recursively_sorry(truncate=True)
+    assert len(simulator.proof_tree.unsolved_goal_nodes()) == 2
+
+
+def test_deep_proof():
+    simulator = ProofSimulator()
+    for _ in range(1200):
+        simulator.step(0)
+    assert not simulator.proof_tree.root_node.is_recursively_solved()
+    simulator.step(-1)
+    assert simulator.proof_tree.root_node.is_recursively_solved()
+
+
+def test_changes():
+    simulator = ProofSimulator()
+    proof_tree = simulator.proof_tree
+    root_node = proof_tree.root_node
+    assert proof_tree.pop_changes().added == [root_node]
+    assert not proof_tree.pop_changes()
+
+    simulator.step(1)
+    changes = proof_tree.pop_changes()
+    assert changes.added == root_node.children_goal_nodes
+    assert root_node in changes.modified
+
+    # Solve first goal: second goal becomes current
+    first, second = root_node.children_goal_nodes
+    root_node.is_recursively_solved()  # Status in cache
+    simulator.step(-1)
+    changes = proof_tree.pop_changes()
+    assert not changes.added
+    assert first in changes.modified and second in changes.modified
+
+    # Solve second goal: root is solved
+    simulator.step(-1)
+    changes = proof_tree.pop_changes()
+    assert root_node.is_recursively_solved()
+    assert root_node in changes.status_changed
+
+    # New step after history move prunes the tree
+    simulator.history_move(1)
+    simulator.step(0)
+    changes = proof_tree.pop_changes()
+    assert first in changes.pruned and second in changes.pruned
+
+
+def test_changes_of_random_proofs():
+    """
+    Check that GoalNodes whose status changes are recorded.
+    """
+    for seed in range(4):
+        rng = random.Random(seed)
+        simulator = ProofSimulator()
+        proof_tree = simulator.proof_tree
+        for _ in range(40):
+            goal_nodes = all_goal_nodes(proof_tree)
+            old_status = {goal_node: (goal_node.is_recursively_solved(),
+                                      goal_node.is_recursively_sorry())
+                          for goal_node in goal_nodes}
+            proof_tree.pop_changes()
+            simulator.random_step(rng)
+            changes = proof_tree.pop_changes()
+            recorded = changes.modified + changes.status_changed
+            for goal_node in goal_nodes:
+                status = (naive_solved(goal_node), naive_sorry(goal_node))
+                if status != old_status[goal_node]:
+                    assert goal_node in recorded
@@ -0,0 +1,52 @@
+"""
+##########################################################
+# test_request_store.py : test LeanServer.RequestStore   #
+##########################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import trio
+
+from deaduction.pylib.lean.server import LeanServer
+
+
+def test_seq_num_after_restart():
+    """
+    When the Lean server is restarted, requests are numbered from 0 again,
+    and so is RequestStore.seq_num.
+    """
+    async def main():
+        store = LeanServer.RequestStore(4)
+        await store.open()
+        for expected in range(3):
+            seq_num, done_event = await store.store()
+            assert seq_num == expected
+        assert store.seq_num == 3
+
+        await store.open()  # Restart
+        assert store.seq_num == 0
+        seq_num, done_event = await store.store()
+        assert seq_num == 0 and store.seq_num == 1
+
+    trio.run(main)
@@ -0,0 +1,119 @@
+"""
+##########################################################
+# test_response_cache.py : test LeanResponseCache        #
+##########################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import toml
+import pytest
+
+from deaduction.pylib.config.vars import FACTORY_CONFIG_FILE_PATH
+from deaduction.pylib.lean.response import Message
+from deaduction.pylib.server.response_cache import LeanResponseCache
+
+
+def contents(seq_num, step="intro x") -> str:
+    return (f"-- Seq num {seq_num}\n"
+            f"lemma exercise.test : true :=\nbegin\n{step},\n"
+            f"targets_analysis2 {seq_num},\n"
+            f"hypo_analysis2 {seq_num},\nend\n")
+
+
+def messages(seq_num) -> [Message]:
+    severity = Message.Severity.information
+    return [Message(file_name="deaduction_lean", severity=severity,
+                    caption="", text=f"context #{seq_num}:\nx : _fresh.12.34",
+                    pos_line=5, pos_col=0),
+            Message(file_name="deaduction_lean", severity=severity,
+                    caption="", text=f"targets #{seq_num}:\ntrue",
+                    pos_line=4, pos_col=0, end_pos_line=4, end_pos_col=10)]
+
+
+@pytest.fixture
+def cache() -> LeanResponseCache:
+    return LeanResponseCache()
+
+
+def test_miss_then_hit(cache):
+    assert cache.get(contents(3), 3) is None
+    assert (cache.misses, cache.hits) == (1, 0)
+
+    cache.set(contents(3), 3, messages(3))
+    assert cache.get(contents(3), 3) == messages(3)
+    assert (cache.misses, cache.hits) == (1, 1)
+
+    # Another proof step is not in the cache
+    assert cache.get(contents(3, step="norm_num"), 3) is None
+
+
+def test_seq_num_placeholder(cache):
+    """
+    Contents that only differ by their seq_num have the same key, and cached
+    messages are replayed with the new seq_num.
+    """
+    cache.set(contents(3), 3, messages(3))
+    assert cache.key(contents(3), 3) == cache.key(contents(17), 17)
+    assert cache.get(contents(17), 17) == messages(17)
+
+    stored = cache.responses.get(cache.key(contents(3), 3))
+    assert not any("#3:" in msg.text for msg in stored)
+
+
+def test_key_digest(cache):
+    key = cache.key(contents(3), 3)
+    assert key == cache.key(contents(3), 3)
+    assert len(key) == 64 and int(key, 16) >= 0
+    assert key != cache.key(contents(3, step="norm_num"), 3)
+
+
+def test_sessions(cache):
+    """
+    Responses from another session, which may contain other fresh names,
+    are not used.
+    """
+    cache.set(contents(3), 3, messages(3))
+    cache.new_session()
+    assert cache.get(contents(3), 3) is None
+    assert not len(cache.responses)
+
+
+def test_eviction(cache):
+    cache.responses.max_size = 2
+    for step in range(2):
+        cache.set(contents(3, step=f"step {step}"), 3, messages(3))
+
+    # Use step 0, so that step 1 is the least recently used
+    assert cache.get(contents(3, step="step 0"), 3)
+    cache.set(contents(3, step="step 2"), 3, messages(3))
+
+    assert cache.get(contents(3, step="step 1"), 3) is None
+    assert cache.get(contents(3, step="step 0"), 3) == messages(3)
+    assert cache.get(contents(3, step="step 2"), 3) == messages(3)
+
+
+def test_disabled():
+    # The cache is disabled by default
+    factory_config = toml.load(FACTORY_CONFIG_FILE_PATH)
+    assert factory_config['others']['lean_response_cache'] is False
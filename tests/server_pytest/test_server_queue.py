@@ -0,0 +1,160 @@
+"""
+##########################################################
+# test_server_queue.py : test ServerQueue scheduling     #
+##########################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import trio
+import trio.testing
+
+from deaduction.pylib.server import ServerQueue, Task
+
+
+class TimeoutSignal:
+    def __init__(self):
+        self.responses = []
+
+    def emit(self, lean_response):
+        self.responses.append(lean_response)
+
+
+def run_queue(add_tasks, queue_class=ServerQueue, clock=None):
+    """
+    Run a ServerQueue (with a simulated Lean server, which is always
+    running), call add_tasks(queue, events) and wait until all tasks are
+    done. Return the list of events and the queue.
+    """
+    events = []
+    queues = []
+
+    async def main():
+        async with trio.open_nursery() as nursery:
+            queue = queue_class(nursery, TimeoutSignal())
+            queue.lean_server_running = trio.Event()
+            queue.lean_server_running.set()
+            queues.append(queue)
+            await add_tasks(queue, events)
+            await queue.queue_ended.wait()
+    trio.run(main, clock=clock)
+    return events, queues[0]
+
+
+def job_task(events, name, duration, **kwargs):
+    """
+    A task simulating a Lean request of given duration.
+    """
+    async def job(task):
+        events.append(('start', name))
+        await trio.sleep(duration)
+        events.append(('end', name))
+    return Task(fct=job, kwargs=kwargs)
+
+
+def test_preemption_and_coalescing():
+    async def add_tasks(queue, events):
+        queue.add_task(job_task(events, 'ips1', 0.3,
+                                priority=Task.BACKGROUND))
+        queue.add_task(job_task(events, 'ips2', 0.1,
+                                priority=Task.BACKGROUND, coalesce_key='ips2'))
+        queue.add_task(job_task(events, 'ips2bis', 0.1,
+                                priority=Task.BACKGROUND, coalesce_key='ips2'))
+        await trio.sleep(0.05)
+        queue.add_task(job_task(events, 'step', 0.05))
+
+    events, queue = run_queue(add_tasks)
+    # ips1 is preempted by step, then launched again, ips2 is superseded
+    assert events == [('start', 'ips1'),
+                      ('start', 'step'), ('end', 'step'),
+                      ('start', 'ips1'), ('end', 'ips1'),
+                      ('start', 'ips2bis'), ('end', 'ips2bis')]
+    assert queue.nb_preempted == 1 and queue.nb_coalesced == 1
+
+
+def slow_lean(queue_class, nb_tasks=20, lean_duration=12) -> tuple:
+    """
+    Simulate a slow Lean, answering each request in lean_duration
+    seconds, and return the number of timeouts, the number of failed
+    requests and the total (simulated) time when processing nb_tasks one
+    after the other.
+    """
+    async def lean(task):
+        await trio.sleep(lean_duration)
+
+    async def add_tasks(queue, events):
+        queue.started = True  # Not the first task
+        for counter in range(nb_tasks):
+            queue.add_task(Task(fct=lean, kwargs={}))
+            await queue.queue_ended.wait()
+
+    # Simulated time
+    clock = trio.testing.MockClock(autojump_threshold=0)
+    events, queue = run_queue(add_tasks, queue_class, clock)
+    return (queue.nb_timeouts, len(queue.timeout_signal.responses),
+            clock.current_time())
+
+
+class FixedTimeoutQueue(ServerQueue):
+    def __init__(self, nursery, timeout_signal):
+        super().__init__(nursery, timeout_signal)
+        self.timeout_policy.MIN_SAMPLES = float('inf')
+
+
+def test_adaptive_timeout():
+    """
+    With a fixed timeout shorter than Lean's answer, every request times
+    out once and succeeds when it is sent again with a doubled timeout:
+    the cost is one retry and the latency of the lost trial per request,
+    not a failure. Adaptive timeouts quickly stop these retries.
+    """
+    fixed_timeouts, fixed_failures, fixed_time = slow_lean(FixedTimeoutQueue)
+    timeouts, failures, time = slow_lean(ServerQueue)
+    assert fixed_timeouts == 20 and fixed_failures == 0
+    assert timeouts < 5 and failures == 0
+    assert fixed_time - time >= 10 * (fixed_timeouts - timeouts)
+
+
+def test_starting_timeout():
+    """
+    After a restart of Lean, the first task gets at least STARTING_TIMEOUT,
+    even if previous tasks were fast.
+    """
+    async def lean(task):
+        await trio.sleep(ServerQueue.STARTING_TIMEOUT - 5)
+
+    async def fast_lean(task):
+        await trio.sleep(0.1)
+
+    async def add_tasks(queue, events):
+        queue.started = True
+        for counter in range(queue.timeout_policy.WINDOW):
+            queue.add_task(Task(fct=fast_lean, kwargs={}))
+            await queue.queue_ended.wait()
+        queue.started = False  # Lean has been restarted
+        queue.add_task(Task(fct=lean, kwargs={}))
+
+    clock = trio.testing.MockClock(autojump_threshold=0)
+    events, queue = run_queue(add_tasks, clock=clock)
+    assert queue.nb_timeouts == 0
+    assert queue.actual_timeout == ServerQueue.STARTING_TIMEOUT
@@ -0,0 +1,121 @@
+"""
+##########################################################
+# test_filesystem.py : test hash lists and hash cache    #
+##########################################################
+
+Author(s)     : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Maintainer(s) : Frédéric Le Roux frederic.le-roux@imj-prg.fr
+Created       : 10 2026 (creation)
+Repo          : https://github.com/dEAduction/dEAduction
+
+Copyright (c) 2026 the d∃∀duction team
+
+This file is part of d∃∀duction.
+
+    d∃∀duction is free software: you can redistribute it and/or modify it under
+    the terms of the GNU General Public License as published by the Free
+    Software Foundation, either version 3 of the License, or (at your option)
+    any later version.
+
+    d∃∀duction is distributed in the hope that it will be useful, but WITHOUT
+    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+    FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+    more details.
+
+    You should have received a copy of the GNU General Public License along
+    with dEAduction.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+from pathlib import Path
+
+import deaduction.pylib.utils.filesystem as fs
+
+
+def make_tree(path):
+    for nb in range(10):
+        folder = path / f"dir{nb % 3}"
+        folder.mkdir(exist_ok=True)
+        (folder / f"file{nb}.lean").write_text(f"-- file {nb}\n" * nb)
+
+
+def test_file_hash(tmp_path):
+    data = bytes(range(256)) * (fs.HASH_CHUNK_SIZE // 100)
+    fp = tmp_path / "big"
+    fp.write_bytes(data)
+    assert fs.file_hash(fp) == hashlib.sha1(data).hexdigest()
+
+
+def test_cache_gives_same_hashlist(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    make_tree(tree)
+    reference = fs.HashList.from_path(tree)
+
+    cache_file = tmp_path / "cache.json"
+    cold_cache = fs.HashCache(cache_file)
+    cold = fs.HashList.from_path(tree, cache=cold_cache)
+    assert cold.files == reference.files
+    assert (cold_cache.hits, cold_cache.misses) == (0, 10)
+
+    warm_cache = fs.HashCache(cache_file)
+    warm = fs.HashList.from_path(tree, cache=warm_cache)
+    assert warm.files == reference.files
+    assert (warm_cache.hits, warm_cache.misses) == (10, 0)
+
+
+def test_cache_detects_modified_files(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    make_tree(tree)
+    cache_file = tmp_path / "cache.json"
+    fs.HashList.from_path(tree, cache=fs.HashCache(cache_file))
+
+    modified = tree / "dir1" / "file4.lean"
+    modified.write_text("-- modified\n")
+    (tree / "dir0" / "file3.lean").unlink()
+
+    cache = fs.HashCache(cache_file)
+    hlist = fs.HashList.from_path(tree, cache=cache)
+    assert hlist.files == fs.HashList.from_path(tree).files
+    assert (cache.hits, cache.misses) == (8, 1)
+    assert "dir0/file3.lean" not in fs.HashCache(cache_file).files
+
+
+def test_cleared_cache_rehashes_all_files(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    make_tree(tree)
+    cache_file = tmp_path / "cache.json"
+    fs.HashList.from_path(tree, cache=fs.HashCache(cache_file))
+
+    cache = fs.HashCache(cache_file)
+    cache.clear()
+    fs.HashList.from_path(tree, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 10)
+
+
+def test_hashlist_file_with_non_ascii_paths(tmp_path):
+    # Long enough for multibyte characters to cross read chunks
+    files = {Path(f"dir/fïché_{nb}.lean"): (f"{nb:040x}", "644")
+             for nb in range(2000)}
+    hlist_file = tmp_path / "test.hlist"
+    fs.HashList(files=files).to_file(hlist_file)
+    assert fs.HashList.from_file(hlist_file).files == files
+
+
+def test_hash_index(tmp_path):
+    files = {Path(f"dir{nb % 7}/fïché {nb}.lean"): (f"{nb:040x}", "644")
+             for nb in range(500)}
+    index_file = tmp_path / "test.hidx"
+    fs.HashIndex.write(fs.HashList(files=files), index_file)
+    with fs.HashIndex(index_file) as index:
+        for path, data in files.items():
+            assert index.get(path) == data
+        assert Path("dir0/missing.lean") not in index
+        assert Path("a") not in index
+        assert Path("zzz/z") not in index
+
+    fs.HashIndex.write(fs.HashList(), index_file)
+    with fs.HashIndex(index_file) as index:
+        assert Path("dir0/missing.lean") not in index